@@ -0,0 +1,20 @@
+-- Migración 010: Índices para paginación por cursor (keyset)
+-- Fecha: 2026-10-18
+-- Descripción: /quotes y /customers paginan con (created_at, id) < (cursor)
+-- ordenado DESC. Estos índices compuestos permiten resolver cada página con
+-- un index scan acotado, sin importar la profundidad de la página.
+
+-- 1. Cotizaciones: listado general
+CREATE INDEX IF NOT EXISTS idx_quotes_created_at_id
+ON quotes (created_at DESC, id DESC);
+
+-- 2. Cotizaciones: listado filtrado por estado
+CREATE INDEX IF NOT EXISTS idx_quotes_status_created_at_id
+ON quotes (status, created_at DESC, id DESC);
+
+-- 3. Clientes
+CREATE INDEX IF NOT EXISTS idx_customers_created_at_id
+ON customers (created_at DESC, id DESC);
+
+-- El índice simple por created_at queda cubierto por el compuesto
+DROP INDEX IF EXISTS idx_quotes_created_at;
@@ -0,0 +1,71 @@
+-- Migración 011: Agregados de ventas precalculados para el dashboard
+-- Fecha: 2026-10-18
+-- Descripción: Vistas materializadas con cotizaciones e ingresos por día,
+-- por estado y por producto (desde el jsonb items). GET /quotes/stats lee
+-- solo estas vistas, así el costo no depende del histórico de cotizaciones.
+-- La API las refresca periódicamente llamando a refresh_quote_stats().
+
+-- 1. Por día y estado (día en hora de Venezuela)
+CREATE MATERIALIZED VIEW IF NOT EXISTS quote_stats_daily AS
+SELECT
+    (created_at AT TIME ZONE 'America/Caracas')::date AS day,
+    status::text AS status,
+    count(*) AS quotes_count,
+    COALESCE(sum(total), 0) AS revenue
+FROM quotes
+GROUP BY 1, 2;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_quote_stats_daily_day_status
+ON quote_stats_daily (day, status);
+
+-- 2. Por estado (incluye la hora del último refresco)
+CREATE MATERIALIZED VIEW IF NOT EXISTS quote_stats_status AS
+SELECT
+    status::text AS status,
+    count(*) AS quotes_count,
+    COALESCE(sum(total), 0) AS revenue,
+    now() AS refreshed_at
+FROM quotes
+GROUP BY 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_quote_stats_status_status
+ON quote_stats_status (status);
+
+-- 3. Por producto y estado (un registro por item del jsonb)
+CREATE MATERIALIZED VIEW IF NOT EXISTS quote_stats_products AS
+SELECT
+    item->>'product_name' AS product_name,
+    q.status::text AS status,
+    count(DISTINCT q.id) AS quotes_count,
+    COALESCE(sum((item->>'quantity')::int), 0) AS quantity,
+    COALESCE(sum((item->>'subtotal')::numeric), 0) AS revenue
+FROM quotes q
+CROSS JOIN LATERAL jsonb_array_elements(q.items) AS item
+WHERE item ? 'product_name'
+GROUP BY 1, 2;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_quote_stats_products_product_status
+ON quote_stats_products (product_name, status);
+
+CREATE INDEX IF NOT EXISTS idx_quote_stats_products_status_revenue
+ON quote_stats_products (status, revenue DESC);
+
+-- 4. Refresco sin bloquear lecturas (CONCURRENTLY necesita los índices únicos)
+CREATE OR REPLACE FUNCTION refresh_quote_stats()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY quote_stats_daily;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY quote_stats_status;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY quote_stats_products;
+END;
+$$;
+
+-- Las vistas materializadas no tienen RLS: no exponerlas al rol anónimo
+REVOKE ALL ON quote_stats_daily, quote_stats_status, quote_stats_products FROM anon;
+GRANT SELECT ON quote_stats_daily, quote_stats_status, quote_stats_products TO authenticated, service_role;
+REVOKE EXECUTE ON FUNCTION refresh_quote_stats() FROM PUBLIC, anon;
+GRANT EXECUTE ON FUNCTION refresh_quote_stats() TO service_role;
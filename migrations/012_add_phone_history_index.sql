@@ -0,0 +1,28 @@
+-- Migración 012: Historial de cotizaciones por teléfono
+-- Fecha: 2026-10-18
+-- Descripción: Índice compuesto (client_phone, created_at DESC, id DESC) para
+-- leer "las últimas N cotizaciones de un teléfono" con un index scan acotado,
+-- y función para resolver muchos teléfonos en una sola consulta (broadcast).
+
+-- 1. Índice compuesto; cubre también las búsquedas solo por teléfono
+CREATE INDEX IF NOT EXISTS idx_quotes_client_phone_created_at
+ON quotes (client_phone, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_quotes_client_phone;
+
+-- 2. Últimas `per_phone` cotizaciones de cada teléfono (un index scan por teléfono)
+CREATE OR REPLACE FUNCTION latest_quotes_by_phones(phones text[], per_phone int DEFAULT 1)
+RETURNS SETOF quotes
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT q.*
+    FROM unnest(phones) AS p(phone)
+    CROSS JOIN LATERAL (
+        SELECT *
+        FROM quotes
+        WHERE client_phone = p.phone
+        ORDER BY created_at DESC, id DESC
+        LIMIT per_phone
+    ) q;
+$$;
@@ -0,0 +1,40 @@
+-- Migración 013: Eventos de entrega de mensajes de WhatsApp
+-- Fecha: 2026-10-18
+-- Descripción: Una fila por (mensaje, estado) con los callbacks de estado de
+-- Meta (sent, delivered, read, failed) y el envío aceptado por la API
+-- (accepted, con el broadcast que lo originó). Meta reenvía callbacks, así
+-- que la clave primaria hace que reinsertar un evento no duplique filas.
+
+-- 1. Tabla compacta: sin payload crudo, solo lo necesario para el embudo
+CREATE TABLE IF NOT EXISTS message_events (
+    wa_message_id TEXT NOT NULL,
+    status TEXT NOT NULL CHECK (status IN ('accepted', 'sent', 'delivered', 'read', 'failed')),
+    recipient TEXT,
+    broadcast_id TEXT,
+    error_code INTEGER,
+    occurred_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (wa_message_id, status)
+);
+
+-- 2. Mensajes de cada broadcast (solo las filas 'accepted' lo tienen)
+CREATE INDEX IF NOT EXISTS idx_message_events_broadcast
+ON message_events (broadcast_id)
+WHERE broadcast_id IS NOT NULL;
+
+ALTER TABLE message_events ENABLE ROW LEVEL SECURITY;
+
+-- 3. Embudo de un broadcast: mensajes que alcanzaron cada estado
+CREATE OR REPLACE FUNCTION broadcast_funnel(p_broadcast_id text)
+RETURNS TABLE (status text, messages bigint)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT e.status, COUNT(*) AS messages
+    FROM message_events a
+    JOIN message_events e ON e.wa_message_id = a.wa_message_id
+    WHERE a.broadcast_id = p_broadcast_id
+      AND a.status = 'accepted'
+    GROUP BY e.status;
+$$;
+
+GRANT EXECUTE ON FUNCTION broadcast_funnel(text) TO authenticated, service_role;
@@ -0,0 +1,40 @@
+-- Migración 014: Ranking de productos sin filtro de estado
+-- Fecha: 2026-10-19
+-- Descripción: quote_stats_products tiene una fila por producto y estado;
+-- sumarla en la API leía la vista completa (y PostgREST la corta en
+-- max-rows). Esta vista agrupa por producto para que el ranking se ordene
+-- y limite en la base, igual que el ranking filtrado por estado.
+
+-- 1. Por producto (todos los estados; cada cotización tiene un solo estado)
+CREATE MATERIALIZED VIEW IF NOT EXISTS quote_stats_products_total AS
+SELECT
+    product_name,
+    sum(quotes_count)::bigint AS quotes_count,
+    sum(quantity)::bigint AS quantity,
+    sum(revenue) AS revenue
+FROM quote_stats_products
+GROUP BY 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_quote_stats_products_total_product
+ON quote_stats_products_total (product_name);
+
+CREATE INDEX IF NOT EXISTS idx_quote_stats_products_total_revenue
+ON quote_stats_products_total (revenue DESC);
+
+-- 2. Refrescar también la nueva vista (después de la que le da origen)
+CREATE OR REPLACE FUNCTION refresh_quote_stats()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY quote_stats_daily;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY quote_stats_status;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY quote_stats_products;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY quote_stats_products_total;
+END;
+$$;
+
+REVOKE ALL ON quote_stats_products_total FROM anon;
+GRANT SELECT ON quote_stats_products_total TO authenticated, service_role;
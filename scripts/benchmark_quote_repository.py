@@ -0,0 +1,84 @@
+"""
+Comparativa de throughput entre los backends de QuoteRepository.
+
+Ejecuta N operaciones concurrentes (insert + get_by_id + get_page) contra
+cada backend y reporta operaciones por segundo. "supabase" pasa por
+PostgREST (HTTP) con el cliente asíncrono compartido; "asyncpg" habla el
+protocolo de Postgres directamente con un pool de conexiones.
+
+Uso:
+    DATABASE_URL=postgresql://... python scripts/benchmark_quote_repository.py --ops 200 --concurrency 20
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.domain.entities.quote import Quote, QuoteItem
+from src.infrastructure.config.settings import settings
+
+
+def _quote(i: int) -> Quote:
+    return Quote(
+        client_phone="+58 0000000000",
+        items=[QuoteItem(product_name=f"Bench {i}", quantity=1, unit_price=1.0, subtotal=1.0)],
+        total=1.0,
+        notes="benchmark"
+    )
+
+
+async def _run(repo, ops: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    created_ids = []
+
+    async def one(i: int):
+        async with semaphore:
+            quote = await repo.create(_quote(i))
+            created_ids.append(quote.id)
+            await repo.get_by_id(quote.id)
+            await repo.get_page(limit=20)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(ops)))
+    elapsed = time.perf_counter() - start
+
+    for quote_id in created_ids:
+        await repo.delete(quote_id)
+
+    return {"elapsed_s": elapsed, "ops_per_s": ops * 3 / elapsed}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--backends", default="supabase,asyncpg")
+    args = parser.parse_args()
+
+    for backend in args.backends.split(","):
+        if backend == "asyncpg":
+            if not settings.database_url:
+                print("asyncpg: omitido (DATABASE_URL no configurada)")
+                continue
+            from src.infrastructure.database.asyncpg_quote_repository import AsyncpgQuoteRepository
+            repo = AsyncpgQuoteRepository()
+        else:
+            from src.infrastructure.database.supabase_quote_repository import SupabaseQuoteRepository
+            repo = SupabaseQuoteRepository()
+
+        result = await _run(repo, args.ops, args.concurrency)
+        print(
+            f"{backend:>9}: {args.ops} x (insert + get_by_id + get_page) "
+            f"en {result['elapsed_s']:.2f}s -> {result['ops_per_s']:.1f} ops/s "
+            f"(concurrencia {args.concurrency})"
+        )
+
+        if hasattr(repo, "close"):
+            await repo.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
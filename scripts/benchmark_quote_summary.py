@@ -0,0 +1,143 @@
+"""
+Comparativa entre el listado completo de cotizaciones y la proyección resumida.
+
+Genera filas sintéticas con la misma forma que devuelve PostgREST y mide,
+por página, el tamaño del JSON de respuesta y el tiempo de conversión
+(fila -> entidad -> schema -> JSON) de cada camino. No usa la red.
+
+Uso:
+    python scripts/benchmark_quote_summary.py --rows 100 --items 6 --rounds 200
+"""
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.domain.entities.quote import QuoteStatus
+from src.infrastructure.api.schemas import (
+    QuoteItemSchema,
+    QuoteListResponseSchema,
+    QuoteResponseSchema,
+    QuoteSummaryListResponseSchema,
+    QuoteSummarySchema
+)
+from src.infrastructure.database.supabase_quote_repository import SupabaseQuoteRepository
+
+
+def _row(i: int, items: int) -> dict:
+    """Fila de cotización tal como la devuelve select("*, customers(full_name)")."""
+    quote_items = [
+        {
+            "product_name": f"Producto de prueba {j}",
+            "quantity": j + 1,
+            "unit_price": 12.5,
+            "subtotal": round((j + 1) * 12.5, 2),
+            "description": "Descripción del producto para la cotización",
+            "image_url": f"https://example.com/storage/v1/object/public/products/{j}.jpg"
+        }
+        for j in range(items)
+    ]
+    return {
+        "id": i,
+        "client_phone": "+58 412-1234567",
+        "items": quote_items,
+        "total": round(sum(item["subtotal"] for item in quote_items), 2),
+        "status": "pending",
+        "created_at": "2026-01-27T10:00:00.123456+00:00",
+        "updated_at": "2026-01-27T10:05:00.123456+00:00",
+        "notes": "Cliente frecuente, entregar en la tarde",
+        "customer_id": "6f1c2a9e-0000-4000-8000-000000000000",
+        "client_name": "Cliente Benchmark",
+        "client_dni": "V-12345678",
+        "client_address": "Av. Bolívar, Valencia",
+        "customers": {"full_name": "Cliente Benchmark"}
+    }
+
+
+def _full_page(repo, rows) -> str:
+    quotes = [repo._dict_to_quote(row) for row in rows]
+    return QuoteListResponseSchema(
+        quotes=[
+            QuoteResponseSchema(
+                id=q.id,
+                client_phone=q.client_phone,
+                items=[
+                    QuoteItemSchema(
+                        product_name=item.product_name,
+                        quantity=item.quantity,
+                        unit_price=item.unit_price,
+                        subtotal=item.subtotal,
+                        description=item.description
+                    )
+                    for item in q.items
+                ],
+                total=q.total,
+                status=QuoteStatus(q.status),
+                notes=q.notes,
+                created_at=q.created_at,
+                updated_at=q.updated_at,
+                client_name=q.client_name,
+                client_dni=q.client_dni,
+                client_address=q.client_address
+            )
+            for q in quotes
+        ],
+        total=len(quotes),
+        skip=0,
+        limit=len(quotes)
+    ).model_dump_json()
+
+
+def _summary_page(repo, rows) -> str:
+    summaries = [repo._dict_to_summary(row) for row in rows]
+    return QuoteSummaryListResponseSchema(
+        quotes=[
+            QuoteSummarySchema(
+                id=s.id,
+                client_phone=s.client_phone,
+                client_name=s.client_name,
+                total=s.total,
+                status=QuoteStatus(s.status),
+                created_at=s.created_at
+            )
+            for s in summaries
+        ],
+        limit=len(summaries)
+    ).model_dump_json()
+
+
+def _measure(fn, repo, rows, rounds: int) -> tuple:
+    body = fn(repo, rows)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(repo, rows)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / rounds
+    return len(body.encode("utf-8")), elapsed_ms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100, help="Filas por página")
+    parser.add_argument("--items", type=int, default=6, help="Items por cotización")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    # El cliente asíncrono no abre conexiones al construirse
+    repo = SupabaseQuoteRepository()
+    full_rows = [_row(i, args.items) for i in range(1, args.rows + 1)]
+    summary_keys = ("id", "client_phone", "client_name", "total", "status", "created_at", "customers")
+    summary_rows = [{key: row[key] for key in summary_keys} for row in full_rows]
+
+    full_bytes, full_ms = _measure(_full_page, repo, full_rows, args.rounds)
+    summary_bytes, summary_ms = _measure(_summary_page, repo, summary_rows, args.rounds)
+
+    print(f"Página de {args.rows} cotizaciones con {args.items} items cada una:")
+    print(f"  completo: {full_bytes / 1024:8.1f} KiB  {full_ms:7.2f} ms/página")
+    print(f"  resumen:  {summary_bytes / 1024:8.1f} KiB  {summary_ms:7.2f} ms/página")
+    print(f"  reducción: {full_bytes / summary_bytes:.1f}x bytes, {full_ms / summary_ms:.1f}x tiempo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Comparativa entre la cola de reintentos JSON y la de SQLite.
+
+Llena cada cola con N mensajes (por defecto 100.000, un 1% vencidos) y mide
+el tiempo por operación de add_message, get_queue_size, la búsqueda de
+vencidos y update_message_attempt. La cola JSON se llena escribiendo el
+archivo una sola vez (con add_message tardaría horas) y sus operaciones se
+miden con pocas repeticiones porque cada una relee y reescribe el archivo.
+
+Uso:
+    python scripts/benchmark_retry_queue.py --messages 100000 --ops 200
+"""
+import sys
+import os
+import json
+import time
+import logging
+import argparse
+import tempfile
+from dataclasses import asdict
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.infrastructure.external.retry_queue import RetryQueue, RetryMessage
+from src.infrastructure.external.sqlite_retry_queue import SQLiteRetryQueue
+
+
+def _messages(count: int):
+    now = datetime.now()
+    for i in range(count):
+        due = i % 100 == 0
+        yield RetryMessage(
+            id=f"msg_{i}",
+            to=f"58412{i:07d}",
+            message="✅ *Cotización Generada*\n\n💰 *Total: $51.00*",
+            quote_data={"items": [{"product_name": "Camisa", "quantity": 2}], "total": 51.0},
+            attempts=0,
+            max_attempts=5,
+            next_retry=(now + timedelta(minutes=-5 if due else 60)).isoformat(),
+            created_at=now.isoformat(),
+            last_error="timeout"
+        )
+
+
+def _fill_json(path: str, count: int) -> RetryQueue:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([asdict(msg) for msg in _messages(count)], f, ensure_ascii=False)
+    return RetryQueue(queue_file=path)
+
+
+def _fill_sqlite(path: str, count: int) -> SQLiteRetryQueue:
+    queue = SQLiteRetryQueue(db_file=path)
+    with queue._lock:
+        queue._conn.execute("BEGIN")
+        queue._conn.executemany(
+            "INSERT INTO retry_messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    msg.id, msg.to, msg.message, json.dumps(msg.quote_data), msg.attempts,
+                    msg.max_attempts, datetime.fromisoformat(msg.next_retry).timestamp(),
+                    msg.created_at, msg.last_error, None
+                )
+                for msg in _messages(count)
+            ]
+        )
+        queue._conn.execute("COMMIT")
+    return queue
+
+
+def _time_ms(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(i)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def _measure(name: str, queue, repeat: int, count: int):
+    results = {
+        "add_message": _time_ms(lambda i: queue.add_message(f"new_{i}", "584121234567", "Hola"), repeat),
+        "get_queue_size": _time_ms(lambda i: queue.get_queue_size(), repeat),
+        "get_messages_to_retry": _time_ms(lambda i: queue.get_messages_to_retry(), repeat),
+        "update_message_attempt": _time_ms(
+            lambda i: queue.update_message_attempt(f"msg_{(i * 7919) % count}", success=False, error="timeout"),
+            repeat
+        ),
+    }
+    print(f"\n{name} ({repeat} repeticiones por operación)")
+    for operation, ms in results.items():
+        print(f"  {operation:<24} {ms:>10.3f} ms/op")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la cola de reintentos")
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--ops", type=int, default=200, help="Repeticiones por operación en SQLite")
+    parser.add_argument("--json-ops", type=int, default=3, help="Repeticiones por operación en JSON")
+    args = parser.parse_args()
+    # Cada add/update registra una línea de log
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Cola con {args.messages} mensajes ({args.messages // 100} vencidos)")
+
+        start = time.perf_counter()
+        json_queue = _fill_json(os.path.join(tmp, "retry_queue.json"), args.messages)
+        print(f"JSON llenado en {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        sqlite_queue = _fill_sqlite(os.path.join(tmp, "retry_queue.db"), args.messages)
+        print(f"SQLite llenado en {time.perf_counter() - start:.2f} s")
+
+        json_results = _measure("JSON", json_queue, args.json_ops, args.messages)
+        sqlite_results = _measure("SQLite (WAL)", sqlite_queue, args.ops, args.messages)
+        sqlite_queue.close()
+
+    print("\nMejora (JSON / SQLite)")
+    for operation in json_results:
+        print(f"  {operation:<24} {json_results[operation] / max(sqlite_results[operation], 1e-6):>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
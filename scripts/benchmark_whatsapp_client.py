@@ -0,0 +1,153 @@
+"""
+Latencia de envío a la Graph API: cliente nuevo por llamada vs cliente compartido.
+
+Levanta el mock local de la Graph API (scripts/mock_graph_api.py) sobre HTTPS
+(certificado autofirmado generado con openssl) y mide send_message:
+- "por llamada": abre y cierra un httpx.AsyncClient en cada envío (comportamiento anterior)
+- "compartido": WhatsAppService con un único cliente keep-alive
+
+Uso:
+    python scripts/benchmark_whatsapp_client.py --sends 200 --concurrency 10
+"""
+import sys
+import os
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _self_signed_cert(directory: str) -> tuple:
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-keyout", key, "-out", cert, "-subj", "/CN=localhost",
+            "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1"
+        ],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+def _start_mock_server(port: int, cert: str, key: str):
+    """Mock de la Graph API (scripts/mock_graph_api.py) sobre HTTPS en un hilo aparte."""
+    import uvicorn
+    from scripts.mock_graph_api import MockGraphAPI
+
+    app = MockGraphAPI().app
+
+    config = uvicorn.Config(
+        app, host="127.0.0.1", port=port, log_level="warning",
+        ssl_certfile=cert, ssl_keyfile=key
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _per_call_send(service, cert: str, to: str):
+    """Comportamiento anterior: un AsyncClient nuevo (y handshake TLS) por envío."""
+    import httpx
+    payload = {
+        "messaging_product": "whatsapp",
+        "recipient_type": "individual",
+        "to": to,
+        "type": "text",
+        "text": {"preview_url": False, "body": "benchmark"}
+    }
+    async with httpx.AsyncClient(verify=cert) as client:
+        response = await client.post(
+            f"{service.base_url}/{service.phone_number_id}/messages",
+            json=payload, headers=service._headers()
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+async def _measure(send, sends: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await send(f"58412{i:07d}")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(sends)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "throughput": sends / elapsed,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sends", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = _self_signed_cert(tmp)
+        port = _free_port()
+        os.environ["WHATSAPP_API_URL"] = f"https://127.0.0.1:{port}"
+        os.environ.setdefault("WHATSAPP_PHONE_NUMBER_ID", "123456")
+        os.environ.setdefault("WHATSAPP_ACCESS_TOKEN", "benchmark-token")
+        # Se mide el transporte, no el limitador de envíos
+        os.environ["WHATSAPP_RATE_LIMIT_ENABLED"] = "false"
+        server = _start_mock_server(port, cert, key)
+
+        import httpx
+        from src.infrastructure.config.settings import settings
+        from src.infrastructure.external.whatsapp_service import WhatsAppService
+
+        # Misma configuración que get_whatsapp_http_client, confiando en el certificado local
+        shared_client = httpx.AsyncClient(
+            http2=True,
+            verify=cert,
+            limits=httpx.Limits(
+                max_connections=settings.whatsapp_http_max_connections,
+                max_keepalive_connections=settings.whatsapp_http_max_keepalive,
+                keepalive_expiry=settings.whatsapp_http_keepalive_expiry
+            ),
+            timeout=httpx.Timeout(settings.whatsapp_http_timeout, connect=settings.whatsapp_http_connect_timeout)
+        )
+        service = WhatsAppService(http_client=shared_client)
+
+        for concurrency in (1, args.concurrency):
+            before = await _measure(lambda to: _per_call_send(service, cert, to), args.sends, concurrency)
+            after = await _measure(lambda to: service.send_message(to, "benchmark"), args.sends, concurrency)
+            print(f"{args.sends} envíos, concurrencia {concurrency}:")
+            for label, result in (("por llamada", before), ("compartido", after)):
+                print(
+                    f"  {label:>11}: p50 {result['p50']:6.2f} ms  p95 {result['p95']:6.2f} ms  "
+                    f"{result['throughput']:7.1f} msg/s"
+                )
+
+        await shared_client.aclose()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
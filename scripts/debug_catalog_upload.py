@@ -8,6 +8,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.infrastructure.services.invoice_service import InvoiceService
 from src.infrastructure.services.storage_service import StorageService
 from src.domain.services.quote_service import QuoteService
+from src.infrastructure.config.database import get_async_supabase_client
+from src.infrastructure.database.product_repository import ProductRepository
 from src.infrastructure.config.settings import settings
 
 async def main():
@@ -16,8 +18,9 @@ async def main():
     # 1. Verificar Servicio de Factura (PDF)
     try:
         invoice_service = InvoiceService()
-        quote_service = QuoteService()
-        products = quote_service.get_available_products()
+        quote_service = QuoteService(ProductRepository(get_async_supabase_client()))
+        await quote_service.refresh_catalog()
+        products = await quote_service.get_available_products()
         
         if products:
             pdf_path = invoice_service.generate_catalog_pdf(products)
@@ -17,7 +17,7 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 # Imports del proyecto
-from src.infrastructure.config.database import get_supabase_client
+from src.infrastructure.config.database import get_async_supabase_client
 from src.infrastructure.database.product_repository import ProductRepository
 from src.infrastructure.database.session_repository import SessionRepository
 from src.domain.repositories.quote_repository import QuoteRepository # Abstract
@@ -29,9 +29,14 @@ class MockQuoteRepository(QuoteRepository):
         return quote
     async def get_by_id(self, id): return None
     async def get_all(self, **kwargs): return []
+    async def get_page(self, limit=100, cursor=None, status=None): return [], None
+    async def get_summary_page(self, limit=100, cursor=None, status=None): return [], None
     async def update(self, id, quote): return None
+    async def update_status_bulk(self, new_status, **kwargs): return 0
     async def delete(self, id): return True
     async def get_by_phone(self, phone): return []
+    async def get_latest_by_phone(self, phone, limit=1): return []
+    async def get_latest_by_phones(self, phones, limit=1): return {}
 
 from src.domain.services.quote_service import QuoteService
 from src.infrastructure.external.whatsapp_service import WhatsAppService
@@ -57,7 +62,7 @@ async def main():
     try:
         # 1. Inicializar dependencias reales (Supabase)
         print("1. Conectando a Supabase...")
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
         
         # 2. Repositorios
         print("2. Inicializando Repositorios...")
@@ -68,6 +73,7 @@ async def main():
         # 3. Servicios
         print("3. Inicializando Servicios...")
         quote_service = QuoteService(product_repo)
+        await quote_service.refresh_catalog()
         
         # Verificar carga de productos
         print(f"   -> Productos en caché: {len(quote_service.product_cache)}")
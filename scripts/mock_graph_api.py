@@ -0,0 +1,255 @@
+"""
+Servidor local que imita la WhatsApp Cloud API (Graph API) para pruebas de carga.
+
+Acepta los endpoints que usa WhatsAppService:
+- POST /{version}/{phone_id}/messages  (mensajes y acuses de lectura)
+- POST /{version}/{phone_id}/media     (subida de archivos)
+- GET  /{version}/{phone_id}           (verificación de credenciales)
+
+Permite inyectar latencia, errores 500 y respuestas 429 (aleatorias, por
+límite de mensajes por segundo o programadas con fail_next). El resumen
+cuenta todo el tráfico; los cuerpos se guardan solo para las últimas
+`max_recorded` peticiones (0 = no guardarlos), así una prueba de carga larga
+no hace crecer la memoria. Endpoints de control:
+- GET  /__mock/traffic?limit=100  (resumen y últimas peticiones registradas)
+- POST /__mock/config   (cambiar la inyección en caliente)
+- POST /__mock/reset    (vaciar el registro)
+
+Uso como proceso:
+    python scripts/mock_graph_api.py --port 8787 --latency-ms 80 --rate-limit-rate 0.02 --max-rps 80
+    WHATSAPP_API_URL=http://127.0.0.1:8787 uvicorn src.main:app
+
+Uso como app ASGI (tests, benchmarks):
+    mock = MockGraphAPI(MockGraphConfig(latency_ms=50))
+    service = WhatsAppService(http_client=mock.http_client())
+"""
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, fields
+from typing import Deque, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class MockGraphConfig:
+    """Fallas y latencia a inyectar (las tasas van de 0 a 1)."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    max_rps: Optional[float] = None
+    retry_after: Optional[int] = 1
+    rate_limit_code: int = 130429
+    seed: Optional[int] = None
+    max_recorded: int = 10000
+
+
+class MockGraphAPI:
+    """Mock de la Graph API con registro de tráfico."""
+
+    def __init__(self, config: Optional[MockGraphConfig] = None):
+        self.config = config or MockGraphConfig()
+        # Últimas peticiones con su cuerpo (acotado); el resumen usa contadores
+        self.requests: Deque[Dict] = deque(maxlen=self.config.max_recorded)
+        self._counts = {"by_endpoint": Counter(), "by_type": Counter(), "by_status": Counter()}
+        self._total = 0
+        self._recipients = set()
+        self._random = random.Random(self.config.seed)
+        self._scripted: Deque[Tuple[int, Optional[int]]] = deque()
+        self._message_seq = 0
+        self._media_seq = 0
+        self._window_start = 0.0
+        self._window_count = 0
+        self.app = self._build_app()
+
+    def fail_next(self, count: int = 1, status_code: int = 429, error_code: Optional[int] = 130429):
+        """Programar las próximas `count` respuestas como fallidas."""
+        self._scripted.extend([(status_code, error_code)] * count)
+
+    def reset(self):
+        """Vaciar el registro de tráfico, los contadores y las fallas programadas."""
+        self.requests = deque(maxlen=self.config.max_recorded)
+        for counter in self._counts.values():
+            counter.clear()
+        self._total = 0
+        self._recipients.clear()
+        self._scripted.clear()
+
+    def http_client(self, base_url: str = "https://graph.facebook.com") -> httpx.AsyncClient:
+        """Cliente httpx que llama al mock en memoria (sin red)."""
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url=base_url)
+
+    def summary(self) -> Dict:
+        """Totales por endpoint, tipo de mensaje y código de respuesta (todo el tráfico)."""
+        return {
+            "total": self._total,
+            **{name: dict(counter) for name, counter in self._counts.items()},
+            "recipients": len(self._recipients),
+            "recorded": len(self.requests),
+        }
+
+    def messages_to(self, recipient: str) -> List[Dict]:
+        """
+        Cuerpos aceptados (200) enviados a un destinatario, en orden de llegada.
+
+        Solo cubre las últimas `max_recorded` peticiones.
+        """
+        return [
+            r["body"] for r in self.requests
+            if r["endpoint"] == "messages" and r["to"] == recipient and r["status_code"] == 200
+        ]
+
+    def _injected_failure(self) -> Optional[JSONResponse]:
+        if self._scripted:
+            status_code, error_code = self._scripted.popleft()
+            return self._error(status_code, error_code)
+
+        if self.config.max_rps:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            if self._window_count > self.config.max_rps:
+                return self._error(429, self.config.rate_limit_code)
+
+        roll = self._random.random()
+        if roll < self.config.rate_limit_rate:
+            return self._error(429, self.config.rate_limit_code)
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            return self._error(500, 1)
+        return None
+
+    def _error(self, status_code: int, error_code: Optional[int]) -> JSONResponse:
+        headers = {}
+        if status_code == 429 and self.config.retry_after is not None:
+            headers["Retry-After"] = str(self.config.retry_after)
+        return JSONResponse(
+            status_code=status_code,
+            content={"error": {"message": "Mock Graph API error", "type": "OAuthException", "code": error_code}},
+            headers=headers
+        )
+
+    async def _simulate(self, endpoint: str, to: Optional[str], msg_type: Optional[str], body, ok) -> JSONResponse:
+        delay = self.config.latency_ms + self._random.uniform(0, self.config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        response = self._injected_failure() or JSONResponse(ok())
+        self._total += 1
+        self._counts["by_endpoint"][endpoint] += 1
+        if msg_type:
+            self._counts["by_type"][msg_type] += 1
+        self._counts["by_status"][response.status_code] += 1
+        if to:
+            self._recipients.add(to)
+        if self.requests.maxlen:
+            self.requests.append({
+                "at": time.time(),
+                "endpoint": endpoint,
+                "to": to,
+                "type": msg_type,
+                "status_code": response.status_code,
+                "body": body,
+            })
+        return response
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Mock Graph API")
+
+        # Control primero: /__mock/traffic también encaja en /{version}/{phone_id}
+        @app.get("/__mock/traffic")
+        async def traffic(limit: int = 100):
+            recent = list(self.requests)[-limit:] if limit > 0 else []
+            return {"summary": self.summary(), "requests": recent}
+
+        @app.post("/__mock/config")
+        async def update_config(changes: Dict):
+            known = {f.name for f in fields(MockGraphConfig)}
+            for key, value in changes.items():
+                if key in known:
+                    setattr(self.config, key, value)
+            if "max_recorded" in changes:
+                self.requests = deque(self.requests, maxlen=self.config.max_recorded)
+            return asdict(self.config)
+
+        @app.post("/__mock/reset")
+        async def reset():
+            self.reset()
+            return {"status": "ok"}
+
+        @app.post("/{version}/{phone_id}/messages")
+        async def messages(version: str, phone_id: str, request: Request):
+            body = await request.json()
+
+            if body.get("status") == "read":
+                return await self._simulate("read", None, "read", body, lambda: {"success": True})
+
+            def ok():
+                self._message_seq += 1
+                return {
+                    "messaging_product": "whatsapp",
+                    "contacts": [{"input": body.get("to"), "wa_id": body.get("to")}],
+                    "messages": [{"id": f"wamid.mock.{self._message_seq}"}]
+                }
+
+            return await self._simulate("messages", body.get("to"), body.get("type"), body, ok)
+
+        @app.post("/{version}/{phone_id}/media")
+        async def media(version: str, phone_id: str, request: Request):
+            form = await request.form()
+            upload = form.get("file")
+            content = await upload.read() if upload is not None else b""
+            body = {"filename": getattr(upload, "filename", None), "size": len(content), "type": form.get("type")}
+
+            def ok():
+                self._media_seq += 1
+                return {"id": f"mock-media-{self._media_seq}"}
+
+            return await self._simulate("media", None, "media", body, ok)
+
+        @app.get("/{version}/{phone_id}")
+        async def phone_number(version: str, phone_id: str):
+            return {"id": phone_id, "name": "Mock Business", "verified_name": "Mock Business"}
+
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock local de la WhatsApp Cloud API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=None)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-recorded", type=int, default=10000, help="Peticiones con cuerpo a conservar (0 = ninguna)")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    mock = MockGraphAPI(MockGraphConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        max_rps=args.max_rps,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        max_recorded=args.max_recorded
+    ))
+    print(f"Mock Graph API en http://{args.host}:{args.port} (WHATSAPP_API_URL=http://{args.host}:{args.port})")
+    uvicorn.run(mock.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
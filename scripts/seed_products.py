@@ -5,21 +5,21 @@ import sys
 # Add src to python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from src.infrastructure.config.database import get_supabase_client
+from src.infrastructure.config.database import get_async_supabase_client
 from src.infrastructure.database.product_repository import ProductRepository
 from src.domain.entities.product import Product
 
 async def seed_products():
     print("Iniciando carga de productos de ejemplo...")
     
-    supabase = get_supabase_client()
+    supabase = get_async_supabase_client()
     repo = ProductRepository(supabase)
     
     # 1. Limpiar base de datos actual (opcional, pero útil para resetear)
     print("Limpiando inventario actual...")
-    all_products = repo.get_all()
+    all_products = await repo.get_all()
     for p in all_products:
-        repo.delete(p.id)
+        await repo.delete(p.id)
         
     # 2. Lista de productos con imágenes reales (URLs directas de stock o placeholders de alta calidad)
     products_data = [
@@ -98,7 +98,7 @@ async def seed_products():
     for p_data in products_data:
         try:
             prod = Product(**p_data)
-            created = repo.create(prod)
+            created = await repo.create(prod)
             print(f"Creado: {created.name}")
         except Exception as e:
             print(f"Error creando {p_data['name']}: {e}")
@@ -2,6 +2,7 @@
 Test script for Business Info module
 """
 import sys
+import asyncio
 from pathlib import Path
 
 # Add project root to path
@@ -10,7 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.infrastructure.database.business_info_repository import BusinessInfoRepository
 from src.infrastructure.services.business_info_service import BusinessInfoService
 
-def test_repository():
+async def test_repository():
     """Test the repository directly"""
     print("=" * 60)
     print("Testing Business Info Repository")
@@ -19,7 +20,7 @@ def test_repository():
     repo = BusinessInfoRepository()
     
     # Get all business info
-    data = repo.get_all()
+    data = await repo.get_all()
     print(f"\nFound {len(data)} business info records:")
     
     for item in data:
@@ -30,7 +31,7 @@ def test_repository():
     
     return data
 
-def test_service():
+async def test_service():
     """Test the service with caching"""
     print("\n" + "=" * 60)
     print("Testing Business Info Service (with caching)")
@@ -40,29 +41,32 @@ def test_service():
     
     # First call (should hit DB)
     print("\nFirst call (cache miss)...")
-    data1 = service.get_all_info()
+    data1 = await service.get_all_info()
     print(f"Retrieved {len(data1)} records")
     
     # Second call (should hit cache)
     print("\nSecond call (cache hit)...")
-    data2 = service.get_all_info()
+    data2 = await service.get_all_info()
     print(f"Retrieved {len(data2)} records")
     
     # Test getting by key
     print("\nTesting get_by_key...")
-    address = service.get_info_by_key('direccion')
+    address = await service.get_info_by_key('direccion')
     if address:
         print(f"Address: {address.value}")
     
     return data1
 
+async def main():
+    # Test repository
+    repo_data = await test_repository()
+    
+    # Test service
+    service_data = await test_service()
+
 if __name__ == "__main__":
     try:
-        # Test repository
-        repo_data = test_repository()
-        
-        # Test service
-        service_data = test_service()
+        asyncio.run(main())
         
         print("\n" + "=" * 60)
         print("ALL TESTS PASSED!")
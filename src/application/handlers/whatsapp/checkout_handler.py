@@ -1,5 +1,6 @@
 from typing import Dict, Optional, List
 from datetime import datetime
+import asyncio
 import logging
 from .base_handler import WhatsAppHandler
 from ....infrastructure.external.whatsapp_service import WhatsAppService
@@ -9,6 +10,7 @@ from ....infrastructure.services.invoice_service import InvoiceService
 from ....infrastructure.services.storage_service import StorageService
 from ....infrastructure.database.customer_repository import CustomerRepository
 from ....infrastructure.services.customer_service import CustomerService
+from ....infrastructure.services.pdf_render_pool import PDFRenderPool
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +28,8 @@ class CheckoutHandler(WhatsAppHandler):
         session_repository,
         invoice_service: InvoiceService,
         storage_service: StorageService,
-        customer_repository: Optional[CustomerRepository] = None
+        customer_repository: Optional[CustomerRepository] = None,
+        render_pool: Optional[PDFRenderPool] = None
     ):
         self.whatsapp_service = whatsapp_service
         self.quote_service = quote_service
@@ -35,12 +38,14 @@ class CheckoutHandler(WhatsAppHandler):
         self.invoice_service = invoice_service
         self.storage_service = storage_service
         self.customer_repository = customer_repository
+        # Sin pool el PDF se genera en un hilo; nunca en el event loop
+        self.render_pool = render_pool
 
     async def handle(self, message_data: Dict) -> Dict:
         from_number = message_data.get('from')
         message_id = message_data.get('message_id')
         
-        session = self.session_repository.get_session(from_number)
+        session = await self.session_repository.get_session(from_number)
         if not session or not session.get('items'):
             await self.whatsapp_service.send_message(
                 to=from_number,
@@ -74,16 +79,16 @@ class CheckoutHandler(WhatsAppHandler):
                     c_service = CustomerService(self.customer_repository)
                     
                     # Registrar o Actualizar con el nombre confirmado
-                    final_customer = c_service.get_or_create_customer(from_number, quote.client_name)
+                    final_customer = await c_service.get_or_create_customer(from_number, quote.client_name)
                     
                     if final_customer:
                         # Actualizar dirección
                         if quote.client_address:
-                            c_service.update_customer_address(final_customer['id'], quote.client_address)
+                            await c_service.update_customer_address(final_customer['id'], quote.client_address)
 
                         # Actualizar DNI
                         if quote.client_dni:
-                            c_service.update_customer_dni(final_customer['id'], quote.client_dni)
+                            await c_service.update_customer_dni(final_customer['id'], quote.client_dni)
                         
                         quote.customer_id = final_customer['id']
                         logger.info(f"Cotización vinculada a cliente {final_customer['id']}")
@@ -109,7 +114,7 @@ class CheckoutHandler(WhatsAppHandler):
             await self.whatsapp_service.mark_message_as_read(message_id)
 
             # Clear session
-            self.session_repository.delete_session(from_number)
+            await self.session_repository.delete_session(from_number)
             
             # --- Generar y Subir PDF ---
             await self._generate_and_send_pdf(from_number, created_quote, quote_data)
@@ -123,7 +128,10 @@ class CheckoutHandler(WhatsAppHandler):
 
     async def _generate_and_send_pdf(self, from_number, created_quote, quote_data):
         try:
-            pdf_path = self.invoice_service.generate_invoice_pdf(quote_data)
+            if self.render_pool is not None:
+                pdf_path = await self.render_pool.run(self.invoice_service.generate_invoice_pdf, quote_data)
+            else:
+                pdf_path = await asyncio.to_thread(self.invoice_service.generate_invoice_pdf, quote_data)
             
             # Nombre de archivo único
             timestamp = int(datetime.now().timestamp())
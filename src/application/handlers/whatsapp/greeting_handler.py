@@ -2,10 +2,8 @@ from typing import Dict, Optional, List
 from .base_handler import WhatsAppHandler
 from ....infrastructure.external.whatsapp_service import WhatsAppService
 from ....domain.services import QuoteService
-from ....infrastructure.services.invoice_service import InvoiceService
-from ....infrastructure.services.storage_service import StorageService
+from ....infrastructure.services.catalog_media_service import CatalogMediaService
 import logging
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -18,13 +16,11 @@ class GreetingHandler(WhatsAppHandler):
         self, 
         whatsapp_service: WhatsAppService,
         quote_service: QuoteService,
-        invoice_service: InvoiceService,
-        storage_service: StorageService
+        catalog_media_service: CatalogMediaService
     ):
         self.whatsapp_service = whatsapp_service
         self.quote_service = quote_service
-        self.invoice_service = invoice_service
-        self.storage_service = storage_service
+        self.catalog_media_service = catalog_media_service
 
     async def handle(self, message_data: Dict) -> Dict:
         from_number = message_data.get('from')
@@ -59,32 +55,13 @@ class GreetingHandler(WhatsAppHandler):
             logger.info("Intentando enviar catálogo PDF en saludo...")
             
             # Obtener productos y generar catálogo
-            products = self.quote_service.get_available_products()
+            products = await self.quote_service.get_available_products()
             logger.info(f"Productos encontrados: {len(products) if products else 0}")
             
             if products:
-                # Generamos el PDF (esto suele ser rápido o cacheado)
-                catalog_path = self.invoice_service.generate_catalog_pdf(products)
-                logger.info(f"PDF generado en: {catalog_path}")
-                
-                # Usar timestamp para evitar caché de WhatsApp/CDN
-                timestamp = int(datetime.now().timestamp())
-                storage_path = f"catalogs/catalogo_{timestamp}.pdf"
-                
-                # Subir o actualizar catálogo (StorageService manejará si ya existe o lo sobreescribe)
-                public_url = await self.storage_service.upload_pdf(catalog_path, storage_path)
-                logger.info(f"URL pública del PDF: {public_url}")
-                
-                if public_url:
-                    result = await self.whatsapp_service.send_document(
-                        to=from_number,
-                        link=public_url,
-                        caption="Catálogo 2026",
-                        filename="Catalogo_Productos_2026.pdf"
-                    )
-                    logger.info(f"Resultado envío PDF: {result}")
-                else:
-                    logger.error("No se obtuvo URL pública para el PDF.")
+                # El PDF se sube a WhatsApp una vez por versión del catálogo y se envía por ID
+                result = await self.catalog_media_service.send_catalog(from_number, products)
+                logger.info(f"Resultado envío PDF: {result}")
             else:
                 logger.warning("No hay productos disponibles para generar el catálogo en el saludo.")
                 
@@ -67,7 +67,7 @@ class QuoteHandler(WhatsAppHandler):
 
     async def _handle_ai_assisted_quote(self, from_number: str, text: str) -> List[Dict]:
         """Usa Groq para identificar productos cuando el regex falla."""
-        catalog = self.quote_service.get_available_products()
+        catalog = await self.quote_service.get_available_products()
         ai_raw_items = await self.groq_service.identify_products(text, catalog)
         
         final_items = []
@@ -91,7 +91,7 @@ class QuoteHandler(WhatsAppHandler):
         # 1. Obtener sesión actual
         current_items = []
         if self.session_repository:
-            session = self.session_repository.get_session(from_number)
+            session = await self.session_repository.get_session(from_number)
             if session:
                 current_items = session.get('items', [])
 
@@ -101,7 +101,7 @@ class QuoteHandler(WhatsAppHandler):
 
         # 3. Guardar sesión
         if self.session_repository:
-            self.session_repository.create_or_update_session(from_number, merged_items)
+            await self.session_repository.create_or_update_session(from_number, merged_items)
 
         # 4. Respuesta
         total = sum(item['subtotal'] for item in merged_items)
@@ -139,12 +139,12 @@ class QuoteHandler(WhatsAppHandler):
         # 2. Obtener sesión actual
         current_items = []
         if self.session_repository:
-            session = self.session_repository.get_session(from_number)
+            session = await self.session_repository.get_session(from_number)
             if session:
                 # Check expiry (30 mins)
                 updated_at = datetime.fromisoformat(session['updated_at'].replace('Z', '+00:00'))
                 if datetime.now(updated_at.tzinfo) - updated_at > timedelta(minutes=30):
-                    self.session_repository.delete_session(from_number)
+                    await self.session_repository.delete_session(from_number)
                 else:
                     current_items = session.get('items', [])
 
@@ -176,9 +176,9 @@ class QuoteHandler(WhatsAppHandler):
         # 4. Guardar sesión
         if self.session_repository:
             if not merged_items:
-                 self.session_repository.delete_session(from_number)
+                 await self.session_repository.delete_session(from_number)
             else:
-                 self.session_repository.create_or_update_session(from_number, merged_items)
+                 await self.session_repository.create_or_update_session(from_number, merged_items)
 
         # 5. Respuesta al usuario
         total = sum(item['subtotal'] for item in merged_items)
@@ -16,7 +16,7 @@ class WizardHandler(WhatsAppHandler):
         text = message_data.get('text', '').strip()
         text_lower = text.lower()
         
-        session = self.session_repository.get_session(from_number)
+        session = await self.session_repository.get_session(from_number)
         if not session:
              return {'success': False, 'reason': 'no_session'}
 
@@ -32,7 +32,7 @@ class WizardHandler(WhatsAppHandler):
                 return {'success': False, 'reason': 'invalid_name_input'}
                 
             client_data['name'] = text
-            self.session_repository.create_or_update_session(from_number, conversation_step='WAITING_DNI', client_data=client_data)
+            await self.session_repository.create_or_update_session(from_number, conversation_step='WAITING_DNI', client_data=client_data)
             await self.whatsapp_service.send_message(from_number, "✅ Guardado. Ahora indícame tu **Cédula o RIF**:")
             return {'success': True, 'action': 'saved_name'}
         
@@ -43,7 +43,7 @@ class WizardHandler(WhatsAppHandler):
                     return {'success': False, 'reason': 'invalid_dni_input'}
 
             client_data['dni'] = text
-            self.session_repository.create_or_update_session(from_number, conversation_step='WAITING_ADDRESS', client_data=client_data)
+            await self.session_repository.create_or_update_session(from_number, conversation_step='WAITING_ADDRESS', client_data=client_data)
             await self.whatsapp_service.send_message(from_number, "👍 Listo. Por último, envíame tu **Dirección Fiscal / Entrega**:")
             return {'success': True, 'action': 'saved_dni'}
         
@@ -55,7 +55,7 @@ class WizardHandler(WhatsAppHandler):
                 return {'success': False, 'reason': 'short_address'}
 
             client_data['address'] = text
-            self.session_repository.create_or_update_session(from_number, conversation_step='WAITING_FINAL_CONFIRMATION', client_data=client_data)
+            await self.session_repository.create_or_update_session(from_number, conversation_step='WAITING_FINAL_CONFIRMATION', client_data=client_data)
             
             # Generar Resumen
             items = session.get('items', [])
@@ -95,7 +95,7 @@ class WizardHandler(WhatsAppHandler):
                 return {'success': True, 'action': 'trigger_checkout'}
             
             elif is_edit:
-                self.session_repository.create_or_update_session(from_number, conversation_step='WAITING_NAME')
+                await self.session_repository.create_or_update_session(from_number, conversation_step='WAITING_NAME')
                 await self.whatsapp_service.send_message(from_number, "Entendido. Empecemos de nuevo. Por favor, indícame tu **Nombre y Apellido** correctos.")
                 return {'success': True, 'action': 'reset_wizard'}
             
@@ -117,7 +117,7 @@ class WizardHandler(WhatsAppHandler):
                 return {'success': True, 'action': 'trigger_checkout'}
             
             elif is_update:
-                self.session_repository.create_or_update_session(from_number, conversation_step='WAITING_NAME', client_data={})
+                await self.session_repository.create_or_update_session(from_number, conversation_step='WAITING_NAME', client_data={})
                 await self.whatsapp_service.send_message(from_number, "📝 Entendido. Actualicemos tus datos.\n\nPor favor, indícame tu **Nombre y Apellido**:")
                 return {'success': True, 'action': 'start_update_wizard'}
             
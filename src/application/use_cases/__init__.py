@@ -3,7 +3,11 @@ from .quote_use_cases import (
     CreateQuoteUseCase,
     GetQuoteUseCase,
     ListQuotesUseCase,
+    ListQuotesPageUseCase,
+    ListQuoteSummariesUseCase,
     UpdateQuoteUseCase,
+    BulkUpdateQuoteStatusUseCase,
+    ExpireDraftQuotesUseCase,
     DeleteQuoteUseCase,
     GetQuotesByPhoneUseCase
 )
@@ -16,7 +20,11 @@ __all__ = [
     'CreateQuoteUseCase',
     'GetQuoteUseCase',
     'ListQuotesUseCase',
+    'ListQuotesPageUseCase',
+    'ListQuoteSummariesUseCase',
     'UpdateQuoteUseCase',
+    'BulkUpdateQuoteStatusUseCase',
+    'ExpireDraftQuotesUseCase',
     'DeleteQuoteUseCase',
     'GetQuotesByPhoneUseCase',
     'ProcessWhatsAppMessageUseCase',
@@ -2,8 +2,9 @@
 Casos de uso para Quote.
 Contiene la lógica de aplicación para operaciones de cotizaciones.
 """
-from typing import List, Optional
-from ...domain.entities.quote import Quote, QuoteItem
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from ...domain.entities.quote import Quote, QuoteItem, QuoteStatus, QuoteSummary
 from ...domain.repositories.quote_repository import QuoteRepository
 
 
@@ -79,6 +80,64 @@ class ListQuotesUseCase:
         return await self.repository.get_all(skip, limit, status)
 
 
+class ListQuotesPageUseCase:
+    """Caso de uso para listar cotizaciones con paginación por cursor."""
+    
+    def __init__(self, repository: QuoteRepository):
+        self.repository = repository
+    
+    async def execute(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[Quote], Optional[str]]:
+        """
+        Listar una página de cotizaciones.
+        
+        Args:
+            limit: Número máximo de registros
+            cursor: Cursor opaco devuelto por la página anterior
+            status: Filtrar por estado
+            
+        Returns:
+            Tupla (cotizaciones, cursor de la siguiente página o None)
+        """
+        if limit > 100:
+            limit = 100  # Máximo 100 registros por página
+        
+        return await self.repository.get_page(limit, cursor, status)
+
+
+class ListQuoteSummariesUseCase:
+    """Caso de uso para listar resúmenes de cotizaciones (vista de tabla)."""
+    
+    def __init__(self, repository: QuoteRepository):
+        self.repository = repository
+    
+    async def execute(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[QuoteSummary], Optional[str]]:
+        """
+        Listar una página de resúmenes, sin items.
+        
+        Args:
+            limit: Número máximo de registros
+            cursor: Cursor opaco devuelto por la página anterior
+            status: Filtrar por estado
+            
+        Returns:
+            Tupla (resúmenes, cursor de la siguiente página o None)
+        """
+        if limit > 100:
+            limit = 100  # Máximo 100 registros por página
+        
+        return await self.repository.get_summary_page(limit, cursor, status)
+
+
 class UpdateQuoteUseCase:
     """Caso de uso para actualizar una cotización."""
     
@@ -109,6 +168,86 @@ class UpdateQuoteUseCase:
         return await self.repository.update(quote_id, quote)
 
 
+class BulkUpdateQuoteStatusUseCase:
+    """Caso de uso para cambiar el estado de varias cotizaciones a la vez."""
+    
+    def __init__(self, repository: QuoteRepository):
+        self.repository = repository
+    
+    async def execute(
+        self,
+        new_status: str,
+        quote_ids: Optional[List[int]] = None,
+        current_status: Optional[str] = None,
+        created_before: Optional[datetime] = None
+    ) -> int:
+        """
+        Cambiar el estado por lista de IDs y/o filtro.
+        
+        Args:
+            new_status: Estado nuevo
+            quote_ids: IDs de las cotizaciones
+            current_status: Solo las que estén en este estado
+            created_before: Solo las creadas antes de esta fecha
+            
+        Returns:
+            Número de cotizaciones actualizadas
+            
+        Raises:
+            ValueError: Si el estado no existe o no hay ningún filtro
+        """
+        new_status = QuoteStatus(new_status).value
+        if current_status:
+            current_status = QuoteStatus(current_status).value
+        
+        if not (quote_ids or current_status or created_before):
+            raise ValueError("Indique los IDs o al menos un filtro (estado o fecha)")
+        
+        return await self.repository.update_status_bulk(
+            new_status,
+            quote_ids=quote_ids,
+            current_status=current_status,
+            created_before=created_before
+        )
+
+
+class ExpireDraftQuotesUseCase:
+    """
+    Caso de uso para expirar borradores antiguos.
+    
+    Marca como EXPIRED los borradores creados hace más de `max_age`, por
+    lotes para no bloquear la tabla con una sola transacción enorme.
+    """
+    
+    def __init__(self, repository: QuoteRepository, max_age: timedelta, batch_size: int = 500):
+        self.repository = repository
+        self.max_age = max_age
+        self.batch_size = batch_size
+    
+    async def execute(self) -> int:
+        """
+        Expirar borradores vencidos.
+        
+        Returns:
+            Número total de cotizaciones expiradas
+        """
+        cutoff = datetime.now(timezone.utc) - self.max_age
+        expired = 0
+        
+        while True:
+            updated = await self.repository.update_status_bulk(
+                QuoteStatus.EXPIRED.value,
+                current_status=QuoteStatus.DRAFT.value,
+                created_before=cutoff,
+                limit=self.batch_size
+            )
+            expired += updated
+            if updated < self.batch_size:
+                break
+        
+        return expired
+
+
 class DeleteQuoteUseCase:
     """Caso de uso para eliminar una cotización."""
     
@@ -134,14 +273,17 @@ class GetQuotesByPhoneUseCase:
     def __init__(self, repository: QuoteRepository):
         self.repository = repository
     
-    async def execute(self, client_phone: str) -> List[Quote]:
+    async def execute(self, client_phone: str, limit: Optional[int] = None) -> List[Quote]:
         """
-        Obtener todas las cotizaciones de un cliente.
+        Obtener las cotizaciones de un cliente.
         
         Args:
             client_phone: Teléfono del cliente
+            limit: Solo las `limit` más recientes (None = todas)
             
         Returns:
-            Lista de cotizaciones del cliente
+            Lista de cotizaciones del cliente, la más reciente primero
         """
+        if limit:
+            return await self.repository.get_latest_by_phone(client_phone, limit)
         return await self.repository.get_by_phone(client_phone)
@@ -2,18 +2,38 @@
 Caso de uso para procesar mensajes de WhatsApp.
 """
 import os
+import math
+import time
+import asyncio
 import logging
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple
 from datetime import datetime, timedelta
 from ...domain.services import QuoteService
 from ...domain.repositories import QuoteRepository
 from ...infrastructure.external import WhatsAppService, RetryQueue
 from ...infrastructure.services.invoice_service import InvoiceService
 from ...infrastructure.services.storage_service import StorageService
+from ...infrastructure.services.catalog_media_service import CatalogMediaService
+from ...infrastructure.services.pdf_render_pool import PDFRenderPool
+from ...infrastructure.services.sender_lanes import SenderLanes
+from ...infrastructure.services.message_coalescer import merge_text_messages
 from ...infrastructure.database.customer_repository import CustomerRepository
 
 logger = logging.getLogger(__name__)
 
+# Palabras clave de las intenciones que se atienden antes de cotizar
+EMPTY_CART_KEYWORDS = ['vacia', 'vaciar', 'limpiar carrito', 'borrar todo', 'eliminar todo', 'vacía', 'vacíar', 'cancelar pedido']
+GREETING_KEYWORDS = ['hola', 'buen', 'buenas', 'que tal', 'hey', 'hello', 'hi', 'saludos']
+LOCATION_KEYWORDS = ['ubicacion', 'donde', 'direccion', 'local', 'tienda', 'ubicados', 'horario', 'hora', 'abierto']
+DELIVERY_KEYWORDS = ['delivery', 'envio', 'domicilio', 'traer', 'llevan', 'zonas', 'costo de envio']
+PAYMENT_KEYWORDS = ['pagar', 'pago', 'cuenta', 'zelle', 'binance', 'banco', 'transferencia', 'pago movil', 'bolivares', 'dolares', 'metodos', 'como pago']
+CATALOG_KEYWORDS = ['catalogo', 'catálogo', 'lista de precios', 'ver productos', 'precio de todo']
+CHECKOUT_KEYWORDS = ['confirmar', 'listo', 'finalizar', 'comprar', 'fin', 'total']
+COMMAND_KEYWORDS = (
+    EMPTY_CART_KEYWORDS + LOCATION_KEYWORDS + DELIVERY_KEYWORDS
+    + PAYMENT_KEYWORDS + CATALOG_KEYWORDS + CHECKOUT_KEYWORDS
+)
+
 
 class ProcessWhatsAppMessageUseCase:
     """
@@ -30,12 +50,16 @@ class ProcessWhatsAppMessageUseCase:
         session_repository: Optional['SessionRepository'] = None,
         invoice_service: Optional[InvoiceService] = None,
         storage_service: Optional[StorageService] = None,
-        customer_repository: Optional[CustomerRepository] = None
+        customer_repository: Optional[CustomerRepository] = None,
+        catalog_media_service: Optional[CatalogMediaService] = None,
+        render_pool: Optional[PDFRenderPool] = None
     ):
         self.quote_service = quote_service
         self.whatsapp_service = whatsapp_service
         self.retry_queue = retry_queue
         self.customer_repository = customer_repository
+        # Un mensaje a la vez por cliente (la sesión se lee y reescribe completa)
+        self.sender_lanes = SenderLanes()
         
         # Inicializar Handlers
         from ..handlers.whatsapp.greeting_handler import GreetingHandler
@@ -49,21 +73,61 @@ class ProcessWhatsAppMessageUseCase:
         # Nota: Invoice y Storage se instancian on-demand o se pasan si ya existen
         inv_service = invoice_service or InvoiceService()
         sto_service = storage_service or StorageService()
+        # Compartido por saludo y catálogo: una sola subida del PDF a WhatsApp
+        catalog_media = catalog_media_service or CatalogMediaService(
+            whatsapp_service, inv_service, sto_service, render_pool=render_pool
+        )
         
-        self.greeting_handler = GreetingHandler(whatsapp_service, quote_service, inv_service, sto_service)
+        self.greeting_handler = GreetingHandler(whatsapp_service, quote_service, catalog_media)
         self.faq_handler = FAQHandler(whatsapp_service)
-        self.catalog_handler = CatalogHandler(whatsapp_service, quote_service, inv_service, sto_service)
+        self.catalog_handler = CatalogHandler(whatsapp_service, quote_service, catalog_media)
         self.wizard_handler = WizardHandler(whatsapp_service, session_repository)
         self.quote_handler = QuoteHandler(whatsapp_service, quote_service, session_repository)
         self.checkout_handler = CheckoutHandler(
             whatsapp_service, quote_service, quote_repository, 
-            session_repository, inv_service, sto_service, customer_repository
+            session_repository, inv_service, sto_service, customer_repository,
+            render_pool=render_pool
         )
         
         # Para uso interno si es necesario
         self.session_repository = session_repository
 
     async def execute(self, message_data: Dict) -> Dict:
+        async with self.sender_lanes.hold(message_data.get('from') or ""):
+            return await self._execute_safely(message_data)
+
+    async def execute_many(self, messages: List[Dict]) -> List[Dict]:
+        """
+        Procesar varios mensajes de texto seguidos de un mismo remitente.
+
+        Se unen en uno solo (una interpretación, una escritura de sesión y una
+        respuesta), salvo que el cliente esté en el wizard de datos: ahí cada
+        mensaje responde a una pregunta distinta y se procesan por separado.
+        """
+        from_number = messages[0].get('from')
+        async with self.sender_lanes.hold(from_number or ""):
+            if len(messages) > 1 and not await self._in_wizard(from_number):
+                messages = [merge_text_messages(messages)]
+            return [await self._execute_safely(message) for message in messages]
+
+    def can_coalesce(self, message_data: Dict) -> bool:
+        """Indica si el mensaje es texto de pedido que puede unirse a los siguientes."""
+        if message_data.get('button_payload'):
+            return False
+        text = message_data.get('text', '').strip().lower()
+        if not text:
+            return False
+        if any(keyword in text for keyword in GREETING_KEYWORDS) and len(text.split()) < 5:
+            return False
+        return not any(keyword in text for keyword in COMMAND_KEYWORDS)
+
+    async def _in_wizard(self, from_number: Optional[str]) -> bool:
+        if not self.session_repository or not from_number:
+            return False
+        session = await self.session_repository.get_session(from_number)
+        return bool(session) and session.get('conversation_step', 'shopping') != 'shopping'
+
+    async def _execute_safely(self, message_data: Dict) -> Dict:
         from_number = message_data.get('from')
         try:
             return await self._execute_implementation(message_data)
@@ -87,12 +151,15 @@ class ProcessWhatsAppMessageUseCase:
         
         logger.info(f"Procesando mensaje de {from_number} ({sender_name or 'Desconocido'}): {text}")
 
+        # Refrescar catálogo (solo consulta la base de datos si expiró el caché)
+        await self.quote_service.refresh_catalog()
+
         # --- Gestión de Clientes (CRM) ---
         customer = None
         if self.customer_repository:
             from ...infrastructure.services.customer_service import CustomerService
             c_service = CustomerService(self.customer_repository)
-            customer = c_service.get_customer_by_phone(from_number)
+            customer = await c_service.get_customer_by_phone(from_number)
             if customer:
                 logger.info(f"Cliente identificado: {customer.get('full_name')} ({customer.get('id')})")
         
@@ -103,42 +170,36 @@ class ProcessWhatsAppMessageUseCase:
         # 1. INTENCIONES PRIORITARIAS
         
         # A. Vaciar Carrito
-        empty_cart_keywords = ['vacia', 'vaciar', 'limpiar carrito', 'borrar todo', 'eliminar todo', 'vacía', 'vacíar', 'cancelar pedido']
-        if any(keyword in text_lower for keyword in empty_cart_keywords):
+        if any(keyword in text_lower for keyword in EMPTY_CART_KEYWORDS):
              if self.session_repository:
-                 self.session_repository.delete_session(from_number)
+                 await self.session_repository.delete_session(from_number)
              await self.whatsapp_service.send_message(from_number, "🗑️ Tu carrito ha sido vaciado. ¿Qué te gustaría pedir ahora?")
              return {'success': True, 'action': 'empty_cart'}
 
         # B. Saludo
-        greeting_keywords = ['hola', 'buen', 'buenas', 'que tal', 'hey', 'hello', 'hi', 'saludos']
-        if any(keyword in text_lower for keyword in greeting_keywords) and len(text.split()) < 5:
+        if any(keyword in text_lower for keyword in GREETING_KEYWORDS) and len(text.split()) < 5:
             return await self.greeting_handler.handle(message_data)
 
         # C. FAQs (Ubicación, Delivery, Pago)
-        location_keywords = ['ubicacion', 'donde', 'direccion', 'local', 'tienda', 'ubicados', 'horario', 'hora', 'abierto']
-        if any(keyword in text_lower for keyword in location_keywords):
+        if any(keyword in text_lower for keyword in LOCATION_KEYWORDS):
             message_data['intent'] = 'location'
             return await self.faq_handler.handle(message_data)
             
-        delivery_keywords = ['delivery', 'envio', 'domicilio', 'traer', 'llevan', 'zonas', 'costo de envio']
-        if any(keyword in text_lower for keyword in delivery_keywords):
+        if any(keyword in text_lower for keyword in DELIVERY_KEYWORDS):
             message_data['intent'] = 'delivery'
             return await self.faq_handler.handle(message_data)
             
-        payment_keywords = ['pagar', 'pago', 'cuenta', 'zelle', 'binance', 'banco', 'transferencia', 'pago movil', 'bolivares', 'dolares', 'metodos', 'como pago']
-        if any(keyword in text_lower for keyword in payment_keywords):
+        if any(keyword in text_lower for keyword in PAYMENT_KEYWORDS):
              message_data['intent'] = 'payment'
              return await self.faq_handler.handle(message_data)
 
         # D. Catálogo
-        catalog_keywords = ['catalogo', 'catálogo', 'lista de precios', 'ver productos', 'precio de todo']
-        if any(keyword in text_lower for keyword in catalog_keywords):
+        if any(keyword in text_lower for keyword in CATALOG_KEYWORDS):
             return await self.catalog_handler.handle(message_data)
 
         # 2. GESTIÓN DE WIZARD (Si estamos en medio de una conversa de datos)
         if self.session_repository:
-            session = self.session_repository.get_session(from_number)
+            session = await self.session_repository.get_session(from_number)
             if session and session.get('conversation_step', 'shopping') != 'shopping':
                 result = await self.wizard_handler.handle(message_data)
                 
@@ -149,8 +210,7 @@ class ProcessWhatsAppMessageUseCase:
                 return result
 
         # 3. CHECKOUT (Confirmación)
-        checkout_keywords = ['confirmar', 'listo', 'finalizar', 'comprar', 'fin', 'total']
-        if any(keyword in text_lower for keyword in checkout_keywords):
+        if any(keyword in text_lower for keyword in CHECKOUT_KEYWORDS):
             # Verificación de Cliente (Wizard Trigger)
             # Solo permitir checkout directo si ya tenemos datos del cliente (DB o Sesión)
             
@@ -173,7 +233,7 @@ class ProcessWhatsAppMessageUseCase:
             
             # 2. ¿Tiene datos en Sesión temporal?
             elif self.session_repository:
-                session = self.session_repository.get_session(from_number)
+                session = await self.session_repository.get_session(from_number)
                 if session and session.get('client_data') and session['client_data'].get('name'):
                      client_fully_identified = True
             
@@ -182,13 +242,13 @@ class ProcessWhatsAppMessageUseCase:
                 logger.info(f"Cliente {from_number} no identificado. Iniciando Wizard de registro.")
                 if self.session_repository:
                     # Validar que tenga items antes de pedir datos
-                    session = self.session_repository.get_session(from_number)
+                    session = await self.session_repository.get_session(from_number)
                     if not session or not session.get('items'):
                          # Dejar que checkout handler maneje el error de "carrito vacío"
                          return await self.checkout_handler.handle(message_data)
                     
                     # Iniciar Wizard
-                    self.session_repository.create_or_update_session(from_number, conversation_step='WAITING_NAME')
+                    await self.session_repository.create_or_update_session(from_number, conversation_step='WAITING_NAME')
                     await self.whatsapp_service.send_message(
                         from_number, 
                         "📝 Para generar tu recibo formal, necesito unos breves datos.\n\n¿Cuál es tu **Nombre y Apellido**?"
@@ -207,7 +267,7 @@ class ProcessWhatsAppMessageUseCase:
                 
                 # Iniciar Flow de Confirmación de Datos Existentes
                 if self.session_repository:
-                    self.session_repository.create_or_update_session(
+                    await self.session_repository.create_or_update_session(
                         from_number, 
                         conversation_step='WAITING_EXISTING_DATA_CONFIRMATION',
                         client_data=client_data
@@ -243,32 +303,52 @@ class RetryFailedMessagesUseCase:
     """
     Caso de uso para reintentar mensajes fallidos.
     
-    Debe ejecutarse periódicamente (ej: cada minuto con un cron job).
+    Lo ejecuta RetryScheduler al vencer cada next_retry (o POST /webhook/retry).
+    Los mensajes se envían en paralelo hasta `concurrency` a la vez y los
+    resultados se guardan en la cola en un solo paso al final. Los que vienen
+    del outbox traen el payload completo y se reenvían tal cual.
     """
     
     def __init__(
         self,
         whatsapp_service: WhatsAppService,
-        retry_queue: RetryQueue
+        retry_queue: RetryQueue,
+        batch_size: int = 500,
+        concurrency: int = 16,
+        outbox=None
     ):
         """
         Inicializar caso de uso.
         
         Args:
-            whatsapp_service: Servicio de WhatsApp
-            retry_queue: Cola de reintentos
+            whatsapp_service: Servicio de WhatsApp (debe esperar la respuesta
+                de la API: con wait_for_delivery=False todo reintento
+                parecería exitoso y se borraría de la cola)
+            retry_queue: Cola de reintentos (RetryQueue o SQLiteRetryQueue)
+            batch_size: Máximo de mensajes por ejecución
+            concurrency: Envíos simultáneos
+            outbox: Outbox donde se marcan como enviados los reintentos exitosos
+        
+        Raises:
+            ValueError: Si el servicio solo encola los envíos
         """
+        if not getattr(whatsapp_service, 'wait_for_delivery', True):
+            raise ValueError("Los reintentos requieren un WhatsAppService con wait_for_delivery=True")
         self.whatsapp_service = whatsapp_service
         self.retry_queue = retry_queue
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.outbox = outbox
     
     async def execute(self) -> Dict:
         """
         Reintentar envío de mensajes fallidos.
         
         Returns:
-            Estadísticas de reintentos
+            Estadísticas de reintentos (incluye duración y percentiles por envío)
         """
-        messages_to_retry = self.retry_queue.get_messages_to_retry()
+        # Tomar los vencidos: una pasada concurrente no los vuelve a enviar
+        messages_to_retry = self.retry_queue.claim_messages_to_retry(limit=self.batch_size)
         
         if not messages_to_retry:
             logger.info("No hay mensajes para reintentar")
@@ -278,15 +358,43 @@ class RetryFailedMessagesUseCase:
                 'failed': 0
             }
         
-        logger.info(f"Reintentando {len(messages_to_retry)} mensajes")
+        logger.info(f"Reintentando {len(messages_to_retry)} mensajes ({self.concurrency} en paralelo)")
         
-        successful = 0
-        failed = 0
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        outcomes = await asyncio.gather(*(self._retry(msg, semaphore) for msg in messages_to_retry))
         
-        for msg in messages_to_retry:
+        # Un solo paso de escritura para todo el lote
+        self.retry_queue.record_attempts([(msg_id, success, error) for msg_id, success, error, _ in outcomes])
+        
+        successful = sum(1 for _, success, _, _ in outcomes if success)
+        latencies = sorted(elapsed for _, _, _, elapsed in outcomes)
+        
+        return {
+            'messages_retried': len(messages_to_retry),
+            'successful': successful,
+            'failed': len(messages_to_retry) - successful,
+            'concurrency': self.concurrency,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            'send_ms': {
+                'p50': _percentile(latencies, 50),
+                'p90': _percentile(latencies, 90),
+                'p99': _percentile(latencies, 99),
+                'max': round(latencies[-1], 2)
+            }
+        }
+    
+    async def _retry(self, msg, semaphore: asyncio.Semaphore) -> Tuple[str, bool, Optional[str], float]:
+        """Enviar un mensaje; retorna (id, éxito, error, ms del envío)."""
+        async with semaphore:
+            started = time.perf_counter()
             try:
-                # Intentar enviar
-                if msg.quote_data:
+                if msg.payload:
+                    result = await self.whatsapp_service.resend(msg.payload)
+                    if self.outbox is not None:
+                        messages = result.get('messages') or [{}]
+                        self.outbox.mark_sent(msg.id, messages[0].get('id'))
+                elif msg.quote_data:
                     await self.whatsapp_service.send_quote_message(
                         to=msg.to,
                         quote_data=msg.quote_data
@@ -296,29 +404,14 @@ class RetryFailedMessagesUseCase:
                         to=msg.to,
                         message=msg.message
                     )
-                
-                # Actualizar como exitoso
-                self.retry_queue.update_message_attempt(
-                    message_id=msg.id,
-                    success=True
-                )
-                
-                successful += 1
                 logger.info(f"Mensaje {msg.id} enviado exitosamente en reintento")
-                
+                return msg.id, True, None, (time.perf_counter() - started) * 1000
             except Exception as e:
-                # Actualizar como fallido
-                self.retry_queue.update_message_attempt(
-                    message_id=msg.id,
-                    success=False,
-                    error=str(e)
-                )
-                
-                failed += 1
                 logger.error(f"Mensaje {msg.id} falló en reintento: {e}")
-        
-        return {
-            'messages_retried': len(messages_to_retry),
-            'successful': successful,
-            'failed': failed
-        }
+                return msg.id, False, str(e), (time.perf_counter() - started) * 1000
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    index = max(0, math.ceil(len(sorted_values) * percent / 100) - 1)
+    return round(sorted_values[index], 2)
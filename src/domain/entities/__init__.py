@@ -1,4 +1,4 @@
 """Entidades de dominio."""
-from .quote import Quote, QuoteItem, QuoteStatus
+from .quote import Quote, QuoteItem, QuoteStatus, QuoteSummary
 
-__all__ = ['Quote', 'QuoteItem', 'QuoteStatus']
+__all__ = ['Quote', 'QuoteItem', 'QuoteStatus', 'QuoteSummary']
@@ -165,3 +165,18 @@ class Quote(StrictBaseModel):
             self.total = self.calculate_total()
         else:
             raise IndexError("Índice de item inválido")
+
+
+class QuoteSummary(StrictBaseModel):
+    """
+    Proyección de solo lectura de una cotización para vistas de lista.
+    
+    No incluye los items, así que no se leen ni se validan.
+    """
+    
+    id: int
+    client_phone: str
+    client_name: Optional[str] = None
+    total: float
+    status: QuoteStatus
+    created_at: Optional[datetime] = None
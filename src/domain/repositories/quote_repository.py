@@ -3,8 +3,9 @@ Repositorio abstracto para Quote (Puerto).
 Define el contrato que deben implementar los adaptadores de persistencia.
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from ..entities.quote import Quote
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from ..entities.quote import Quote, QuoteSummary
 
 
 class QuoteRepository(ABC):
@@ -61,6 +62,58 @@ class QuoteRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    async def get_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[Quote], Optional[str]]:
+        """
+        Obtener una página de cotizaciones con paginación por cursor.
+        
+        Ordena por (created_at, id) descendente, por lo que es estable
+        ante inserciones concurrentes y no degrada con la profundidad.
+        
+        Args:
+            limit: Número máximo de registros a retornar
+            cursor: Cursor opaco de la página anterior (None = primera página)
+            status: Filtrar por estado (opcional)
+            
+        Returns:
+            Tupla (cotizaciones, cursor de la siguiente página o None)
+            
+        Raises:
+            ValueError: Si el cursor es inválido
+        """
+        pass
+    
+    @abstractmethod
+    async def get_summary_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[QuoteSummary], Optional[str]]:
+        """
+        Igual que get_page pero solo con las columnas de la vista de lista.
+        
+        No lee la columna items ni construye QuoteItem, por lo que la
+        respuesta es mucho más liviana.
+        
+        Args:
+            limit: Número máximo de registros a retornar
+            cursor: Cursor opaco de la página anterior (None = primera página)
+            status: Filtrar por estado (opcional)
+            
+        Returns:
+            Tupla (resúmenes, cursor de la siguiente página o None)
+            
+        Raises:
+            ValueError: Si el cursor es inválido
+        """
+        pass
+    
     @abstractmethod
     async def update(self, quote_id: int, quote: Quote) -> Optional[Quote]:
         """
@@ -75,6 +128,36 @@ class QuoteRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    async def update_status_bulk(
+        self,
+        new_status: str,
+        quote_ids: Optional[List[int]] = None,
+        current_status: Optional[str] = None,
+        created_before: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> int:
+        """
+        Cambiar el estado de varias cotizaciones en una sola sentencia.
+        
+        Los filtros se combinan con AND. Con `limit` solo se actualizan las
+        `limit` cotizaciones más antiguas que cumplan los filtros (lotes).
+        
+        Args:
+            new_status: Estado nuevo
+            quote_ids: IDs a actualizar (opcional)
+            current_status: Solo cotizaciones en este estado (opcional)
+            created_before: Solo cotizaciones creadas antes de esta fecha (opcional)
+            limit: Máximo de filas a actualizar (opcional)
+            
+        Returns:
+            Número de cotizaciones actualizadas
+            
+        Raises:
+            ValueError: Si no se indica ningún filtro
+        """
+        pass
+    
     @abstractmethod
     async def delete(self, quote_id: int) -> bool:
         """
@@ -100,3 +183,32 @@ class QuoteRepository(ABC):
             Lista de cotizaciones del cliente
         """
         pass
+    
+    @abstractmethod
+    async def get_latest_by_phone(self, client_phone: str, limit: int = 1) -> List[Quote]:
+        """
+        Obtener las cotizaciones más recientes de un cliente.
+        
+        Args:
+            client_phone: Teléfono del cliente
+            limit: Número máximo de cotizaciones
+            
+        Returns:
+            Cotizaciones del cliente, la más reciente primero
+        """
+        pass
+    
+    @abstractmethod
+    async def get_latest_by_phones(self, client_phones: List[str], limit: int = 1) -> Dict[str, List[Quote]]:
+        """
+        Variante por lotes de get_latest_by_phone (una sola consulta).
+        
+        Args:
+            client_phones: Teléfonos de los clientes
+            limit: Número máximo de cotizaciones por teléfono
+            
+        Returns:
+            Diccionario teléfono -> cotizaciones (la más reciente primero);
+            los teléfonos sin cotizaciones no aparecen
+        """
+        pass
@@ -33,8 +33,10 @@ class QuoteService:
         self.last_cache_update = None
         self.cache_duration = timedelta(minutes=1)
         
-        # Cargar catálogo inicial
-        self._load_catalog()
+        # Cargar catálogo inicial (desde archivo; el repositorio es asíncrono
+        # y se consulta en refresh_catalog())
+        if not self.product_repository:
+            self._load_catalog_file()
         
         # Inicializar parser con el catálogo cargado
         self.parser = TextParser(self.product_cache)
@@ -48,10 +50,26 @@ class QuoteService:
         self.last_cache_update = None
         print("Caché de productos invalidado.")
 
-    def _load_catalog(self) -> List[Dict]:
+    def _load_catalog_file(self) -> List[Dict]:
+        """
+        Cargar catálogo desde el JSON local (legacy, sin repositorio).
+        """
+        base_dir = Path(__file__).parent.parent.parent.parent
+        catalog_path = base_dir / "data" / "products_catalog.json"
+        if catalog_path.exists():
+            with open(catalog_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                self.product_cache = data.get('products', [])
+                self.last_cache_update = datetime.now()
+        return self.product_cache
+
+    async def refresh_catalog(self) -> List[Dict]:
         """
         Cargar catálogo de productos con caché.
         
+        Solo consulta el repositorio si el caché expiró o está vacío, por lo
+        que es barato llamarlo al inicio de cada petición.
+        
         Returns:
             Lista de productos
         """
@@ -65,20 +83,11 @@ class QuoteService:
             
         # Si no hay repositorio, intentar cargar mock (para tests legacy)
         if not self.product_repository:
-            # Fallback a archivo JSON si no hay repositorio (legacy support)
-            base_dir = Path(__file__).parent.parent.parent.parent
-            catalog_path = base_dir / "data" / "products_catalog.json"
-            if catalog_path.exists():
-                with open(catalog_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.product_cache = data.get('products', [])
-                    self.last_cache_update = now
-                    return self.product_cache
-            return []
+            return self._load_catalog_file()
             
         # Cargar de repositorio
         try:
-            products = self.product_repository.get_all_products()
+            products = await self.product_repository.get_all_products()
             if products:
                 self.product_cache = products
                 self.last_cache_update = now
@@ -267,14 +276,14 @@ class QuoteService:
             'confidence_scores': confidence_scores
         }
     
-    def get_available_products(self) -> List[Dict]:
+    async def get_available_products(self) -> List[Dict]:
         """
         Obtener lista de productos disponibles.
         
         Returns:
             Lista de productos del catálogo
         """
-        return self._load_catalog()
+        return await self.refresh_catalog()
     
     def search_product(self, query: str, threshold: int = 70) -> Optional[Dict]:
         """
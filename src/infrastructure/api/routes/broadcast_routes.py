@@ -2,13 +2,17 @@
 Endpoints para envío masivo de mensajes (Broadcast).
 """
 import logging
+import uuid
 from typing import List, Dict, Optional
 from fastapi import APIRouter, HTTPException, status
 import httpx
 from pydantic import BaseModel, Field
 from datetime import datetime
 from ...external import WhatsAppService
-from ...database.supabase_quote_repository import SupabaseQuoteRepository
+from ...external.outbox import get_outbox
+from ...database import get_quote_repository
+from ...database.message_event_repository import MessageEventRepository
+from ...services.message_event_buffer import get_message_event_buffer
 from ....domain.base import StrictBaseModel
 
 logger = logging.getLogger(__name__)
@@ -18,10 +22,16 @@ router = APIRouter(prefix="/broadcast", tags=["broadcast"])
 
 # Inicializar servicios
 # Inicializar servicios
-whatsapp_service = WhatsAppService()
+whatsapp_service = WhatsAppService(outbox=get_outbox())
+message_event_buffer = get_message_event_buffer()
 # El repositorio se inicializa dentro del endpoint para evitar problemas de contexto
 
 
+def _clean_phone(phone: str) -> str:
+    """Limpiar número de teléfono (remover +, espacios y guiones)."""
+    return phone.replace('+', '').replace(' ', '').replace('-', '')
+
+
 class ClientInfo(StrictBaseModel):
     """Información del cliente para broadcast."""
     phone: str = Field(..., description="Número de teléfono del cliente")
@@ -62,6 +72,7 @@ class BroadcastResult(StrictBaseModel):
 class BroadcastResponse(StrictBaseModel):
     """Respuesta del broadcast."""
     status: str
+    broadcast_id: str
     total_clients: int
     successful: int
     failed: int
@@ -95,19 +106,30 @@ async def send_template_broadcast(request: BroadcastTemplateRequest):
     results = []
     successful = 0
     failed = 0
+    # Identifica los mensajes de este envío en message_events (embudo de entrega)
+    broadcast_id = uuid.uuid4().hex
     
     logger.info(
-        f"Iniciando broadcast a {len(request.clients)} clientes "
+        f"Iniciando broadcast {broadcast_id} a {len(request.clients)} clientes "
         f"con template '{request.template_name}'"
     )
     
     # Inicializar repositorio localmente
-    quote_repo = SupabaseQuoteRepository()
+    quote_repo = get_quote_repository()
+    
+    # Última cotización de los clientes sin quote_id: una sola consulta para todos
+    latest_quotes = {}
+    if any(p in ('{{total}}', '{{quote_id}}') for p in request.parameters):
+        phones_without_quote = [_clean_phone(c.phone) for c in request.clients if not c.quote_id]
+        try:
+            latest_quotes = await quote_repo.get_latest_by_phones(phones_without_quote)
+        except Exception as e:
+            logger.warning(f"No se pudieron obtener las últimas cotizaciones: {e}")
     
     for client in request.clients:
         try:
             # Limpiar número de teléfono (remover + y espacios)
-            phone = client.phone.replace('+', '').replace(' ', '').replace('-', '')
+            phone = _clean_phone(client.phone)
             
             # Reemplazar parámetros dinámicos
             final_params = []
@@ -124,8 +146,8 @@ async def send_template_broadcast(request: BroadcastTemplateRequest):
                             if quote:
                                 total_str = f"{quote.total:.2f}"
                         else:
-                            # Prioridad 2: Buscar última cotización por teléfono
-                            user_quotes = await quote_repo.get_by_phone(phone)
+                            # Prioridad 2: Última cotización por teléfono (precargada)
+                            user_quotes = latest_quotes.get(phone)
                             if user_quotes:
                                 total_str = f"{user_quotes[0].total:.2f}"
                     except Exception as e:
@@ -142,13 +164,10 @@ async def send_template_broadcast(request: BroadcastTemplateRequest):
                      if client.quote_id:
                          quote_id_str = str(client.quote_id)
                      else:
-                         # Intento de fallback: buscar última cotización
-                         try:
-                            user_quotes = await quote_repo.get_by_phone(phone)
-                            if user_quotes:
-                                quote_id_str = str(user_quotes[0].id)
-                         except Exception:
-                             pass
+                         # Intento de fallback: última cotización (precargada)
+                         user_quotes = latest_quotes.get(phone)
+                         if user_quotes:
+                             quote_id_str = str(user_quotes[0].id)
                      final_params.append(quote_id_str)
                 else:
                     final_params.append(p)
@@ -163,6 +182,8 @@ async def send_template_broadcast(request: BroadcastTemplateRequest):
             
             # Extraer message_id de la respuesta
             message_id = response.get('messages', [{}])[0].get('id')
+            if message_id:
+                message_event_buffer.add_accepted(message_id, phone, broadcast_id)
             
             results.append(BroadcastResult(
                 phone=client.phone,
@@ -212,6 +233,7 @@ async def send_template_broadcast(request: BroadcastTemplateRequest):
     
     return BroadcastResponse(
         status="completed",
+        broadcast_id=broadcast_id,
         total_clients=len(request.clients),
         successful=successful,
         failed=failed,
@@ -256,3 +278,33 @@ async def get_available_templates():
         "status": "ok",
         "templates": templates
     }
+
+
+@router.get(
+    "/{broadcast_id}/funnel",
+    summary="Embudo de entrega de un broadcast",
+    description="Mensajes del broadcast aceptados, enviados, entregados, leídos y fallidos"
+)
+async def get_broadcast_funnel(broadcast_id: str):
+    """
+    Obtener el embudo de entrega de un broadcast.
+    
+    Se calcula en una sola consulta sobre message_events; los estados más
+    recientes pueden tardar unos segundos en aparecer (escritura por lotes).
+    """
+    try:
+        funnel = await MessageEventRepository().get_broadcast_funnel(broadcast_id)
+    except Exception as e:
+        logger.error(f"Error obteniendo embudo del broadcast {broadcast_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo embudo: {str(e)}"
+        )
+    
+    accepted = funnel["accepted"]
+    return {
+        "broadcast_id": broadcast_id,
+        "funnel": funnel,
+        "delivery_rate": round(funnel["delivered"] / accepted, 4) if accepted else 0.0,
+        "read_rate": round(funnel["read"] / accepted, 4) if accepted else 0.0
+    }
@@ -20,7 +20,7 @@ async def get_all_business_info(
     Obtener toda la información del negocio.
     """
     try:
-        return business_info_service.get_all_info()
+        return await business_info_service.get_all_info()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -38,7 +38,7 @@ async def update_business_info(
     Espera una lista de objetos con 'key' y los campos a actualizar ('value', 'is_active', etc).
     """
     try:
-        return business_info_service.update_info(updates)
+        return await business_info_service.update_info(updates)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
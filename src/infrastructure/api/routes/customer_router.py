@@ -1,13 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Optional, Dict
 from ...database.customer_repository import CustomerRepository
 from ...services.customer_service import CustomerService
-from ...config.database import get_supabase_client
+from ...services.export_service import ExportService, CUSTOMER_EXPORT_COLUMNS, EXPORT_MEDIA_TYPES
+from ...config.database import get_async_supabase_client
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/customers", tags=["customers"])
 
 def get_customer_service():
-    client = get_supabase_client()
+    client = get_async_supabase_client()
     repo = CustomerRepository(client)
     return CustomerService(repo)
 
@@ -20,24 +26,59 @@ async def list_customers_filtered(
     """
     Listar clientes con filtros de búsqueda y estado de cotización.
     """
-    return service.repository.get_filtered(query=q, quote_status=status)
+    return await service.repository.get_filtered(query=q, quote_status=status)
 
 
 @router.get("/", response_model=List[Dict])
 async def get_customers(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     phone: Optional[str] = None,
     service: CustomerService = Depends(get_customer_service)
 ):
     """
     Obtener lista de clientes o buscar por teléfono.
+    
+    Paginación por cursor: si hay más resultados, el cursor de la siguiente
+    página se devuelve en la cabecera `X-Next-Cursor`.
     """
     if phone:
-        customer = service.get_customer_by_phone(phone)
+        customer = await service.get_customer_by_phone(phone)
         return [customer] if customer else []
     
-    return service.repository.get_all(skip, limit)
+    if skip and not cursor:
+        return await service.repository.get_all(skip, limit)
+    
+    try:
+        customers, next_cursor = await service.repository.get_page(limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error listando clientes (cursor={cursor}): {e}")
+        return []
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return customers
+
+@router.get("/export")
+async def export_customers(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    service: CustomerService = Depends(get_customer_service)
+):
+    """
+    Exportar todos los clientes en CSV o NDJSON (streaming).
+    """
+    export_service = ExportService(customer_repository=service.repository)
+    filename = f"clientes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    
+    return StreamingResponse(
+        export_service.stream(export_service.iter_customers(), CUSTOMER_EXPORT_COLUMNS, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.put("/{customer_id}/address")
 async def update_address(
@@ -50,7 +91,7 @@ async def update_address(
     if not address:
         raise HTTPException(status_code=400, detail="Address required")
         
-    updated = service.update_customer_address(customer_id, address)
+    updated = await service.update_customer_address(customer_id, address)
     if not updated:
         raise HTTPException(status_code=404, detail="Customer not found")
     return updated
@@ -67,7 +108,7 @@ async def delete_customer(
     Lanza error 400 si el cliente tiene cotizaciones asociadas (Integridad).
     """
     try:
-        deleted = service.repository.delete(customer_id)
+        deleted = await service.repository.delete(customer_id)
         if not deleted:
              raise HTTPException(status_code=404, detail="Cliente no encontrado")
         return None
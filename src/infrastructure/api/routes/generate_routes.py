@@ -15,9 +15,9 @@ from ..schemas import (
 
 
 from ...database.product_repository import ProductRepository
-from ...config.database import get_supabase_client
+from ...config.database import get_async_supabase_client
 from fastapi.responses import FileResponse
-from ...database.supabase_quote_repository import SupabaseQuoteRepository
+from ...database import get_quote_repository
 from ....application.use_cases import GetQuoteUseCase
 from ...services.invoice_service import InvoiceService
 
@@ -25,12 +25,12 @@ from ...services.invoice_service import InvoiceService
 router = APIRouter(prefix="/generate", tags=["generate"])
 
 # Inicializar repositorio y servicio
-supabase = get_supabase_client()
+supabase = get_async_supabase_client()
 product_repository = ProductRepository(supabase)
 quote_service = QuoteService(product_repository)
 
 # Servicios adicionales para generación de documentos
-quote_repository = SupabaseQuoteRepository()
+quote_repository = get_quote_repository()
 get_quote_use_case = GetQuoteUseCase(quote_repository)
 invoice_service = InvoiceService()
 
@@ -84,6 +84,7 @@ async def generate_quote_from_text(request: GenerateQuoteFromTextRequest):
     """
     try:
         # Generar cotización con detalles
+        await quote_service.refresh_catalog()
         result = quote_service.generate_quote_with_details(
             text=request.text,
             client_phone=request.client_phone,
@@ -121,7 +122,7 @@ async def generate_quote_from_text(request: GenerateQuoteFromTextRequest):
 async def get_available_products():
     """Obtener lista de productos disponibles en el catálogo."""
     try:
-        products = quote_service.get_available_products()
+        products = await quote_service.get_available_products()
         return products
     except Exception as e:
         raise HTTPException(
@@ -143,6 +144,7 @@ async def search_product(request: ProductSearchRequest):
     Usa fuzzy matching para encontrar productos similares.
     """
     try:
+        await quote_service.refresh_catalog()
         product = quote_service.search_product(
             query=request.query,
             threshold=request.threshold
@@ -2,14 +2,14 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from ....domain.entities.product import Product
 from ...database.product_repository import ProductRepository
-from ...config.database import get_supabase_client
+from ...config.database import get_async_supabase_client
 from ...security.auth import get_current_user
 from ....domain.services.quote_service import QuoteService
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 def get_repository():
-    return ProductRepository(get_supabase_client())
+    return ProductRepository(get_async_supabase_client())
 
 def get_quote_service(repo: ProductRepository = Depends(get_repository)):
     return QuoteService(repo)
@@ -19,7 +19,7 @@ async def get_products(repo: ProductRepository = Depends(get_repository)):
     """
     Listar todos los productos (Protegido).
     """
-    return repo.get_all()
+    return await repo.get_all()
 
 @router.post("/", response_model=Product, dependencies=[Depends(get_current_user)])
 async def create_product(
@@ -30,7 +30,7 @@ async def create_product(
     """
     Crear un nuevo producto (Protegido).
     """
-    created = repo.create(product)
+    created = await repo.create(product)
     if not created:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -50,7 +50,7 @@ async def update_product(
     """
     Actualizar un producto existente (Protegido).
     """
-    updated = repo.update(product_id, product)
+    updated = await repo.update(product_id, product)
     if not updated:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -69,7 +69,7 @@ async def delete_product(
     """
     Eliminar un producto (Protegido).
     """
-    success = repo.delete(product_id)
+    success = await repo.delete(product_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,14 +1,20 @@
 """
 Endpoints REST para Quote.
 """
-from typing import List, Optional
+import asyncio
+from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta
 from fastapi import APIRouter, HTTPException, Query, status, Depends
-from ....domain.entities.quote import Quote, QuoteItem, QuoteStatus
+from ....domain.entities.quote import Quote, QuoteItem, QuoteStatus, QuoteSummary
 from ....application.use_cases import (
     CreateQuoteUseCase,
     GetQuoteUseCase,
     ListQuotesUseCase,
+    ListQuotesPageUseCase,
+    ListQuoteSummariesUseCase,
     UpdateQuoteUseCase,
+    BulkUpdateQuoteStatusUseCase,
+    ExpireDraftQuotesUseCase,
     DeleteQuoteUseCase,
     GetQuotesByPhoneUseCase
 )
@@ -17,10 +23,20 @@ from ..schemas import (
     QuoteUpdateSchema,
     QuoteResponseSchema,
     QuoteListResponseSchema,
+    QuoteBulkStatusSchema,
+    QuoteBulkStatusResponseSchema,
+    QuoteStatsResponseSchema,
+    QuoteStatsStatusSchema,
+    QuoteStatsDaySchema,
+    QuoteStatsProductSchema,
+    QuoteSummaryListResponseSchema,
+    QuoteSummarySchema,
     QuoteItemSchema
 )
-from ...database import SupabaseQuoteRepository
+from ...database import get_quote_repository
+from ...database.quote_stats_repository import QuoteStatsRepository, stats_since
 from ...security.auth import get_current_user
+from ...config.settings import settings
 import logging
 
 # Configurar logger
@@ -30,18 +46,44 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/quotes", tags=["quotes"])
 
 # Inicializar repositorio y casos de uso
-repository = SupabaseQuoteRepository()
+repository = get_quote_repository()
 create_quote_use_case = CreateQuoteUseCase(repository)
 get_quote_use_case = GetQuoteUseCase(repository)
 list_quotes_use_case = ListQuotesUseCase(repository)
+list_quotes_page_use_case = ListQuotesPageUseCase(repository)
+list_quote_summaries_use_case = ListQuoteSummariesUseCase(repository)
 update_quote_use_case = UpdateQuoteUseCase(repository)
+bulk_update_status_use_case = BulkUpdateQuoteStatusUseCase(repository)
+expire_drafts_use_case = ExpireDraftQuotesUseCase(
+    repository,
+    max_age=timedelta(days=settings.draft_expiry_days),
+    batch_size=settings.draft_expiry_batch_size
+)
 delete_quote_use_case = DeleteQuoteUseCase(repository)
 get_quotes_by_phone_use_case = GetQuotesByPhoneUseCase(repository)
 
 # Inicializar servicios adicionales
 from ....infrastructure.services.invoice_service import InvoiceService
-from fastapi.responses import FileResponse
+from ....infrastructure.services.pdf_render_pool import get_pdf_render_pool
+from ....infrastructure.services.export_service import ExportService, QUOTE_EXPORT_COLUMNS, EXPORT_MEDIA_TYPES
+from fastapi.responses import FileResponse, StreamingResponse
 invoice_service = InvoiceService()
+pdf_render_pool = get_pdf_render_pool()
+export_service = ExportService(quote_repository=repository)
+stats_repository = QuoteStatsRepository()
+
+# Jobs periódicos (se inician en el startup de la app)
+from ....infrastructure.services.periodic_job import PeriodicJob
+draft_expiry_job = PeriodicJob(
+    "expirar-borradores",
+    expire_drafts_use_case.execute,
+    interval_seconds=settings.draft_expiry_interval_minutes * 60
+)
+stats_refresh_job = PeriodicJob(
+    "refrescar-estadisticas",
+    stats_repository.refresh,
+    interval_seconds=settings.quote_stats_refresh_minutes * 60
+)
 
 
 def _schema_to_entity(schema: QuoteCreateSchema) -> Quote:
@@ -105,6 +147,57 @@ def _entity_to_response(quote: Quote) -> QuoteResponseSchema:
     )
 
 
+def _stats_to_response(by_status: List[Dict], by_day: List[Dict], top_products: List[Dict]) -> QuoteStatsResponseSchema:
+    """Convertir filas de las vistas de estadísticas a schema de respuesta."""
+    refreshed_at = None
+    if by_status and by_status[0].get("refreshed_at"):
+        refreshed_at = datetime.fromisoformat(by_status[0]["refreshed_at"].replace("Z", "+00:00"))
+    
+    return QuoteStatsResponseSchema(
+        refreshed_at=refreshed_at,
+        total_quotes=sum(row["quotes_count"] for row in by_status),
+        total_revenue=round(sum(float(row["revenue"]) for row in by_status), 2),
+        by_status=[
+            QuoteStatsStatusSchema(
+                status=row["status"],
+                quotes_count=row["quotes_count"],
+                revenue=float(row["revenue"])
+            )
+            for row in by_status
+        ],
+        by_day=[
+            QuoteStatsDaySchema(
+                day=date.fromisoformat(row["day"]),
+                status=row["status"],
+                quotes_count=row["quotes_count"],
+                revenue=float(row["revenue"])
+            )
+            for row in by_day
+        ],
+        top_products=[
+            QuoteStatsProductSchema(
+                product_name=row["product_name"],
+                quotes_count=row["quotes_count"],
+                quantity=row["quantity"],
+                revenue=float(row["revenue"])
+            )
+            for row in top_products
+        ]
+    )
+
+
+def _summary_to_response(summary: QuoteSummary) -> QuoteSummarySchema:
+    """Convertir resumen a schema de respuesta."""
+    return QuoteSummarySchema(
+        id=summary.id,
+        client_phone=summary.client_phone,
+        client_name=summary.client_name,
+        total=summary.total,
+        status=QuoteStatus(summary.status),
+        created_at=summary.created_at
+    )
+
+
 @router.post(
     "/",
     response_model=QuoteResponseSchema,
@@ -133,6 +226,134 @@ async def create_quote(
         )
 
 
+@router.post(
+    "/bulk-status",
+    response_model=QuoteBulkStatusResponseSchema,
+    summary="Cambiar estado de varias cotizaciones",
+    description=(
+        "Cambia el estado de las cotizaciones indicadas por `ids` y/o por filtro "
+        "(`filter_status`, `created_before`) con una sola sentencia UPDATE"
+    )
+)
+async def bulk_update_status(
+    request: QuoteBulkStatusSchema,
+    current_user: dict = Depends(get_current_user)
+):
+    """Cambiar el estado de varias cotizaciones a la vez."""
+    try:
+        updated = await bulk_update_status_use_case.execute(
+            request.status,
+            quote_ids=request.ids,
+            current_status=request.filter_status,
+            created_before=request.created_before
+        )
+        return QuoteBulkStatusResponseSchema(updated=updated)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post(
+    "/expire-drafts",
+    response_model=QuoteBulkStatusResponseSchema,
+    summary="Expirar borradores antiguos",
+    description="Ejecuta ahora la expiración de borradores (útil si el job periódico está desactivado y se usa un cron)"
+)
+async def expire_drafts(current_user: dict = Depends(get_current_user)):
+    """Marcar como expirados los borradores más antiguos que DRAFT_EXPIRY_DAYS."""
+    updated = await expire_drafts_use_case.execute()
+    return QuoteBulkStatusResponseSchema(updated=updated)
+
+
+@router.get(
+    "/export",
+    summary="Exportar cotizaciones",
+    description="Exporta todas las cotizaciones en CSV o NDJSON, en streaming y sin límite de filas"
+)
+async def export_quotes(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$", description="csv o ndjson"),
+    quote_status: Optional[str] = Query(None, alias="status", description="Filtrar por estado"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Exportar cotizaciones recorriendo la base de datos con cursor."""
+    filename = f"cotizaciones_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    
+    return StreamingResponse(
+        export_service.stream(export_service.iter_quotes(quote_status), QUOTE_EXPORT_COLUMNS, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get(
+    "/stats",
+    response_model=QuoteStatsResponseSchema,
+    summary="Estadísticas de ventas",
+    description=(
+        "Cotizaciones e ingresos por estado, por día y por producto. Se leen de "
+        "vistas materializadas que se refrescan periódicamente (ver `refreshed_at`)"
+    )
+)
+async def get_quote_stats(
+    days: int = Query(30, ge=1, le=366, description="Días hacia atrás para la serie diaria"),
+    top: int = Query(10, ge=1, le=100, description="Cantidad de productos en el ranking"),
+    quote_status: Optional[str] = Query(None, alias="status", description="Filtrar serie diaria y ranking por estado"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Obtener los agregados de ventas en una sola llamada."""
+    since = stats_since(days)
+    by_status, by_day, top_products = await asyncio.gather(
+        stats_repository.get_by_status(),
+        stats_repository.get_daily(since, quote_status),
+        stats_repository.get_top_products(top, quote_status)
+    )
+    return _stats_to_response(by_status, by_day, top_products)
+
+
+@router.post(
+    "/stats/refresh",
+    summary="Refrescar estadísticas",
+    description="Recalcula ahora las vistas de estadísticas (normalmente lo hace el job periódico)"
+)
+async def refresh_quote_stats(current_user: dict = Depends(get_current_user)):
+    """Refrescar las vistas materializadas de estadísticas."""
+    await stats_repository.refresh()
+    return {"status": "ok"}
+
+
+@router.get(
+    "/summary",
+    response_model=QuoteSummaryListResponseSchema,
+    summary="Listar resúmenes de cotizaciones",
+    description=(
+        "Lista id, cliente, total, estado y fecha de las cotizaciones, sin items. "
+        "Pensado para la tabla del dashboard; misma paginación por cursor que `/quotes`."
+    )
+)
+async def list_quote_summaries(
+    limit: int = Query(100, ge=1, le=100, description="Número máximo de registros"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de la página anterior"),
+    quote_status: Optional[str] = Query(None, alias="status", description="Filtrar por estado"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Listar resúmenes de cotizaciones con paginación por cursor."""
+    try:
+        summaries, next_cursor = await list_quote_summaries_use_case.execute(limit, cursor, quote_status)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return QuoteSummaryListResponseSchema(
+        quotes=[_summary_to_response(summary) for summary in summaries],
+        limit=limit,
+        next_cursor=next_cursor
+    )
+
+
 @router.get(
     "/{quote_id}",
     response_model=QuoteResponseSchema,
@@ -156,23 +377,38 @@ async def get_quote(quote_id: int):
     "/",
     response_model=QuoteListResponseSchema,
     summary="Listar cotizaciones",
-    description="Lista todas las cotizaciones con paginación y filtros opcionales"
+    description=(
+        "Lista las cotizaciones con paginación por cursor y filtros opcionales. "
+        "Usar `next_cursor` de la respuesta para pedir la siguiente página; "
+        "`skip` se mantiene por compatibilidad (paginación por offset)."
+    )
 )
 async def list_quotes(
-    skip: int = Query(0, ge=0, description="Número de registros a saltar"),
+    skip: int = Query(0, ge=0, description="Número de registros a saltar (obsoleto, usar cursor)"),
     limit: int = Query(100, ge=1, le=100, description="Número máximo de registros"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de la página anterior"),
     quote_status: Optional[str] = Query(None, alias="status", description="Filtrar por estado"),
     current_user: dict = Depends(get_current_user)
 ):
     """Listar cotizaciones con paginación."""
     try:
-        quotes = await list_quotes_use_case.execute(skip, limit, quote_status)
+        next_cursor = None
+        if skip and not cursor:
+            quotes = await list_quotes_use_case.execute(skip, limit, quote_status)
+        else:
+            quotes, next_cursor = await list_quotes_page_use_case.execute(limit, cursor, quote_status)
         
         return QuoteListResponseSchema(
             quotes=[_entity_to_response(quote) for quote in quotes],
             total=len(quotes),
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     except Exception as e:
         logger.error(f"Error en list_quotes: {e}", exc_info=True)
@@ -273,7 +509,7 @@ async def generate_quote_pdf(quote_id: int):
             ]
         }
         
-        pdf_path = invoice_service.generate_invoice_pdf(quote_data)
+        pdf_path = await pdf_render_pool.run(invoice_service.generate_invoice_pdf, quote_data)
         
         return FileResponse(
             path=pdf_path,
@@ -283,6 +519,16 @@ async def generate_quote_pdf(quote_id: int):
         
     except HTTPException:
         raise
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Demasiados PDFs en generación, intenta de nuevo en unos segundos"
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="La generación del PDF excedió el tiempo límite"
+        )
     except Exception as e:
         import traceback
         error_msg = f"Error generando PDF: {str(e)}"
@@ -299,10 +545,16 @@ async def generate_quote_pdf(quote_id: int):
     "/phone/{client_phone}",
     response_model=List[QuoteResponseSchema],
     summary="Obtener cotizaciones por teléfono",
-    description="Obtiene todas las cotizaciones de un cliente por su número de teléfono"
+    description=(
+        "Obtiene las cotizaciones de un cliente por su número de teléfono, "
+        "la más reciente primero. Con `limit` solo devuelve las últimas N"
+    )
 )
-async def get_quotes_by_phone(client_phone: str):
+async def get_quotes_by_phone(
+    client_phone: str,
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Solo las últimas N cotizaciones")
+):
     """Obtener cotizaciones por teléfono del cliente."""
-    quotes = await get_quotes_by_phone_use_case.execute(client_phone)
+    quotes = await get_quotes_by_phone_use_case.execute(client_phone, limit)
     
     return [_entity_to_response(quote) for quote in quotes]
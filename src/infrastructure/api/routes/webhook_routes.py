@@ -1,18 +1,23 @@
 """
 Endpoints para webhook de WhatsApp Cloud API.
 """
+import asyncio
 import logging
-from typing import Dict
+from typing import Dict, List
 from fastapi import APIRouter, HTTPException, Request, Query, status
 from ....domain.services import QuoteService
-from ....infrastructure.external import WhatsAppService, RetryQueue
+from ....infrastructure.external import WhatsAppService
+from ....infrastructure.external.retry_queue import get_retry_queue
+from ....infrastructure.external.outbox import get_outbox
+from ....infrastructure.external.whatsapp_service import get_outbound_dispatcher
+from ....infrastructure.config.settings import settings
 from ....application.use_cases import (
     ProcessWhatsAppMessageUseCase,
     RetryFailedMessagesUseCase
 )
-from ....infrastructure.config.database import get_supabase_client
+from ....infrastructure.config.database import get_async_supabase_client
 from ....infrastructure.database.product_repository import ProductRepository
-from ....infrastructure.database import SupabaseQuoteRepository
+from ....infrastructure.database import get_quote_repository
 
 logger = logging.getLogger(__name__)
 
@@ -22,18 +27,50 @@ from ....infrastructure.database.customer_repository import CustomerRepository
 from ....infrastructure.database.session_repository import SessionRepository
 from ....infrastructure.services.invoice_service import InvoiceService
 from ....infrastructure.services.storage_service import StorageService
+from ....infrastructure.services.message_event_buffer import get_message_event_buffer
+from ....infrastructure.services.webhook_worker_pool import WebhookWorkerPool
+from ....infrastructure.services.message_dedupe import MessageDedupeStore
+from ....infrastructure.services.message_coalescer import MessageCoalescer
+from ....infrastructure.services.retry_scheduler import RetryScheduler
+from ....infrastructure.services.periodic_job import PeriodicJob
+from ....infrastructure.services.pdf_render_pool import get_pdf_render_pool
+from ....infrastructure.database.message_event_repository import MessageEventRepository
 
 # Inicializar servicios
-supabase = get_supabase_client()
+supabase = get_async_supabase_client()
 product_repository = ProductRepository(supabase)
 quote_service = QuoteService(product_repository)
-quote_repository = SupabaseQuoteRepository()
+quote_repository = get_quote_repository()
 session_repository = SessionRepository(supabase)
 customer_repository = CustomerRepository(supabase)
 invoice_service = InvoiceService()
 storage_service = StorageService(supabase)
-whatsapp_service = WhatsAppService()
-retry_queue = RetryQueue()
+# PDFs de cotizaciones y catálogo fuera del event loop
+pdf_render_pool = get_pdf_render_pool()
+# Todos los envíos quedan registrados en el outbox (si está habilitado)
+outbox = get_outbox()
+# Las respuestas se encolan: el webhook no espera a la Graph API
+if settings.whatsapp_dispatch_enabled:
+    whatsapp_service = WhatsAppService(dispatcher=get_outbound_dispatcher(), wait_for_delivery=False, outbox=outbox)
+else:
+    whatsapp_service = WhatsAppService(outbox=outbox)
+retry_queue = get_retry_queue()
+message_event_buffer = get_message_event_buffer()
+message_event_repository = MessageEventRepository(supabase)
+
+# Mensajes ya procesados (Meta reenvía el webhook si tardamos en responder)
+message_dedupe = MessageDedupeStore(
+    ttl_seconds=settings.webhook_dedupe_ttl_seconds,
+    max_entries=settings.webhook_dedupe_max_entries,
+    persist_path=settings.webhook_dedupe_file or None
+)
+
+# Procesamiento en segundo plano (se inicia en el startup si webhook_async_processing)
+webhook_worker_pool = WebhookWorkerPool(
+    workers=settings.webhook_workers,
+    max_queue_size=settings.webhook_queue_size,
+    enqueue_timeout=settings.webhook_enqueue_timeout
+)
 
 # Inicializar casos de uso
 process_message_use_case = ProcessWhatsAppMessageUseCase(
@@ -44,12 +81,48 @@ process_message_use_case = ProcessWhatsAppMessageUseCase(
     session_repository=session_repository,
     invoice_service=invoice_service,
     storage_service=storage_service,
-    customer_repository=customer_repository
+    customer_repository=customer_repository,
+    render_pool=pdf_render_pool
 )
 
+# Ventana por remitente: los textos seguidos se procesan como un solo mensaje
+message_coalescer = None
+if settings.webhook_coalesce_window_ms > 0:
+    message_coalescer = MessageCoalescer(
+        window_ms=settings.webhook_coalesce_window_ms,
+        emit=lambda messages: _dispatch_coalesced(messages),
+        can_merge=process_message_use_case.can_coalesce,
+        max_messages=settings.webhook_coalesce_max_messages
+    )
+
+# Los reintentos dependen de saber si el envío falló: esperan la respuesta
+# (el servicio no registra en el outbox: el caso de uso marca los reenvíos)
 retry_messages_use_case = RetryFailedMessagesUseCase(
-    whatsapp_service=whatsapp_service,
-    retry_queue=retry_queue
+    whatsapp_service=WhatsAppService(dispatcher=whatsapp_service.dispatcher, wait_for_delivery=True),
+    retry_queue=retry_queue,
+    batch_size=settings.retry_batch_size,
+    concurrency=settings.retry_concurrency,
+    outbox=outbox
+)
+
+# Reintentos automáticos (se inicia en el startup si retry_scheduler_enabled)
+retry_scheduler = RetryScheduler(
+    run=retry_messages_use_case.execute,
+    next_due=retry_queue.next_retry_at,
+    idle_interval=settings.retry_scheduler_idle_seconds
+)
+retry_queue.on_scheduled = retry_scheduler.schedule
+
+# Compactación de la cola: agotados a dead letters y purga de los viejos
+# (transacción, checkpoint del WAL o reescritura del JSON: fuera del event loop)
+async def _compact_retry_queue() -> Dict:
+    return await asyncio.to_thread(retry_queue.compact, settings.retry_dead_letter_retention_days)
+
+
+retry_compaction_job = PeriodicJob(
+    "compactar-cola-reintentos",
+    _compact_retry_queue,
+    interval_seconds=settings.retry_compaction_interval_minutes * 60
 )
 
 
@@ -96,13 +169,17 @@ async def receive_webhook(request: Request):
     """
     Recibir mensajes de WhatsApp.
     
-    Meta envía una petición POST cuando hay un nuevo mensaje.
+    Meta envía una petición POST cuando hay nuevos mensajes o cambios de
+    estado; bajo carga agrupa varios en el mismo POST.
     
     Flujo:
-    1. Extraer datos del mensaje
-    2. Generar cotización usando QuoteService
-    3. Enviar respuesta automática
-    4. Si falla, agregar a cola de reintentos
+    1. Extraer todos los mensajes y estados del webhook (descartando
+       mensajes ya procesados)
+    2. Con webhook_async_processing, encolar y responder de inmediato
+    3. Procesar remitentes distintos en paralelo (los mensajes de un mismo
+       remitente, en orden)
+    4. Generar cotización usando QuoteService y enviar respuesta automática
+    5. Si falla, agregar a cola de reintentos
     """
     try:
         # Obtener datos del webhook
@@ -110,19 +187,78 @@ async def receive_webhook(request: Request):
         
         logger.info(f"Webhook recibido: {webhook_data}")
         
-        # Extraer datos del mensaje
-        message_data = whatsapp_service.extract_message_data(webhook_data)
+        # Agrupar mensajes por remitente (conserva el orden de llegada)
+        by_sender: Dict[str, List[Dict]] = {}
+        statuses: List[Dict] = []
+        duplicates = 0
+        for event in whatsapp_service.iter_webhook_events(webhook_data):
+            if event['kind'] == 'message':
+                if message_dedupe.seen(event['message_id']):
+                    duplicates += 1
+                    continue
+                by_sender.setdefault(event['from'], []).append(event)
+            else:
+                statuses.append(event)
         
-        if not message_data:
-            logger.info("Webhook no contiene mensaje de texto válido")
+        if duplicates:
+            logger.info(f"Webhook con {duplicates} mensajes ya procesados (reenvío de Meta)")
+        
+        if not by_sender and not statuses:
+            logger.info("Webhook no contiene mensajes ni estados válidos")
             return {"status": "ok", "message": "No message to process"}
         
-        # Procesar mensaje
-        result = await process_message_use_case.execute(message_data)
+        # Estados de entrega: se acumulan y se escriben por lotes en segundo plano
+        for status_event in statuses:
+            _log_status(status_event)
+            message_event_buffer.add_status(status_event)
+        
+        # Ventana de agrupación: la respuesta sale cuando el cliente deja de escribir
+        if message_coalescer is not None:
+            for messages in by_sender.values():
+                for message in messages:
+                    await message_coalescer.add(message)
+            return {
+                "status": "accepted",
+                "queued": sum(len(messages) for messages in by_sender.values()),
+                "statuses": len(statuses)
+            }
+        
+        # Modo rápido: encolar y responder 200 sin esperar el procesamiento
+        if webhook_worker_pool.running:
+            inline = []
+            for messages in by_sender.values():
+                if not await webhook_worker_pool.submit(lambda messages=messages: _process_in_order(messages)):
+                    inline.append(messages)
+            
+            if not inline:
+                return {
+                    "status": "accepted",
+                    "queued": sum(len(messages) for messages in by_sender.values()),
+                    "statuses": len(statuses)
+                }
+            
+            # Cola llena: lo que no entró se procesa en línea
+            logger.warning(f"Cola de webhooks llena: {len(inline)} remitentes se procesan en línea")
+            by_sender = {messages[0]['from']: messages for messages in inline}
+        
+        # Procesar mensajes
+        batches = await asyncio.gather(
+            *(_process_in_order(messages) for messages in by_sender.values()),
+            return_exceptions=True
+        )
+        
+        results = []
+        for batch in batches:
+            if isinstance(batch, Exception):
+                logger.error(f"Error procesando mensajes del webhook: {batch}")
+                results.append({'success': False, 'error': str(batch)})
+            else:
+                results.extend(batch)
         
         return {
             "status": "ok",
-            "result": result
+            "results": results,
+            "statuses": len(statuses)
         }
         
     except Exception as e:
@@ -136,6 +272,32 @@ async def receive_webhook(request: Request):
         }
 
 
+async def _process_in_order(messages: List[Dict]) -> List[Dict]:
+    """Procesar los mensajes de un remitente uno tras otro (la sesión depende del anterior)."""
+    return [await process_message_use_case.execute(message) for message in messages]
+
+
+async def _dispatch_coalesced(messages: List[Dict]):
+    """Procesar una ventana cerrada del agrupador (con el pool si está corriendo)."""
+    job = lambda: process_message_use_case.execute_many(messages)
+    if not await webhook_worker_pool.submit(job):
+        await job()
+
+
+def _log_status(status_event: Dict):
+    """Registrar un cambio de estado de un mensaje enviado."""
+    if status_event['status'] == 'failed':
+        logger.warning(
+            f"Mensaje {status_event['message_id']} a {status_event['recipient_id']} "
+            f"falló: {status_event['errors']}"
+        )
+    else:
+        logger.debug(
+            f"Mensaje {status_event['message_id']} a {status_event['recipient_id']}: "
+            f"{status_event['status']}"
+        )
+
+
 @router.post(
     "/retry",
     summary="Reintentar mensajes fallidos",
@@ -163,6 +325,74 @@ async def retry_failed_messages():
         )
 
 
+@router.get(
+    "/dispatch-status",
+    summary="Estado de la cola de envíos",
+    description="Profundidad de la cola de mensajes salientes, contadores de envío y throttling"
+)
+async def get_dispatch_status():
+    """Obtener métricas de la cola de envíos y del limitador de Meta."""
+    rate_limiter = whatsapp_service.rate_limiter.metrics() if whatsapp_service.rate_limiter else None
+    
+    if whatsapp_service.dispatcher is None:
+        return {
+            "enabled": False,
+            "rate_limiter": rate_limiter,
+            "message_events": message_event_buffer.metrics(),
+            "outbox": _outbox_status()
+        }
+    
+    return {
+        "enabled": True,
+        **whatsapp_service.dispatcher.metrics(),
+        "rate_limiter": rate_limiter,
+        "message_events": message_event_buffer.metrics(),
+        "outbox": _outbox_status()
+    }
+
+
+def _outbox_status():
+    if outbox is None:
+        return None
+    return {**outbox.metrics(), "by_status": outbox.counts()}
+
+
+@router.get(
+    "/worker-status",
+    summary="Estado del procesamiento en segundo plano",
+    description="Profundidad de la cola de webhooks, demora de procesamiento, duplicados descartados, mensajes agrupados y generación de PDFs"
+)
+async def get_worker_status():
+    """Obtener métricas del pool de workers del webhook y del filtro de duplicados."""
+    return {
+        "enabled": settings.webhook_async_processing,
+        **webhook_worker_pool.metrics(),
+        "dedupe": message_dedupe.metrics(),
+        "sender_lanes": process_message_use_case.sender_lanes.metrics(),
+        "coalescer": message_coalescer.metrics() if message_coalescer is not None else None,
+        "pdf_render": pdf_render_pool.metrics()
+    }
+
+
+@router.get(
+    "/messages/{wa_message_id}/events",
+    summary="Estados de entrega de un mensaje",
+    description="Historial de estados (accepted, sent, delivered, read, failed) de un mensaje enviado"
+)
+async def get_message_events(wa_message_id: str):
+    """Obtener los estados de entrega registrados para un mensaje."""
+    try:
+        events = await message_event_repository.get_by_message(wa_message_id)
+        return {"wa_message_id": wa_message_id, "events": events}
+        
+    except Exception as e:
+        logger.error(f"Error obteniendo estados del mensaje {wa_message_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo estados: {str(e)}"
+        )
+
+
 @router.get(
     "/queue-status",
     summary="Estado de la cola de reintentos",
@@ -171,14 +401,12 @@ async def retry_failed_messages():
 async def get_queue_status():
     """Obtener estado de la cola de reintentos."""
     try:
-        queue_size = retry_queue.get_queue_size()
-        messages_to_retry = retry_queue.get_messages_to_retry()
-        failed_messages = retry_queue.get_failed_messages()
+        stats = retry_queue.stats()
+        failed_messages = retry_queue.get_failed_messages(limit=50)
         
         return {
-            "queue_size": queue_size,
-            "pending_retry": len(messages_to_retry),
-            "failed": len(failed_messages),
+            **stats,
+            "failed": stats["dead_letters"],
             "failed_messages": [
                 {
                     "id": msg.id,
@@ -187,7 +415,8 @@ async def get_queue_status():
                     "last_error": msg.last_error
                 }
                 for msg in failed_messages
-            ]
+            ],
+            "scheduler": retry_scheduler.metrics()
         }
         
     except Exception as e:
@@ -4,7 +4,15 @@ from .quote_schemas import (
     QuoteCreateSchema,
     QuoteUpdateSchema,
     QuoteResponseSchema,
-    QuoteListResponseSchema
+    QuoteListResponseSchema,
+    QuoteBulkStatusSchema,
+    QuoteBulkStatusResponseSchema,
+    QuoteStatsResponseSchema,
+    QuoteStatsStatusSchema,
+    QuoteStatsDaySchema,
+    QuoteStatsProductSchema,
+    QuoteSummarySchema,
+    QuoteSummaryListResponseSchema
 )
 from .generate_quote_schemas import (
     GenerateQuoteFromTextRequest,
@@ -18,6 +26,14 @@ __all__ = [
     'QuoteUpdateSchema',
     'QuoteResponseSchema',
     'QuoteListResponseSchema',
+    'QuoteBulkStatusSchema',
+    'QuoteBulkStatusResponseSchema',
+    'QuoteStatsResponseSchema',
+    'QuoteStatsStatusSchema',
+    'QuoteStatsDaySchema',
+    'QuoteStatsProductSchema',
+    'QuoteSummarySchema',
+    'QuoteSummaryListResponseSchema',
     'GenerateQuoteFromTextRequest',
     'GenerateQuoteFromTextResponse',
     'ProductSearchRequest'
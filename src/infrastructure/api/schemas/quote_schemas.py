@@ -2,7 +2,7 @@
 Schemas de API (DTOs) para Quote.
 Define los modelos de entrada/salida de la API REST.
 """
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional
 from pydantic import Field
 from src.domain.base import StrictBaseModel
@@ -85,3 +85,76 @@ class QuoteListResponseSchema(StrictBaseModel):
     total: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
+
+
+class QuoteBulkStatusSchema(StrictBaseModel):
+    """Schema para cambiar el estado de varias cotizaciones (IDs y/o filtro)."""
+    
+    # strict=False: el enum y la fecha llegan como texto en el JSON
+    status: QuoteStatus = Field(..., strict=False, description="Estado nuevo")
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+    filter_status: Optional[QuoteStatus] = Field(None, strict=False, description="Solo cotizaciones en este estado")
+    created_before: Optional[datetime] = Field(None, strict=False, description="Solo cotizaciones creadas antes de esta fecha")
+
+
+class QuoteBulkStatusResponseSchema(StrictBaseModel):
+    """Resultado de un cambio de estado masivo."""
+    
+    updated: int
+
+
+class QuoteStatsStatusSchema(StrictBaseModel):
+    """Agregado de cotizaciones por estado."""
+    
+    status: str
+    quotes_count: int
+    revenue: float
+
+
+class QuoteStatsDaySchema(StrictBaseModel):
+    """Agregado de cotizaciones por día y estado."""
+    
+    day: date
+    status: str
+    quotes_count: int
+    revenue: float
+
+
+class QuoteStatsProductSchema(StrictBaseModel):
+    """Agregado por producto (desde los items de las cotizaciones)."""
+    
+    product_name: str
+    quotes_count: int
+    quantity: int
+    revenue: float
+
+
+class QuoteStatsResponseSchema(StrictBaseModel):
+    """Estadísticas de ventas precalculadas para el dashboard."""
+    
+    refreshed_at: Optional[datetime] = None
+    total_quotes: int
+    total_revenue: float
+    by_status: List[QuoteStatsStatusSchema]
+    by_day: List[QuoteStatsDaySchema]
+    top_products: List[QuoteStatsProductSchema]
+
+
+class QuoteSummarySchema(StrictBaseModel):
+    """Schema resumido de cotización (sin items) para tablas."""
+    
+    id: int
+    client_phone: str
+    client_name: Optional[str] = None
+    total: float
+    status: QuoteStatus
+    created_at: Optional[datetime] = None
+
+
+class QuoteSummaryListResponseSchema(StrictBaseModel):
+    """Schema para página de resúmenes de cotizaciones."""
+    
+    quotes: List[QuoteSummarySchema]
+    limit: int
+    next_cursor: Optional[str] = None
@@ -1,28 +1,76 @@
 from supabase import create_client, Client
+from supabase._async.client import AsyncClient
 from .settings import settings
 
 _supabase_client: Client = None
+_async_supabase_client: AsyncClient = None
+
+
+def _get_backend_key() -> str:
+    """Clave para operaciones de backend (service_key si existe, bypasses RLS)."""
+    # Intentar obtener de settings, luego de os.environ directamente
+    service_key = getattr(settings, 'supabase_service_key', None)
+    if not service_key:
+        import os
+        service_key = os.getenv('SUPABASE_SERVICE_KEY')
+
+    key = service_key if service_key else settings.supabase_key
+
+    if not key:
+        raise ValueError("No SUPABASE_KEY or SUPABASE_SERVICE_KEY found in settings")
+
+    return key
+
 
 def get_supabase_client() -> Client:
-    """Obtener instancia única del cliente de Supabase."""
+    """
+    Obtener instancia única del cliente síncrono de Supabase.
+
+    Solo para scripts y utilidades fuera del event loop; la API usa
+    get_async_supabase_client().
+    """
     global _supabase_client
-    
-    if _supabase_client is None:
-        # Priorizar service_key para operaciones de backend (bypasses RLS)
-        # Intentar obtener de settings, luego de os.environ directamente
-        service_key = getattr(settings, 'supabase_service_key', None)
-        if not service_key:
-            import os
-            service_key = os.getenv('SUPABASE_SERVICE_KEY')
-            
-        key = service_key if service_key else settings.supabase_key
-        
-        if not key:
-            raise ValueError("No SUPABASE_KEY or SUPABASE_SERVICE_KEY found in settings")
 
+    if _supabase_client is None:
         _supabase_client = create_client(
-            settings.supabase_url, 
-            key
+            settings.supabase_url,
+            _get_backend_key()
         )
-    
+
     return _supabase_client
+
+
+def get_async_supabase_client() -> AsyncClient:
+    """
+    Obtener instancia única del cliente asíncrono de Supabase.
+
+    Todos los repositorios, Storage y la validación de tokens comparten
+    este cliente: PostgREST, Storage y Auth mantienen cada uno una sesión
+    httpx (HTTP/2, keep-alive) que reutiliza conexiones entre peticiones.
+    """
+    global _async_supabase_client
+
+    if _async_supabase_client is None:
+        _async_supabase_client = AsyncClient(
+            settings.supabase_url,
+            _get_backend_key()
+        )
+
+    return _async_supabase_client
+
+
+async def close_async_supabase_client():
+    """Cerrar las conexiones HTTP del cliente compartido (al apagar la app)."""
+    global _async_supabase_client
+
+    client = _async_supabase_client
+    _async_supabase_client = None
+    if client is None:
+        return
+
+    # Solo cerrar las sesiones que llegaron a crearse (se inicializan bajo demanda)
+    if client._postgrest is not None:
+        await client._postgrest.aclose()
+    if client._storage is not None:
+        await client._storage.aclose()
+    await client.auth.close()
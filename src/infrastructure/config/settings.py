@@ -21,6 +21,24 @@ class Settings(BaseSettings):
     supabase_jwt_secret: str
     supabase_bucket_name: str = "invoices"
     
+    # Conexión directa a Postgres (backend asyncpg)
+    # quote_repository_backend: "supabase" (PostgREST) o "asyncpg"
+    quote_repository_backend: str = "supabase"
+    database_url: str = ""
+    database_pool_min_size: int = 1
+    database_pool_max_size: int = 10
+    # Usar 0 si la conexión pasa por PgBouncer en modo transacción
+    database_statement_cache_size: int = 100
+    
+    # Expiración automática de borradores
+    # draft_expiry_interval_minutes = 0 desactiva el job (usar POST /quotes/expire-drafts)
+    draft_expiry_days: int = 30
+    draft_expiry_batch_size: int = 500
+    draft_expiry_interval_minutes: int = 60
+    
+    # Refresco de las vistas de estadísticas (/quotes/stats); 0 = desactivado
+    quote_stats_refresh_minutes: int = 15
+    
     # Configuración de API
     api_v1_prefix: str = "/api/v1"
     backend_cors_origins: List[str] = ["*"]
@@ -37,6 +55,66 @@ class Settings(BaseSettings):
     whatsapp_api_version: str = "v18.0"
     whatsapp_api_version: str = "v18.0"
     whatsapp_api_url: str = "https://graph.facebook.com"
+    # Cliente HTTP compartido (keep-alive, HTTP/2) hacia la Graph API
+    whatsapp_http_timeout: float = 10.0
+    whatsapp_http_connect_timeout: float = 5.0
+    whatsapp_http_max_connections: int = 20
+    whatsapp_http_max_keepalive: int = 10
+    whatsapp_http_keepalive_expiry: float = 60.0
+    # Cola de envíos: orden por destinatario, destinatarios distintos en paralelo
+    whatsapp_dispatch_enabled: bool = True
+    whatsapp_dispatch_workers: int = 8
+    whatsapp_dispatch_queue_size: int = 1000
+    # Límite de envíos de Meta: por número emisor y por destinatario (1 cada 6 s, ráfaga de 45)
+    whatsapp_rate_limit_enabled: bool = True
+    whatsapp_rate_limit_per_second: float = 80.0
+    whatsapp_rate_limit_burst: float = 80.0
+    whatsapp_recipient_rate_per_second: float = 1 / 6
+    whatsapp_recipient_burst: float = 45.0
+    whatsapp_rate_limit_max_retries: int = 3
+    whatsapp_rate_limit_max_backoff: float = 60.0
+    # Archivos subidos a /media (Meta los descarta a los 30 días)
+    whatsapp_media_max_age_days: int = 25
+    # Webhook: responder 200 al encolar y procesar con workers en segundo plano
+    webhook_async_processing: bool = True
+    webhook_workers: int = 4
+    webhook_queue_size: int = 500
+    webhook_enqueue_timeout: float = 2.0
+    webhook_drain_timeout: float = 30.0
+    # IDs de mensajes ya procesados (vacío = solo en memoria)
+    webhook_dedupe_ttl_seconds: int = 86400
+    webhook_dedupe_max_entries: int = 100000
+    webhook_dedupe_file: str = ""
+    # Unir textos seguidos de un mismo cliente (0 = desactivado)
+    webhook_coalesce_window_ms: int = 0
+    webhook_coalesce_max_messages: int = 10
+    # Cola de reintentos: "sqlite" (data/retry_queue.db) o "json" (data/retry_queue.json)
+    retry_queue_backend: str = "sqlite"
+    retry_queue_file: str = ""
+    # Reintentos automáticos al vencer next_retry (POST /webhook/retry sigue disponible)
+    retry_scheduler_enabled: bool = True
+    retry_scheduler_idle_seconds: float = 300.0
+    # Reintentos por ejecución y envíos simultáneos al vaciar la cola
+    retry_batch_size: int = 500
+    retry_concurrency: int = 16
+    # Dead letters: se conservan N días; compactación periódica de la cola
+    retry_dead_letter_retention_days: int = 30
+    retry_compaction_interval_minutes: int = 60
+    # Outbox: registro de todos los envíos (data/outbox.db), escrito por lotes
+    outbox_enabled: bool = True
+    outbox_file: str = ""
+    outbox_batch_size: int = 200
+    outbox_flush_seconds: float = 2.0
+    outbox_retention_days: int = 7
+    # PDFs (cotizaciones y catálogo) en un pool de procesos fuera del event loop
+    pdf_render_workers: int = 2
+    pdf_render_max_pending: int = 32
+    pdf_render_timeout_seconds: float = 60.0
+    pdf_render_use_processes: bool = True
+    # Estados de entrega: escritura por lotes en message_events
+    message_events_batch_size: int = 200
+    message_events_flush_seconds: float = 5.0
+    message_events_max_buffer: int = 10000
     
     # Configuración de AI (Groq)
     groq_api_key: str = ""
@@ -1,4 +1,11 @@
 """Adaptadores de base de datos."""
 from .supabase_quote_repository import SupabaseQuoteRepository
+from .asyncpg_quote_repository import AsyncpgQuoteRepository
+from .repository_factory import get_quote_repository, close_quote_repository
 
-__all__ = ['SupabaseQuoteRepository']
+__all__ = [
+    'SupabaseQuoteRepository',
+    'AsyncpgQuoteRepository',
+    'get_quote_repository',
+    'close_quote_repository'
+]
@@ -0,0 +1,356 @@
+"""
+Adaptador asyncpg para el repositorio de Quote.
+Implementa la interfaz QuoteRepository con conexiones directas a Postgres
+(pool asyncpg), sin pasar por PostgREST y sin bloquear el event loop.
+"""
+import json
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+import asyncpg
+from ...domain.entities.quote import Quote, QuoteItem, QuoteStatus, QuoteSummary
+from ...domain.repositories.quote_repository import QuoteRepository
+from ..config.settings import settings
+from .pagination import decode_cursor, encode_cursor
+
+
+# Columnas que devuelve cada consulta (incluye el nombre del cliente del CRM)
+_SELECT = """
+    SELECT q.id, q.client_phone, q.items, q.total, q.status::text AS status,
+           q.created_at, q.updated_at, q.notes, q.customer_id::text AS customer_id,
+           q.client_name, q.client_dni, q.client_address,
+           c.full_name AS customer_full_name
+    FROM quotes q
+    LEFT JOIN customers c ON c.id = q.customer_id
+"""
+
+_INSERT = """
+    WITH q AS (
+        INSERT INTO quotes (client_phone, items, total, status, notes,
+                            customer_id, client_name, client_dni, client_address)
+        VALUES ($1, $2, $3, $4::quote_status, $5, $6::uuid, $7, $8, $9)
+        RETURNING *
+    )
+""" + _SELECT.replace("FROM quotes q", "FROM q")
+
+_UPDATE = """
+    WITH q AS (
+        UPDATE quotes
+        SET client_phone = $2, items = $3, total = $4, status = $5::quote_status,
+            notes = $6, customer_id = $7::uuid, client_name = $8,
+            client_dni = $9, client_address = $10
+        WHERE id = $1
+        RETURNING *
+    )
+""" + _SELECT.replace("FROM quotes q", "FROM q")
+
+_GET_BY_ID = _SELECT + " WHERE q.id = $1"
+
+_GET_ALL = _SELECT + """
+    WHERE ($1::text IS NULL OR q.status::text = $1)
+    ORDER BY q.created_at DESC
+    OFFSET $2 LIMIT $3
+"""
+
+_GET_PAGE = _SELECT + """
+    WHERE ($1::text IS NULL OR q.status::text = $1)
+      AND ($2::timestamptz IS NULL OR (q.created_at, q.id) < ($2::timestamptz, $3::int))
+    ORDER BY q.created_at DESC, q.id DESC
+    LIMIT $4
+"""
+
+_GET_SUMMARY_PAGE = """
+    SELECT q.id, q.client_phone, COALESCE(c.full_name, q.client_name) AS client_name,
+           q.total, q.status::text AS status, q.created_at
+    FROM quotes q
+    LEFT JOIN customers c ON c.id = q.customer_id
+    WHERE ($1::text IS NULL OR q.status::text = $1)
+      AND ($2::timestamptz IS NULL OR (q.created_at, q.id) < ($2::timestamptz, $3::int))
+    ORDER BY q.created_at DESC, q.id DESC
+    LIMIT $4
+"""
+
+_GET_BY_PHONE = _SELECT + " WHERE q.client_phone = $1 ORDER BY q.created_at DESC"
+
+# Los filtros nulos se ignoran; con $5 (limit) se actualiza solo el lote más antiguo
+_UPDATE_STATUS_BULK = """
+    WITH target AS (
+        SELECT id FROM quotes
+        WHERE ($2::int[] IS NULL OR id = ANY($2))
+          AND ($3::text IS NULL OR status::text = $3)
+          AND ($4::timestamptz IS NULL OR created_at < $4)
+        ORDER BY created_at
+        LIMIT $5
+        FOR UPDATE SKIP LOCKED
+    ), updated AS (
+        UPDATE quotes SET status = $1::quote_status
+        FROM target WHERE quotes.id = target.id
+        RETURNING 1
+    )
+    SELECT count(*) FROM updated
+"""
+
+_GET_LATEST_BY_PHONE = _SELECT + """
+    WHERE q.client_phone = $1
+    ORDER BY q.created_at DESC, q.id DESC
+    LIMIT $2
+"""
+
+# Un index scan acotado por teléfono (misma lógica que latest_quotes_by_phones)
+_GET_LATEST_BY_PHONES = """
+    SELECT q.id, q.client_phone, q.items, q.total, q.status::text AS status,
+           q.created_at, q.updated_at, q.notes, q.customer_id::text AS customer_id,
+           q.client_name, q.client_dni, q.client_address,
+           c.full_name AS customer_full_name
+    FROM unnest($1::text[]) AS p(phone)
+    CROSS JOIN LATERAL (
+        SELECT * FROM quotes
+        WHERE client_phone = p.phone
+        ORDER BY created_at DESC, id DESC
+        LIMIT $2
+    ) q
+    LEFT JOIN customers c ON c.id = q.customer_id
+    ORDER BY q.created_at DESC, q.id DESC
+"""
+
+_DELETE = "DELETE FROM quotes WHERE id = $1 RETURNING id"
+
+
+class AsyncpgQuoteRepository(QuoteRepository):
+    """
+    Implementación del repositorio de cotizaciones usando asyncpg.
+
+    Comparte un pool de conexiones por proceso. Las consultas son constantes,
+    así asyncpg las prepara una vez por conexión y reutiliza el plan
+    (statement cache).
+    """
+
+    def __init__(self, dsn: Optional[str] = None, pool: Optional[asyncpg.Pool] = None):
+        """
+        Inicializar repositorio.
+
+        Args:
+            dsn: Cadena de conexión Postgres (por defecto settings.database_url)
+            pool: Pool ya creado (opcional, útil en tests)
+        """
+        self.dsn = dsn or settings.database_url
+        self._pool = pool
+        self._pool_lock = asyncio.Lock()
+
+    async def _get_pool(self) -> asyncpg.Pool:
+        """Crear el pool de conexiones la primera vez que se usa."""
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    if not self.dsn:
+                        raise ValueError("DATABASE_URL no está configurada para el backend asyncpg")
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=settings.database_pool_min_size,
+                        max_size=settings.database_pool_max_size,
+                        statement_cache_size=settings.database_statement_cache_size,
+                        init=self._init_connection
+                    )
+        return self._pool
+
+    @staticmethod
+    async def _init_connection(conn: asyncpg.Connection):
+        """Decodificar jsonb como objetos Python en cada conexión del pool."""
+        await conn.set_type_codec(
+            "jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        )
+
+    async def close(self):
+        """Cerrar el pool de conexiones."""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    def _record_to_quote(self, record: asyncpg.Record) -> Quote:
+        """Convertir fila de Postgres a entidad Quote."""
+        items = [QuoteItem(**item) for item in (record["items"] or [])]
+
+        return Quote(
+            id=record["id"],
+            client_phone=record["client_phone"],
+            items=items,
+            total=float(record["total"]),
+            status=QuoteStatus(record["status"] or "draft"),
+            created_at=record["created_at"],
+            updated_at=record["updated_at"],
+            notes=record["notes"],
+            customer_id=record["customer_id"],
+            client_name=record["customer_full_name"] or record["client_name"],
+            client_dni=record["client_dni"],
+            client_address=record["client_address"]
+        )
+
+    def _quote_to_args(self, quote: Quote) -> tuple:
+        """Convertir entidad Quote a parámetros posicionales."""
+        return (
+            quote.client_phone,
+            [item.model_dump() for item in quote.items],
+            Decimal(str(quote.total)),
+            quote.status.value if hasattr(quote.status, 'value') else quote.status,
+            quote.notes,
+            quote.customer_id,
+            quote.client_name,
+            quote.client_dni,
+            quote.client_address,
+        )
+
+    async def create(self, quote: Quote) -> Quote:
+        """Crear una nueva cotización."""
+        pool = await self._get_pool()
+        record = await pool.fetchrow(_INSERT, *self._quote_to_args(quote))
+
+        if not record:
+            raise Exception("Error al crear la cotización")
+
+        return self._record_to_quote(record)
+
+    async def get_by_id(self, quote_id: int) -> Optional[Quote]:
+        """Obtener una cotización por su ID."""
+        pool = await self._get_pool()
+        record = await pool.fetchrow(_GET_BY_ID, quote_id)
+
+        return self._record_to_quote(record) if record else None
+
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None
+    ) -> List[Quote]:
+        """Obtener todas las cotizaciones con paginación y filtros."""
+        pool = await self._get_pool()
+        records = await pool.fetch(_GET_ALL, status, skip, limit)
+
+        return [self._record_to_quote(record) for record in records]
+
+    async def get_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[Quote], Optional[str]]:
+        """Obtener una página de cotizaciones usando keyset sobre (created_at, id)."""
+        after_created_at, after_id = _cursor_position(cursor)
+
+        pool = await self._get_pool()
+        records = await pool.fetch(_GET_PAGE, status, after_created_at, after_id, limit + 1)
+
+        quotes = [self._record_to_quote(record) for record in records[:limit]]
+        return quotes, _records_next_cursor(records, limit)
+
+    async def get_summary_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[QuoteSummary], Optional[str]]:
+        """Obtener una página de resúmenes (sin items) usando keyset sobre (created_at, id)."""
+        after_created_at, after_id = _cursor_position(cursor)
+
+        pool = await self._get_pool()
+        records = await pool.fetch(_GET_SUMMARY_PAGE, status, after_created_at, after_id, limit + 1)
+
+        summaries = [
+            QuoteSummary(
+                id=record["id"],
+                client_phone=record["client_phone"],
+                client_name=record["client_name"],
+                total=float(record["total"]),
+                status=QuoteStatus(record["status"] or "draft"),
+                created_at=record["created_at"]
+            )
+            for record in records[:limit]
+        ]
+        return summaries, _records_next_cursor(records, limit)
+
+    async def update(self, quote_id: int, quote: Quote) -> Optional[Quote]:
+        """Actualizar una cotización existente."""
+        pool = await self._get_pool()
+        record = await pool.fetchrow(_UPDATE, quote_id, *self._quote_to_args(quote))
+
+        return self._record_to_quote(record) if record else None
+
+    async def update_status_bulk(
+        self,
+        new_status: str,
+        quote_ids: Optional[List[int]] = None,
+        current_status: Optional[str] = None,
+        created_before: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> int:
+        """Cambiar el estado de varias cotizaciones en una sola sentencia."""
+        if not (quote_ids or current_status or created_before):
+            raise ValueError("Se requiere al menos un filtro (ids, estado o fecha)")
+
+        pool = await self._get_pool()
+        return await pool.fetchval(
+            _UPDATE_STATUS_BULK, new_status, quote_ids, current_status, created_before, limit
+        )
+
+    async def delete(self, quote_id: int) -> bool:
+        """Eliminar una cotización."""
+        pool = await self._get_pool()
+        deleted_id = await pool.fetchval(_DELETE, quote_id)
+
+        return deleted_id is not None
+
+    async def get_by_phone(self, client_phone: str) -> List[Quote]:
+        """Obtener todas las cotizaciones de un cliente por teléfono."""
+        pool = await self._get_pool()
+        records = await pool.fetch(_GET_BY_PHONE, client_phone)
+
+        return [self._record_to_quote(record) for record in records]
+
+    async def get_latest_by_phone(self, client_phone: str, limit: int = 1) -> List[Quote]:
+        """Obtener las últimas cotizaciones de un teléfono (índice client_phone, created_at)."""
+        pool = await self._get_pool()
+        records = await pool.fetch(_GET_LATEST_BY_PHONE, client_phone, limit)
+
+        return [self._record_to_quote(record) for record in records]
+
+    async def get_latest_by_phones(self, client_phones: List[str], limit: int = 1) -> Dict[str, List[Quote]]:
+        """Obtener las últimas cotizaciones de varios teléfonos en una sola consulta."""
+        if not client_phones:
+            return {}
+
+        pool = await self._get_pool()
+        records = await pool.fetch(_GET_LATEST_BY_PHONES, list(set(client_phones)), limit)
+
+        latest: Dict[str, List[Quote]] = {}
+        for record in records:
+            quote = self._record_to_quote(record)
+            latest.setdefault(quote.client_phone, []).append(quote)
+        return latest
+
+
+def _cursor_position(cursor: Optional[str]) -> tuple:
+    """Decodificar el cursor a los parámetros (created_at, id) de la consulta."""
+    if not cursor:
+        return None, None
+    created_at, row_id = decode_cursor(cursor)
+    try:
+        return _parse_timestamp(created_at), int(row_id)
+    except (TypeError, ValueError):
+        raise ValueError("Cursor de paginación inválido")
+
+
+def _records_next_cursor(records: list, limit: int) -> Optional[str]:
+    """Cursor de la siguiente página (las consultas piden limit + 1 filas)."""
+    if len(records) <= limit:
+        return None
+    last = records[limit - 1]
+    return encode_cursor(last["created_at"].isoformat(), last["id"])
+
+
+def _parse_timestamp(value: str):
+    """Los cursores guardan el timestamp en ISO 8601 (formato PostgREST o Python)."""
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError("Cursor de paginación inválido")
@@ -1,25 +1,25 @@
 from typing import List, Optional, Dict
-from supabase import Client
-from ..config.database import get_supabase_client
+from supabase._async.client import AsyncClient as Client
+from ..config.database import get_async_supabase_client
 from ...domain.entities.business_info import BusinessInfo
 
 class BusinessInfoRepository:
     def __init__(self, client: Optional[Client] = None):
-        self.client = client or get_supabase_client()
+        self.client = client or get_async_supabase_client()
         self.table = "business_info"
 
-    def get_all(self) -> List[BusinessInfo]:
+    async def get_all(self) -> List[BusinessInfo]:
         """Obtener toda la información activa del negocio."""
-        response = self.client.table(self.table)\
+        response = await self.client.table(self.table)\
             .select("*")\
             .eq("is_active", True)\
             .execute()
             
         return [BusinessInfo(**item) for item in response.data]
 
-    def get_by_category(self, category: str) -> List[BusinessInfo]:
+    async def get_by_category(self, category: str) -> List[BusinessInfo]:
         """Obtener información por categoría."""
-        response = self.client.table(self.table)\
+        response = await self.client.table(self.table)\
             .select("*")\
             .eq("category", category)\
             .eq("is_active", True)\
@@ -27,9 +27,9 @@ class BusinessInfoRepository:
             
         return [BusinessInfo(**item) for item in response.data]
 
-    def update(self, key: str, value: str) -> Optional[BusinessInfo]:
+    async def update(self, key: str, value: str) -> Optional[BusinessInfo]:
         """Actualizar un valor por su clave."""
-        response = self.client.table(self.table)\
+        response = await self.client.table(self.table)\
             .update({"value": value, "updated_at": "now()"})\
             .eq("key", key)\
             .execute()
@@ -38,7 +38,7 @@ class BusinessInfoRepository:
             return BusinessInfo(**response.data[0])
         return None
 
-    def update_bulk(self, updates: List[Dict]) -> List[BusinessInfo]:
+    async def update_bulk(self, updates: List[Dict]) -> List[BusinessInfo]:
         """Actualizar múltiples valores."""
         # Supabase upsert or loop updates. Since we only update values, loop might be safer/easier 
         # unless we use upsert with specific columns.
@@ -50,7 +50,7 @@ class BusinessInfoRepository:
             data['updated_at'] = "now()"
             
             if key:
-                response = self.client.table(self.table)\
+                response = await self.client.table(self.table)\
                     .update(data)\
                     .eq("key", key)\
                     .execute()
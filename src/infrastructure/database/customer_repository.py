@@ -1,6 +1,7 @@
-from typing import Optional, Dict, List
-from supabase import Client
+from typing import Optional, Dict, List, Tuple
+from supabase._async.client import AsyncClient as Client
 import logging
+from .pagination import keyset_filter, next_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -11,10 +12,10 @@ class CustomerRepository:
         self.supabase = supabase_client
         self.table = "customers"  # Nombre de la tabla migracion 008
 
-    def get_by_phone(self, phone: str) -> Optional[Dict]:
+    async def get_by_phone(self, phone: str) -> Optional[Dict]:
         """Buscar cliente por teléfono."""
         try:
-            response = self.supabase.table(self.table)\
+            response = await self.supabase.table(self.table)\
                 .select("*")\
                 .eq("phone_number", phone)\
                 .execute()
@@ -26,7 +27,7 @@ class CustomerRepository:
             logger.error(f"Error consultando cliente {phone}: {e}")
             return None
 
-    def create(self, phone: str, name: str = None) -> Optional[Dict]:
+    async def create(self, phone: str, name: str = None) -> Optional[Dict]:
         """Crear nuevo cliente."""
         try:
             # Campos obligatorios
@@ -35,7 +36,7 @@ class CustomerRepository:
                 "full_name": name or "Cliente Desconocido"
             }
             
-            response = self.supabase.table(self.table)\
+            response = await self.supabase.table(self.table)\
                 .insert(data)\
                 .execute()
             
@@ -46,10 +47,10 @@ class CustomerRepository:
             logger.error(f"Error creando cliente {phone}: {e}")
             return None
     
-    def update_name(self, phone: str, name: str) -> Optional[Dict]:
+    async def update_name(self, phone: str, name: str) -> Optional[Dict]:
         """Actualizar nombre si no existe o cambiarlo."""
         try:
-            response = self.supabase.table(self.table)\
+            response = await self.supabase.table(self.table)\
                 .update({"full_name": name})\
                 .eq("phone_number", phone)\
                 .execute()
@@ -58,10 +59,10 @@ class CustomerRepository:
             logger.error(f"Error actualizando nombre cliente {phone}: {e}")
             return None
 
-    def update(self, customer_id: str, data: Dict) -> Optional[Dict]:
+    async def update(self, customer_id: str, data: Dict) -> Optional[Dict]:
         """Actualizar datos del cliente por ID."""
         try:
-            response = self.supabase.table(self.table)\
+            response = await self.supabase.table(self.table)\
                 .update(data)\
                 .eq("id", customer_id)\
                 .execute()
@@ -70,10 +71,10 @@ class CustomerRepository:
             logger.error(f"Error actualizando cliente {customer_id}: {e}")
             return None
 
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[Dict]:
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[Dict]:
         """Obtener lista de clientes paginada."""
         try:
-            response = self.supabase.table(self.table)\
+            response = await self.supabase.table(self.table)\
                 .select("*")\
                 .range(skip, skip + limit - 1)\
                 .order("created_at", desc=True)\
@@ -82,12 +83,38 @@ class CustomerRepository:
         except Exception as e:
             logger.error(f"Error listando clientes: {e}")
             return []
-    def delete(self, customer_id: str) -> bool:
+
+    async def get_page(self, limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Obtener una página de clientes con paginación por cursor (created_at, id).
+        
+        Returns:
+            Tupla (clientes, cursor de la siguiente página o None)
+            
+        Raises:
+            ValueError: Si el cursor es inválido
+            Exception: Errores de Supabase (la exportación no debe cortarse
+                como si hubiera terminado)
+        """
+        builder = self.supabase.table(self.table).select("*")
+        if cursor:
+            builder = builder.or_(keyset_filter(cursor))
+        
+        response = await builder\
+            .order("created_at", desc=True)\
+            .order("id", desc=True)\
+            .limit(limit + 1)\
+            .execute()
+        
+        rows = response.data or []
+        return rows[:limit], next_cursor(rows, limit)
+
+    async def delete(self, customer_id: str) -> bool:
         """Eliminar cliente si no tiene cotizaciones."""
         try:
             # 1. Verificar integridad (Check quotes)
             # Nota: Usamos select count para eficiencia
-            quotes_check = self.supabase.table("quotes")\
+            quotes_check = await self.supabase.table("quotes")\
                 .select("id", count="exact")\
                 .eq("customer_id", customer_id)\
                 .execute()
@@ -97,7 +124,7 @@ class CustomerRepository:
                 raise ValueError("No se puede eliminar el cliente porque tiene cotizaciones registradas.")
             
             # 2. Eliminar
-            response = self.supabase.table(self.table)\
+            response = await self.supabase.table(self.table)\
                 .delete()\
                 .eq("id", customer_id)\
                 .execute()
@@ -109,7 +136,7 @@ class CustomerRepository:
         except Exception as e:
             logger.error(f"Error eliminando cliente {customer_id}: {e}")
             raise e
-    def get_filtered(self, query: Optional[str] = None, quote_status: Optional[str] = None) -> List[Dict]:
+    async def get_filtered(self, query: Optional[str] = None, quote_status: Optional[str] = None) -> List[Dict]:
         """
         Obtener clientes filtrados por nombre/teléfono y/o estado de sus cotizaciones.
         """
@@ -129,7 +156,7 @@ class CustomerRepository:
                 search_filter = f"full_name.ilike.%{query}%,phone_number.ilike.%{query}%"
                 builder = builder.or_(search_filter)
 
-            response = builder.order("full_name").execute()
+            response = await builder.order("full_name").execute()
             
             # Limpiar duplicados si el join trajo varias filas por cliente con múltiples cotizaciones
             unique_customers = {}
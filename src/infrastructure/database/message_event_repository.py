@@ -0,0 +1,54 @@
+from typing import Dict, List, Optional
+from postgrest.types import ReturnMethod
+from supabase._async.client import AsyncClient as Client
+import logging
+from ..config.database import get_async_supabase_client
+
+logger = logging.getLogger(__name__)
+
+FUNNEL_STATUSES = ("accepted", "sent", "delivered", "read", "failed")
+
+
+class MessageEventRepository:
+    """
+    Estados de entrega de mensajes de WhatsApp (migración 013).
+
+    Una fila por (wa_message_id, status); reinsertar un evento repetido
+    no crea duplicados.
+    """
+
+    def __init__(self, supabase_client: Optional[Client] = None):
+        self.supabase = supabase_client or get_async_supabase_client()
+
+    async def insert_many(self, events: List[Dict]) -> int:
+        """Insertar un lote de eventos en una sola petición (ignora repetidos)."""
+        if not events:
+            return 0
+
+        await self.supabase.table("message_events")\
+            .upsert(
+                events,
+                on_conflict="wa_message_id,status",
+                ignore_duplicates=True,
+                returning=ReturnMethod.minimal
+            )\
+            .execute()
+        return len(events)
+
+    async def get_by_message(self, wa_message_id: str) -> List[Dict]:
+        """Historial de estados de un mensaje."""
+        response = await self.supabase.table("message_events")\
+            .select("wa_message_id, status, recipient, broadcast_id, error_code, occurred_at")\
+            .eq("wa_message_id", wa_message_id)\
+            .order("occurred_at")\
+            .execute()
+        return response.data or []
+
+    async def get_broadcast_funnel(self, broadcast_id: str) -> Dict[str, int]:
+        """Mensajes de un broadcast que alcanzaron cada estado (una sola consulta)."""
+        response = await self.supabase.rpc("broadcast_funnel", {"p_broadcast_id": broadcast_id}).execute()
+
+        funnel = {status: 0 for status in FUNNEL_STATUSES}
+        for row in response.data or []:
+            funnel[row["status"]] = row["messages"]
+        return funnel
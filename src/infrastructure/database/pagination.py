@@ -0,0 +1,71 @@
+"""
+Paginación por cursor (keyset) sobre (created_at, id).
+
+Los cursores son opacos para el cliente: codifican la última fila
+entregada y se usan para pedir "las filas anteriores a ésta" sin OFFSET.
+"""
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def encode_cursor(created_at: str, row_id: Any) -> str:
+    """
+    Codificar la posición (created_at, id) de una fila como cursor opaco.
+
+    Args:
+        created_at: Timestamp tal como lo devuelve la base de datos
+        row_id: ID de la fila (int o UUID)
+
+    Returns:
+        Cursor en base64 url-safe
+    """
+    raw = json.dumps([created_at, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Any]:
+    """
+    Decodificar un cursor generado por encode_cursor.
+
+    Raises:
+        ValueError: Si el cursor está malformado
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise ValueError("Cursor de paginación inválido")
+
+    if not isinstance(created_at, str) or not isinstance(row_id, (int, str)):
+        raise ValueError("Cursor de paginación inválido")
+
+    return created_at, row_id
+
+
+def keyset_filter(cursor: str) -> str:
+    """
+    Construir el filtro PostgREST equivalente a (created_at, id) < (c_ts, c_id).
+
+    Se usa con `.or_()` sobre una consulta ordenada por created_at DESC, id DESC.
+    Los valores van entre comillas porque los timestamps contienen '.' y ':'.
+    """
+    created_at, row_id = decode_cursor(cursor)
+    return (
+        f'created_at.lt."{created_at}",'
+        f'and(created_at.eq."{created_at}",id.lt."{row_id}")'
+    )
+
+
+def next_cursor(rows: List[Dict], limit: int) -> Optional[str]:
+    """
+    Calcular el cursor de la siguiente página.
+
+    Las consultas piden limit + 1 filas: si llegó la fila extra hay más páginas
+    y el cursor apunta a la última fila visible.
+    """
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last["created_at"], last["id"])
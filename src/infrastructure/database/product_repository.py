@@ -1,5 +1,5 @@
 from typing import List, Dict, Optional, Union
-from supabase import Client
+from supabase._async.client import AsyncClient as Client
 import logging
 from datetime import datetime
 from ...domain.entities.product import Product
@@ -31,26 +31,26 @@ class ProductRepository:
             data['aliases'] = []
         return data
 
-    def get_all_products(self) -> List[Dict]:
+    async def get_all_products(self) -> List[Dict]:
         """
         Obtener todos los productos como diccionarios (Legacy para QuoteService).
         """
         try:
-            response = self.supabase.table(self.table_name).select("*").execute()
+            response = await self.supabase.table(self.table_name).select("*").execute()
             return response.data
         except Exception as e:
             logger.error(f"Error al obtener productos de Supabase: {e}")
             return []
 
-    def get_all(self) -> List[Product]:
+    async def get_all(self) -> List[Product]:
         """Obtener todos los productos como entidades."""
-        data = self.get_all_products()
+        data = await self.get_all_products()
         return [self._dict_to_product(item) for item in data]
 
-    def get_by_id(self, product_id: str) -> Optional[Product]:
+    async def get_by_id(self, product_id: str) -> Optional[Product]:
         """Obtener producto por ID."""
         try:
-            response = self.supabase.table(self.table_name).select("*").eq("id", product_id).execute()
+            response = await self.supabase.table(self.table_name).select("*").eq("id", product_id).execute()
             if response.data:
                 return self._dict_to_product(response.data[0])
             return None
@@ -58,11 +58,11 @@ class ProductRepository:
             logger.error(f"Error al obtener producto {product_id}: {e}")
             return None
 
-    def create(self, product: Product) -> Optional[Product]:
+    async def create(self, product: Product) -> Optional[Product]:
         """Crear producto."""
         try:
             data = self._product_to_dict(product)
-            response = self.supabase.table(self.table_name).insert(data).execute()
+            response = await self.supabase.table(self.table_name).insert(data).execute()
             if response.data:
                 return self._dict_to_product(response.data[0])
             return None
@@ -70,13 +70,13 @@ class ProductRepository:
             logger.error(f"Error creando producto: {e}")
             raise e
 
-    def update(self, product_id: str, product: Product) -> Optional[Product]:
+    async def update(self, product_id: str, product: Product) -> Optional[Product]:
         """Actualizar producto."""
         try:
             data = self._product_to_dict(product)
             data['updated_at'] = datetime.now().isoformat()
             
-            response = self.supabase.table(self.table_name)\
+            response = await self.supabase.table(self.table_name)\
                 .update(data)\
                 .eq("id", product_id)\
                 .execute()
@@ -88,10 +88,10 @@ class ProductRepository:
             logger.error(f"Error actualizando producto {product_id}: {e}")
             raise e
 
-    def delete(self, product_id: str) -> bool:
+    async def delete(self, product_id: str) -> bool:
         """Eliminar producto."""
         try:
-            response = self.supabase.table(self.table_name).delete().eq("id", product_id).execute()
+            response = await self.supabase.table(self.table_name).delete().eq("id", product_id).execute()
             return len(response.data) > 0
         except Exception as e:
             logger.error(f"Error eliminando producto {product_id}: {e}")
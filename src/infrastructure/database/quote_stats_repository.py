@@ -0,0 +1,71 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+from supabase._async.client import AsyncClient as Client
+import logging
+from ..config.database import get_async_supabase_client
+
+logger = logging.getLogger(__name__)
+
+# Zona con la que la migración 011 agrupa los días
+STATS_TIMEZONE = ZoneInfo("America/Caracas")
+
+
+def stats_since(days: int) -> date:
+    """Primer día de una serie de `days` días que termina hoy (hora de Caracas)."""
+    return datetime.now(STATS_TIMEZONE).date() - timedelta(days=days - 1)
+
+
+class QuoteStatsRepository:
+    """
+    Lectura de los agregados de ventas precalculados (migración 011).
+
+    Las vistas materializadas son pequeñas (una fila por día/estado o por
+    producto/estado), así que cada consulta es acotada sin importar cuántas
+    cotizaciones haya.
+    """
+
+    def __init__(self, supabase_client: Optional[Client] = None):
+        self.supabase = supabase_client or get_async_supabase_client()
+
+    async def get_by_status(self) -> List[Dict]:
+        """Cotizaciones e ingresos por estado (incluye refreshed_at)."""
+        response = await self.supabase.table("quote_stats_status")\
+            .select("status, quotes_count, revenue, refreshed_at")\
+            .execute()
+        return response.data or []
+
+    async def get_daily(self, since: date, status: Optional[str] = None) -> List[Dict]:
+        """Cotizaciones e ingresos por día y estado desde `since`."""
+        query = self.supabase.table("quote_stats_daily")\
+            .select("day, status, quotes_count, revenue")\
+            .gte("day", since.isoformat())
+
+        if status:
+            query = query.eq("status", status)
+
+        response = await query.order("day").execute()
+        return response.data or []
+
+    async def get_top_products(self, limit: int = 10, status: Optional[str] = None) -> List[Dict]:
+        """
+        Productos con más ingresos.
+
+        Sin estado se lee quote_stats_products_total (un registro por
+        producto, migración 014); en ambos casos el orden y el límite se
+        aplican en la base.
+        """
+        if status:
+            query = self.supabase.table("quote_stats_products")\
+                .select("product_name, status, quotes_count, quantity, revenue")\
+                .eq("status", status)
+        else:
+            query = self.supabase.table("quote_stats_products_total")\
+                .select("product_name, quotes_count, quantity, revenue")
+
+        response = await query.order("revenue", desc=True).limit(limit).execute()
+        return response.data or []
+
+    async def refresh(self) -> None:
+        """Refrescar las vistas materializadas (REFRESH ... CONCURRENTLY)."""
+        await self.supabase.rpc("refresh_quote_stats").execute()
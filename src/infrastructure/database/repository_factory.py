@@ -0,0 +1,45 @@
+"""
+Selección del adaptador de persistencia de cotizaciones según configuración.
+"""
+import logging
+from typing import Optional
+from ...domain.repositories.quote_repository import QuoteRepository
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_quote_repository: Optional[QuoteRepository] = None
+
+
+def get_quote_repository() -> QuoteRepository:
+    """
+    Obtener instancia única del repositorio de cotizaciones.
+    
+    `settings.quote_repository_backend` elige la implementación:
+    - "supabase": PostgREST vía supabase-py (por defecto)
+    - "asyncpg": conexión directa a Postgres con pool asyncpg
+    """
+    global _quote_repository
+    
+    if _quote_repository is None:
+        backend = settings.quote_repository_backend.lower()
+        if backend == "asyncpg":
+            from .asyncpg_quote_repository import AsyncpgQuoteRepository
+            _quote_repository = AsyncpgQuoteRepository()
+        elif backend == "supabase":
+            from .supabase_quote_repository import SupabaseQuoteRepository
+            _quote_repository = SupabaseQuoteRepository()
+        else:
+            raise ValueError(f"Backend de cotizaciones desconocido: {settings.quote_repository_backend}")
+        logger.info(f"Repositorio de cotizaciones: {backend}")
+    
+    return _quote_repository
+
+
+async def close_quote_repository():
+    """Liberar las conexiones del repositorio (al apagar la aplicación)."""
+    global _quote_repository
+    
+    if _quote_repository is not None and hasattr(_quote_repository, "close"):
+        await _quote_repository.close()
+    _quote_repository = None
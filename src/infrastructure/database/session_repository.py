@@ -1,6 +1,6 @@
 from typing import List, Dict, Optional
 from datetime import datetime
-from supabase import Client
+from supabase._async.client import AsyncClient as Client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,7 +12,7 @@ class SessionRepository:
         self.supabase = supabase_client
         self.table_name = "active_sessions"
 
-    def get_session(self, client_phone: str) -> Optional[Dict]:
+    async def get_session(self, client_phone: str) -> Optional[Dict]:
         """
         Obtener sesión activa de un cliente.
         
@@ -23,7 +23,7 @@ class SessionRepository:
             Dict de la sesión con 'items' y 'updated_at' o None
         """
         try:
-            response = self.supabase.table(self.table_name)\
+            response = await self.supabase.table(self.table_name)\
                 .select("*")\
                 .eq("client_phone", client_phone)\
                 .execute()
@@ -35,13 +35,13 @@ class SessionRepository:
             logger.error(f"Error al obtener sesión para {client_phone}: {e}")
             return None
 
-    def create_or_update_session(self, client_phone: str, items: Optional[List[Dict]] = None, conversation_step: Optional[str] = None, client_data: Optional[Dict] = None) -> Dict:
+    async def create_or_update_session(self, client_phone: str, items: Optional[List[Dict]] = None, conversation_step: Optional[str] = None, client_data: Optional[Dict] = None) -> Dict:
         """
         Crear o actualizar una sesión.
         """
         try:
             # Primero obtener datos existentes para no sobrescribir con None
-            current_session = self.get_session(client_phone)
+            current_session = await self.get_session(client_phone)
             
             data = {
                 "client_phone": client_phone,
@@ -64,7 +64,7 @@ class SessionRepository:
                 data["client_data"] = current_session.get("client_data", {})
             
             # Upsert (insert or update)
-            response = self.supabase.table(self.table_name)\
+            response = await self.supabase.table(self.table_name)\
                 .upsert(data)\
                 .execute()
                 
@@ -73,7 +73,7 @@ class SessionRepository:
             logger.error(f"Error al guardar sesión para {client_phone}: {e}")
             raise
 
-    def delete_session(self, client_phone: str) -> bool:
+    async def delete_session(self, client_phone: str) -> bool:
         """
         Eliminar sesión (al finalizar compra o expirar).
         
@@ -81,7 +81,7 @@ class SessionRepository:
             client_phone: Número de teléfono
         """
         try:
-            self.supabase.table(self.table_name)\
+            await self.supabase.table(self.table_name)\
                 .delete()\
                 .eq("client_phone", client_phone)\
                 .execute()
@@ -2,12 +2,17 @@
 Adaptador de Supabase para el repositorio de Quote.
 Implementa la interfaz QuoteRepository usando Supabase como backend.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from supabase import create_client, Client
-from ...domain.entities.quote import Quote, QuoteItem, QuoteStatus
+from supabase._async.client import AsyncClient
+from postgrest.types import CountMethod, ReturnMethod
+from ...domain.entities.quote import Quote, QuoteItem, QuoteStatus, QuoteSummary
 from ...domain.repositories.quote_repository import QuoteRepository
-from ..config.settings import settings
+from ..config.database import get_async_supabase_client
+from .pagination import keyset_filter, next_cursor
+
+# Columnas de la proyección resumida (vista de lista del dashboard)
+SUMMARY_COLUMNS = "id, client_phone, client_name, total, status, created_at, customers(full_name)"
 
 
 class SupabaseQuoteRepository(QuoteRepository):
@@ -15,12 +20,9 @@ class SupabaseQuoteRepository(QuoteRepository):
     Implementación del repositorio de cotizaciones usando Supabase.
     """
     
-    def __init__(self):
-        """Inicializar cliente de Supabase."""
-        self.client: Client = create_client(
-            settings.supabase_url,
-            settings.supabase_key
-        )
+    def __init__(self, client: Optional[AsyncClient] = None):
+        """Inicializar con el cliente compartido de Supabase."""
+        self.client: AsyncClient = client or get_async_supabase_client()
         self.table_name = "quotes"
     
     def _dict_to_quote(self, data: dict) -> Quote:
@@ -50,6 +52,22 @@ class SupabaseQuoteRepository(QuoteRepository):
             client_address=data.get("client_address")
         )
     
+    def _dict_to_summary(self, data: dict) -> QuoteSummary:
+        """Convertir fila resumida de Supabase a QuoteSummary (sin items)."""
+        customer_relation = data.get("customers")
+        client_name = data.get("client_name")
+        if customer_relation and isinstance(customer_relation, dict):
+            client_name = customer_relation.get("full_name") or client_name
+        
+        return QuoteSummary(
+            id=data["id"],
+            client_phone=data["client_phone"],
+            client_name=client_name,
+            total=float(data["total"]),
+            status=QuoteStatus(data.get("status", "draft")),
+            created_at=datetime.fromisoformat(data["created_at"].replace("Z", "+00:00")) if data.get("created_at") else None
+        )
+    
     def _quote_to_dict(self, quote: Quote) -> dict:
         """Convertir entidad Quote a diccionario para Supabase."""
         data = {
@@ -78,7 +96,7 @@ class SupabaseQuoteRepository(QuoteRepository):
         """Crear una nueva cotización en Supabase."""
         data = self._quote_to_dict(quote)
         
-        response = self.client.table(self.table_name).insert(data).execute()
+        response = await self.client.table(self.table_name).insert(data).execute()
         
         if not response.data:
             raise Exception("Error al crear la cotización")
@@ -89,7 +107,7 @@ class SupabaseQuoteRepository(QuoteRepository):
         """Obtener una cotización por su ID."""
     async def get_by_id(self, quote_id: int) -> Optional[Quote]:
         """Obtener una cotización por su ID."""
-        response = self.client.table(self.table_name).select("*, customers(full_name)").eq("id", quote_id).execute()
+        response = await self.client.table(self.table_name).select("*, customers(full_name)").eq("id", quote_id).execute()
         
         if not response.data:
             return None
@@ -117,30 +135,152 @@ class SupabaseQuoteRepository(QuoteRepository):
         
         query = query.order("created_at", desc=True).range(skip, skip + limit - 1)
         
-        response = query.execute()
+        response = await query.execute()
+        
+        return [self._dict_to_quote(item) for item in response.data]
+    
+    async def get_latest_by_phone(self, client_phone: str, limit: int = 1) -> List[Quote]:
+        """Obtener las últimas cotizaciones de un teléfono (índice client_phone, created_at)."""
+        response = await (
+            self.client.table(self.table_name)
+            .select("*, customers(full_name)")
+            .eq("client_phone", client_phone)
+            .order("created_at", desc=True)
+            .order("id", desc=True)
+            .limit(limit)
+            .execute()
+        )
         
         return [self._dict_to_quote(item) for item in response.data]
     
+    async def get_latest_by_phones(self, client_phones: List[str], limit: int = 1) -> Dict[str, List[Quote]]:
+        """Obtener las últimas cotizaciones de varios teléfonos con la función latest_quotes_by_phones."""
+        if not client_phones:
+            return {}
+        
+        response = await (
+            self.client.rpc("latest_quotes_by_phones", {"phones": list(set(client_phones)), "per_phone": limit})
+            .select("*, customers(full_name)")
+            .order("created_at", desc=True)
+            .order("id", desc=True)
+            .execute()
+        )
+        
+        latest: Dict[str, List[Quote]] = {}
+        for item in response.data or []:
+            quote = self._dict_to_quote(item)
+            latest.setdefault(quote.client_phone, []).append(quote)
+        return latest
+    
+    async def get_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[Quote], Optional[str]]:
+        """Obtener una página de cotizaciones usando keyset sobre (created_at, id)."""
+        query = self.client.table(self.table_name).select("*, customers(full_name)")
+        
+        if status:
+            query = query.eq("status", status)
+        
+        if cursor:
+            query = query.or_(keyset_filter(cursor))
+        
+        # Pedimos una fila extra para saber si hay más páginas
+        query = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+        
+        response = await query.execute()
+        rows = response.data or []
+        
+        return [self._dict_to_quote(item) for item in rows[:limit]], next_cursor(rows, limit)
+    
+    async def get_summary_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[QuoteSummary], Optional[str]]:
+        """Obtener una página de resúmenes (sin items) usando keyset sobre (created_at, id)."""
+        query = self.client.table(self.table_name).select(SUMMARY_COLUMNS)
+        
+        if status:
+            query = query.eq("status", status)
+        
+        if cursor:
+            query = query.or_(keyset_filter(cursor))
+        
+        query = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+        
+        response = await query.execute()
+        rows = response.data or []
+        
+        return [self._dict_to_summary(item) for item in rows[:limit]], next_cursor(rows, limit)
+    
     async def update(self, quote_id: int, quote: Quote) -> Optional[Quote]:
         """Actualizar una cotización existente."""
         data = self._quote_to_dict(quote)
         
-        response = self.client.table(self.table_name).update(data).eq("id", quote_id).execute()
+        response = await self.client.table(self.table_name).update(data).eq("id", quote_id).execute()
         
         if not response.data:
             return None
         
         return self._dict_to_quote(response.data[0])
     
+    def _apply_status_filters(self, query, quote_ids, current_status, created_before):
+        """Aplicar los filtros de update_status_bulk a una consulta."""
+        if quote_ids:
+            query = query.in_("id", quote_ids)
+        if current_status:
+            query = query.eq("status", current_status)
+        if created_before:
+            query = query.lt("created_at", created_before.isoformat())
+        return query
+    
+    async def update_status_bulk(
+        self,
+        new_status: str,
+        quote_ids: Optional[List[int]] = None,
+        current_status: Optional[str] = None,
+        created_before: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> int:
+        """Cambiar el estado de varias cotizaciones con un solo PATCH."""
+        if not (quote_ids or current_status or created_before):
+            raise ValueError("Se requiere al menos un filtro (ids, estado o fecha)")
+        
+        if limit:
+            # PostgREST no soporta UPDATE ... LIMIT: elegir el lote por ID primero
+            query = self._apply_status_filters(
+                self.client.table(self.table_name).select("id"),
+                quote_ids, current_status, created_before
+            )
+            response = await query.order("created_at").limit(limit).execute()
+            quote_ids = [row["id"] for row in response.data or []]
+            if not quote_ids:
+                return 0
+        
+        # Sin devolver las filas: solo el conteo
+        query = self.client.table(self.table_name).update(
+            {"status": new_status},
+            count=CountMethod.exact,
+            returning=ReturnMethod.minimal
+        )
+        query = self._apply_status_filters(query, quote_ids, current_status, created_before)
+        response = await query.execute()
+        
+        return response.count or 0
+    
     async def delete(self, quote_id: int) -> bool:
         """Eliminar una cotización."""
-        response = self.client.table(self.table_name).delete().eq("id", quote_id).execute()
+        response = await self.client.table(self.table_name).delete().eq("id", quote_id).execute()
         
         return len(response.data) > 0
     
     async def get_by_phone(self, client_phone: str) -> List[Quote]:
         """Obtener todas las cotizaciones de un cliente por teléfono."""
-        response = (
+        response = await (
             self.client.table(self.table_name)
             .select("*, customers(full_name)")
             .eq("client_phone", client_phone)
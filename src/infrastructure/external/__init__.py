@@ -1,5 +1,8 @@
 """Servicios externos."""
 from .whatsapp_service import WhatsAppService
+from .outbound_dispatcher import OutboundDispatcher
 from .retry_queue import RetryQueue, RetryMessage
+from .sqlite_retry_queue import SQLiteRetryQueue
+from .outbox import Outbox
 
-__all__ = ['WhatsAppService', 'RetryQueue', 'RetryMessage']
+__all__ = ['WhatsAppService', 'OutboundDispatcher', 'RetryQueue', 'RetryMessage', 'SQLiteRetryQueue', 'Outbox']
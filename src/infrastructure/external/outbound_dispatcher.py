@@ -0,0 +1,180 @@
+"""
+Despacho asíncrono de mensajes salientes con orden por destinatario.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SendFactory = Callable[[], Awaitable[Any]]
+ErrorCallback = Callable[[str, Exception], Awaitable[None]]
+
+
+class OutboundDispatcher:
+    """
+    Cola de envíos con un pool de workers.
+
+    - Los mensajes a un mismo destinatario salen en el orden en que se
+      encolaron (un solo worker atiende a cada destinatario a la vez).
+    - Destinatarios distintos se envían en paralelo.
+    - `submit` espera si hay `max_queue_size` mensajes pendientes
+      (backpressure) en lugar de acumular memoria sin límite.
+    """
+
+    def __init__(
+        self,
+        workers: int = 8,
+        max_queue_size: int = 1000,
+        on_error: Optional[ErrorCallback] = None
+    ):
+        """
+        Inicializar dispatcher.
+
+        Args:
+            workers: Número de envíos simultáneos
+            max_queue_size: Máximo de mensajes pendientes (encolados + en curso)
+            on_error: Callback async (destinatario, error) para envíos fallidos
+        """
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.on_error = on_error
+
+        self._pending: Dict[str, Deque[Tuple[SendFactory, asyncio.Future, float]]] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._in_flight: Set[str] = set()
+        self._outstanding = 0
+
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._backpressure_waits = 0
+        self._last_wait_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        """Crear los workers (debe llamarse con el event loop corriendo)."""
+        if self.running:
+            return
+        self._ready = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_queue_size)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain: bool = True):
+        """
+        Detener los workers.
+
+        Args:
+            drain: Esperar a que se envíe todo lo pendiente antes de cancelar
+        """
+        if not self.running:
+            return
+        if drain:
+            await self._idle.wait()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, recipient: str, send: SendFactory) -> asyncio.Future:
+        """
+        Encolar un envío.
+
+        Args:
+            recipient: Clave de orden (número de WhatsApp del destinatario)
+            send: Función que crea la corrutina del envío
+
+        Returns:
+            Future con el resultado del envío (o su excepción)
+        """
+        if not self.running:
+            self.start()
+
+        if self._slots.locked():
+            self._backpressure_waits += 1
+        await self._slots.acquire()
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._pending.get(recipient)
+        if queue is None:
+            queue = self._pending[recipient] = deque()
+            # El destinatario entra a la cola de listos solo si nadie lo atiende
+            if recipient not in self._in_flight:
+                self._ready.put_nowait(recipient)
+        queue.append((send, future, time.monotonic()))
+
+        self._submitted += 1
+        self._outstanding += 1
+        self._idle.clear()
+        return future
+
+    def metrics(self) -> Dict:
+        """Profundidad de la cola y contadores para monitoreo."""
+        queued = sum(len(queue) for queue in self._pending.values())
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "max_queue_size": self.max_queue_size,
+            "queue_depth": queued,
+            "in_flight": len(self._in_flight),
+            "recipients_waiting": len(self._pending),
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "backpressure_waits": self._backpressure_waits,
+            "last_queue_wait_ms": round(self._last_wait_ms, 2),
+        }
+
+    async def _worker(self):
+        while True:
+            recipient = await self._ready.get()
+            queue = self._pending.get(recipient)
+            if not queue:
+                continue
+
+            send, future, enqueued_at = queue.popleft()
+            if not queue:
+                del self._pending[recipient]
+            self._in_flight.add(recipient)
+            self._last_wait_ms = (time.monotonic() - enqueued_at) * 1000
+
+            try:
+                result = await send()
+                self._completed += 1
+                if not future.done():
+                    future.set_result(result)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                self._failed += 1
+                logger.error(f"Error enviando mensaje a {recipient}: {e}")
+                if not future.done():
+                    future.set_exception(e)
+                    # Nadie espera este resultado: evitar "exception was never retrieved"
+                    future.add_done_callback(lambda f: f.exception())
+                if self.on_error:
+                    try:
+                        await self.on_error(recipient, e)
+                    except Exception as callback_error:
+                        logger.error(f"Error en callback de fallo de envío: {callback_error}")
+            finally:
+                self._in_flight.discard(recipient)
+                # Siguiente mensaje del mismo destinatario, al final de la cola (equidad)
+                if recipient in self._pending:
+                    self._ready.put_nowait(recipient)
+                self._slots.release()
+                self._outstanding -= 1
+                if self._outstanding == 0:
+                    self._idle.set()
@@ -0,0 +1,348 @@
+"""
+Outbox de mensajes salientes de WhatsApp.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+from datetime import datetime, timedelta
+
+import httpx
+
+from ..config.settings import settings
+from ..services.periodic_job import PeriodicJob
+from .retry_queue import get_retry_queue
+
+logger = logging.getLogger(__name__)
+
+_outbox: Optional["Outbox"] = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    wa_message_id TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, created_at);
+"""
+
+_COLUMNS = ("id", "recipient", "kind", "payload", "status", "wa_message_id", "last_error", "created_at", "updated_at")
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Fallos que vale la pena reintentar: red, 5xx y límites de envío.
+
+    Los demás 4xx (número inválido, plantilla inexistente) fallarían igual.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def _summary(payload: Dict) -> str:
+    """Texto legible del payload para la cola de reintentos y el panel."""
+    kind = payload.get("type", "")
+    if kind == "text":
+        return payload["text"].get("body", "")
+    if kind == "interactive":
+        return payload["interactive"].get("body", {}).get("text", "")
+    if kind == "document":
+        document = payload["document"]
+        return document.get("caption") or document.get("filename") or "[documento]"
+    if kind == "template":
+        return f"[plantilla {payload['template'].get('name')}]"
+    return f"[{kind}]"
+
+
+class Outbox:
+    """
+    Registro de todos los envíos a la Graph API (texto, documentos, botones,
+    plantillas) con su payload completo.
+
+    WhatsAppService registra cada envío antes de hacerlo y su resultado al
+    terminar. Los registros se acumulan en memoria y se escriben en SQLite
+    en una sola transacción por lote (un envío no agrega una escritura), y
+    los cambios de estado de un envío que aún no se escribió se pisan en
+    memoria. Los fallos reintentables pasan a la cola de reintentos con el
+    payload, así que cualquier tipo de mensaje se puede reenviar.
+    """
+
+    def __init__(
+        self,
+        db_file: Optional[str] = None,
+        retry_queue=None,
+        batch_size: int = 200,
+        flush_interval: float = 2.0,
+        retention_days: float = 7
+    ):
+        """
+        Inicializar outbox.
+
+        Args:
+            db_file: Ruta a la base SQLite
+            retry_queue: Cola donde van los envíos fallidos (RetryQueue o SQLiteRetryQueue)
+            batch_size: Registros acumulados que disparan una escritura
+            flush_interval: Segundos entre escrituras periódicas
+            retention_days: Días que se conservan los envíos exitosos
+        """
+        if db_file is None:
+            base_dir = Path(__file__).parent.parent.parent.parent
+            db_file = base_dir / "data" / "outbox.db"
+
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.retry_queue = retry_queue
+        self.batch_size = batch_size
+        self.retention_days = retention_days
+        self.job = PeriodicJob("outbox-flush", self._tick, flush_interval)
+        self._last_purge = 0.0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        # id -> fila completa (aún no escrita) o solo el cambio de estado
+        self._pending: Dict[str, Dict] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self._recorded = 0
+        self._sent = 0
+        self._failed = 0
+        self._queued_for_retry = 0
+        self._written = 0
+        self._flushes = 0
+        self._failed_flushes = 0
+
+    def record(self, payload: Dict) -> str:
+        """
+        Registrar un envío antes de hacerlo.
+
+        Returns:
+            ID del registro (se usa como ID en la cola de reintentos)
+        """
+        entry_id = uuid.uuid4().hex
+        now = datetime.now().timestamp()
+        self._pending[entry_id] = {
+            "id": entry_id,
+            "recipient": payload.get("to", ""),
+            "kind": payload.get("type", ""),
+            "payload": json.dumps(payload, ensure_ascii=False),
+            "status": "pending",
+            "wa_message_id": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self._recorded += 1
+        self._maybe_flush()
+        return entry_id
+
+    def mark_sent(self, entry_id: str, wa_message_id: Optional[str] = None):
+        """Registrar que la Graph API aceptó el envío."""
+        self._sent += 1
+        self._update(entry_id, status="sent", wa_message_id=wa_message_id)
+
+    def mark_failed(self, entry_id: str, payload: Dict, error: Exception):
+        """
+        Registrar un envío fallido; si es reintentable pasa a la cola de reintentos.
+        """
+        self._failed += 1
+        retry = self.retry_queue is not None and is_retryable(error)
+        self._update(entry_id, status="retrying" if retry else "failed", last_error=str(error))
+
+        if retry:
+            self.retry_queue.add_message(
+                message_id=entry_id,
+                to=payload.get("to", ""),
+                message=_summary(payload),
+                error=str(error),
+                payload=payload
+            )
+            self._queued_for_retry += 1
+
+    def _update(self, entry_id: str, **changes):
+        changes["updated_at"] = datetime.now().timestamp()
+        row = self._pending.get(entry_id)
+        if row is None:
+            row = self._pending[entry_id] = {"id": entry_id}
+        row.update(changes)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self._pending) >= self.batch_size and (self._flush_task is None or self._flush_task.done()):
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                # Sin event loop (scripts): se escribe en el próximo flush explícito
+                pass
+
+    async def flush(self) -> int:
+        """Escribir lo acumulado en una sola transacción; retorna los registros escritos."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch = self._pending
+            self._pending = {}
+            try:
+                await asyncio.to_thread(self._write, list(batch.values()))
+            except Exception as e:
+                self._failed_flushes += 1
+                logger.error(f"Error escribiendo {len(batch)} registros del outbox: {e}")
+                for entry_id, row in batch.items():
+                    newer = self._pending.get(entry_id)
+                    self._pending[entry_id] = {**row, **newer} if newer else row
+                return 0
+
+            self._flushes += 1
+            self._written += len(batch)
+            return len(batch)
+
+    def _write(self, rows):
+        inserts = [row for row in rows if "payload" in row]
+        updates = [row for row in rows if "payload" not in row]
+        placeholders = ", ".join("?" * len(_COLUMNS))
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO outbox ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                    [tuple(row[column] for column in _COLUMNS) for row in inserts]
+                )
+                for row in updates:
+                    columns = [column for column in row if column != "id"]
+                    self._conn.execute(
+                        f"UPDATE outbox SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                        [row[column] for column in columns] + [row["id"]]
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    async def _tick(self):
+        """Escritura periódica; una vez por hora además purga los envíos viejos."""
+        written = await self.flush()
+        now = datetime.now().timestamp()
+        if now - self._last_purge >= 3600:
+            self._last_purge = now
+            purged = await asyncio.to_thread(self.purge)
+            if purged:
+                logger.info(f"Outbox: {purged} envíos exitosos antiguos eliminados")
+        return written
+
+    def recover(self, older_than_seconds: float = 60) -> int:
+        """
+        Pasar a la cola de reintentos los envíos que quedaron 'pending'.
+
+        Son registros escritos cuyo resultado nunca llegó (el proceso se
+        detuvo a mitad del envío). Se llama al iniciar la app.
+        """
+        if self.retry_queue is None:
+            return 0
+
+        cutoff = datetime.now().timestamp() - older_than_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, recipient, payload FROM outbox WHERE status = 'pending' AND created_at < ?",
+                (cutoff,)
+            ).fetchall()
+
+        for entry_id, recipient, payload in rows:
+            payload = json.loads(payload)
+            self.retry_queue.add_message(
+                message_id=entry_id,
+                to=recipient,
+                message=_summary(payload),
+                error="Envío interrumpido",
+                payload=payload
+            )
+            self._update(entry_id, status="retrying")
+
+        if rows:
+            logger.warning(f"{len(rows)} envíos interrumpidos del outbox pasados a reintentos")
+        return len(rows)
+
+    def purge(self) -> int:
+        """Borrar envíos exitosos más viejos que `retention_days`."""
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).timestamp()
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM outbox WHERE status = 'sent' AND updated_at < ?", (cutoff,)
+            ).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Registros escritos por estado."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return dict(rows)
+
+    def start(self):
+        """Recuperar envíos interrumpidos e iniciar la escritura periódica."""
+        self.recover()
+        self.job.start()
+
+    async def stop(self):
+        """Detener la escritura periódica, escribir lo pendiente y cerrar la base."""
+        await self.job.stop()
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def metrics(self) -> Dict:
+        return {
+            "buffered": len(self._pending),
+            "recorded": self._recorded,
+            "sent": self._sent,
+            "failed": self._failed,
+            "queued_for_retry": self._queued_for_retry,
+            "written": self._written,
+            "flushes": self._flushes,
+            "failed_flushes": self._failed_flushes,
+        }
+
+
+def get_outbox() -> Optional[Outbox]:
+    """Outbox compartido del proceso (None si está deshabilitado)."""
+    global _outbox
+
+    if not settings.outbox_enabled:
+        return None
+
+    if _outbox is None:
+        _outbox = Outbox(
+            db_file=settings.outbox_file or None,
+            retry_queue=get_retry_queue(),
+            batch_size=settings.outbox_batch_size,
+            flush_interval=settings.outbox_flush_seconds,
+            retention_days=settings.outbox_retention_days
+        )
+
+    return _outbox
+
+
+async def close_outbox():
+    """Escribir lo pendiente al apagar la app."""
+    global _outbox
+
+    outbox = _outbox
+    _outbox = None
+    if outbox is not None:
+        await outbox.stop()
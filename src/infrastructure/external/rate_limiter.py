@@ -0,0 +1,194 @@
+"""
+Límite de envíos hacia la Graph API (token bucket global y por destinatario).
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Códigos de error de Meta por exceso de envíos
+THROUGHPUT_ERROR_CODES = {130429, 80007}
+PAIR_ERROR_CODES = {131056}
+
+
+class TokenBucket:
+    """
+    Token bucket con reservas.
+
+    `reserve` toma un token aunque no haya (el saldo queda negativo) y
+    retorna cuánto esperar: así las esperas salen en orden de llegada sin
+    bucles de reintento.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Tomar un token; retorna los segundos a esperar antes de usarlo."""
+        self._refill()
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def set_rate(self, rate: float):
+        """Cambiar la tasa conservando los tokens acumulados."""
+        self._refill()
+        self.rate = rate
+
+    def idle_for(self) -> float:
+        """Segundos desde la última reserva."""
+        return self.clock() - self.updated
+
+
+class GraphRateLimiter:
+    """
+    Límite de envíos por número de WhatsApp Business y por destinatario.
+
+    - Bucket global: tasa de mensajes por segundo del número emisor.
+    - Bucket por destinatario: ráfaga y tasa sostenida hacia un mismo usuario.
+    - Ante un 429 / 130429 pausa todos los envíos (Retry-After o backoff
+      exponencial) y reduce la tasa global a la mitad; cada envío exitoso
+      la recupera de a poco hasta la configurada.
+    - Ante un 131056 (límite por par) pausa solo a ese destinatario.
+    """
+
+    def __init__(
+        self,
+        rate: float = 80.0,
+        burst: float = 80.0,
+        recipient_rate: float = 1 / 6,
+        recipient_burst: float = 45.0,
+        max_retries: int = 3,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        max_tracked_recipients: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Inicializar limitador.
+
+        Args:
+            rate: Mensajes por segundo del número emisor
+            burst: Ráfaga máxima del número emisor
+            recipient_rate: Mensajes por segundo hacia un mismo destinatario
+            recipient_burst: Ráfaga máxima hacia un mismo destinatario
+            max_retries: Reintentos tras una respuesta de límite excedido
+            base_backoff: Espera inicial sin Retry-After (se duplica por intento)
+            max_backoff: Espera máxima
+            max_tracked_recipients: Destinatarios en memoria antes de purgar inactivos
+            clock: Reloj monótono (inyectable en tests)
+        """
+        self.rate = rate
+        self.recipient_rate = recipient_rate
+        self.recipient_burst = recipient_burst
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_tracked_recipients = max_tracked_recipients
+        self.clock = clock
+
+        self._global = TokenBucket(rate, burst, clock)
+        self._recipients: Dict[str, TokenBucket] = {}
+        self._paused_until = 0.0
+        self._recipient_paused_until: Dict[str, float] = {}
+
+        self._throttled = 0
+        self._throttle_seconds = 0.0
+        self._rate_limited = 0
+        self._pair_rate_limited = 0
+
+    async def acquire(self, recipient: Optional[str] = None):
+        """Esperar turno para un envío (sin destinatario solo aplica el límite global)."""
+        now = self.clock()
+        delay = max(self._global.reserve(), self._paused_until - now)
+
+        if recipient:
+            delay = max(
+                delay,
+                self._recipient_bucket(recipient).reserve(),
+                self._recipient_paused_until.get(recipient, 0.0) - now
+            )
+
+        if delay > 0:
+            self._throttled += 1
+            self._throttle_seconds += delay
+            await asyncio.sleep(delay)
+
+    def on_rate_limited(
+        self,
+        recipient: Optional[str] = None,
+        retry_after: Optional[float] = None,
+        pair: bool = False,
+        attempt: int = 0
+    ) -> float:
+        """
+        Registrar una respuesta de límite excedido.
+
+        Returns:
+            Segundos de pausa aplicados (el próximo acquire los respeta)
+        """
+        if retry_after is None:
+            delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+        else:
+            delay = min(self.max_backoff, retry_after)
+        until = self.clock() + delay
+
+        if pair and recipient:
+            self._pair_rate_limited += 1
+            self._recipient_paused_until[recipient] = until
+        else:
+            self._rate_limited += 1
+            self._paused_until = max(self._paused_until, until)
+            self._global.set_rate(max(self.rate / 16, self._global.rate / 2))
+
+        return delay
+
+    def on_success(self):
+        """Recuperar la tasa global tras un envío exitoso (aumento aditivo)."""
+        if self._global.rate < self.rate:
+            self._global.set_rate(min(self.rate, self._global.rate + self.rate / 20))
+
+    def metrics(self) -> Dict:
+        """Contadores de throttling para dimensionar difusiones."""
+        return {
+            "rate": self.rate,
+            "current_rate": round(self._global.rate, 2),
+            "recipient_rate": self.recipient_rate,
+            "throttled": self._throttled,
+            "throttle_wait_seconds": round(self._throttle_seconds, 3),
+            "rate_limited": self._rate_limited,
+            "pair_rate_limited": self._pair_rate_limited,
+            "paused_for": round(max(0.0, self._paused_until - self.clock()), 3),
+            "tracked_recipients": len(self._recipients),
+        }
+
+    def _recipient_bucket(self, recipient: str) -> TokenBucket:
+        bucket = self._recipients.get(recipient)
+        if bucket is None:
+            if len(self._recipients) >= self.max_tracked_recipients:
+                self._prune()
+            bucket = self._recipients[recipient] = TokenBucket(
+                self.recipient_rate, self.recipient_burst, self.clock
+            )
+        return bucket
+
+    def _prune(self):
+        """Descartar buckets que ya se rellenaron (equivalen a uno nuevo)."""
+        full_after = self.recipient_burst / self.recipient_rate
+        now = self.clock()
+        for recipient, bucket in list(self._recipients.items()):
+            if bucket.idle_for() >= full_after and self._recipient_paused_until.get(recipient, 0.0) <= now:
+                del self._recipients[recipient]
+                self._recipient_paused_until.pop(recipient, None)
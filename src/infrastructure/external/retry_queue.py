@@ -2,15 +2,36 @@
 Cola de reintentos para mensajes fallidos (Retry Pattern).
 """
 import json
+import random
 import logging
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+_retry_queue = None
+
+# Backoff: espera aleatoria entre 0 y min(tope, base * 2^intentos) ("full jitter")
+BACKOFF_BASE_SECONDS = 60
+BACKOFF_CAP_SECONDS = 3600
+
+
+def full_jitter_backoff(attempts: int, rng: Callable[[], float] = random.random) -> timedelta:
+    """
+    Espera antes del próximo reintento.
+
+    El techo crece como el backoff exponencial de siempre (2, 4, 8, 16... min,
+    hasta una hora), pero la espera se elige al azar por debajo de él: los
+    mensajes que fallaron juntos (caída de la Graph API) no reintentan todos
+    en el mismo segundo.
+    """
+    ceiling = min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempts)
+    return timedelta(seconds=rng() * ceiling)
+
 
 @dataclass
 class RetryMessage:
@@ -25,21 +46,26 @@ class RetryMessage:
     next_retry: str  # ISO format
     created_at: str
     last_error: Optional[str] = None
+    dead_at: Optional[str] = None  # ISO format, al pasar a dead letters
+    payload: Optional[Dict] = None  # Payload completo de la Graph API (outbox)
 
 
 class RetryQueue:
     """
     Cola de reintentos para mensajes fallidos.
     
-    Implementa el patrón Retry con backoff exponencial.
+    Implementa el patrón Retry con backoff exponencial con jitter. Los
+    mensajes que agotan sus intentos pasan a un archivo aparte de dead
+    letters (`<cola>_dead.json`) y dejan de recorrerse en cada consulta.
     """
     
-    def __init__(self, queue_file: Optional[str] = None):
+    def __init__(self, queue_file: Optional[str] = None, rng: Callable[[], float] = random.random):
         """
         Inicializar cola de reintentos.
         
         Args:
             queue_file: Ruta al archivo de cola (JSON)
+            rng: Generador del jitter en [0, 1) (inyectable en tests)
         """
         if queue_file is None:
             base_dir = Path(__file__).parent.parent.parent.parent
@@ -47,26 +73,39 @@ class RetryQueue:
         
         self.queue_file = Path(queue_file)
         self.queue_file.parent.mkdir(parents=True, exist_ok=True)
+        self.dead_letter_file = self.queue_file.with_name(f"{self.queue_file.stem}_dead.json")
+        self.rng = rng
+        # Aviso de cada next_retry nuevo (lo usa RetryScheduler)
+        self.on_scheduled: Optional[Callable[[datetime], None]] = None
+        # Cada operación lee y reescribe los archivos completos; compact()
+        # corre en un hilo mientras el event loop sigue agregando mensajes
+        self._lock = threading.RLock()
         
         # Crear archivo si no existe
         if not self.queue_file.exists():
             self._save_queue([])
     
-    def _load_queue(self) -> List[RetryMessage]:
+    def _load_queue(self, queue_file: Optional[Path] = None) -> List[RetryMessage]:
         """Cargar cola desde archivo."""
         try:
-            with open(self.queue_file, 'r', encoding='utf-8') as f:
+            with open(queue_file or self.queue_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
                 return [RetryMessage(**item) for item in data]
         except (json.JSONDecodeError, FileNotFoundError):
             return []
     
-    def _save_queue(self, queue: List[RetryMessage]):
+    def _save_queue(self, queue: List[RetryMessage], queue_file: Optional[Path] = None):
         """Guardar cola en archivo."""
-        with open(self.queue_file, 'w', encoding='utf-8') as f:
+        with open(queue_file or self.queue_file, 'w', encoding='utf-8') as f:
             data = [asdict(msg) for msg in queue]
             json.dump(data, f, indent=2, ensure_ascii=False)
     
+    def _load_dead_letters(self) -> List[RetryMessage]:
+        return self._load_queue(self.dead_letter_file)
+    
+    def _save_dead_letters(self, dead_letters: List[RetryMessage]):
+        self._save_queue(dead_letters, self.dead_letter_file)
+    
     def add_message(
         self,
         message_id: str,
@@ -74,7 +113,8 @@ class RetryQueue:
         message: str,
         quote_data: Optional[Dict] = None,
         max_attempts: int = 5,
-        error: Optional[str] = None
+        error: Optional[str] = None,
+        payload: Optional[Dict] = None
     ):
         """
         Agregar mensaje a la cola de reintentos.
@@ -86,34 +126,39 @@ class RetryQueue:
             quote_data: Datos de cotización (opcional)
             max_attempts: Máximo número de reintentos
             error: Error que causó el fallo
+            payload: Payload completo de la Graph API (documentos, botones,
+                plantillas); si está, el reintento lo reenvía tal cual
         """
-        queue = self._load_queue()
-        
-        # Verificar si ya existe
-        existing = next((m for m in queue if m.id == message_id), None)
-        if existing:
-            logger.warning(f"Mensaje {message_id} ya está en cola")
-            return
-        
-        # Calcular próximo reintento (1 minuto)
-        next_retry = datetime.now() + timedelta(minutes=1)
-        
-        retry_msg = RetryMessage(
-            id=message_id,
-            to=to,
-            message=message,
-            quote_data=quote_data,
-            attempts=0,
-            max_attempts=max_attempts,
-            next_retry=next_retry.isoformat(),
-            created_at=datetime.now().isoformat(),
-            last_error=error
-        )
-        
-        queue.append(retry_msg)
-        self._save_queue(queue)
-        
-        logger.info(f"Mensaje {message_id} agregado a cola de reintentos")
+        with self._lock:
+            queue = self._load_queue()
+
+            # Verificar si ya existe
+            existing = next((m for m in queue if m.id == message_id), None)
+            if existing:
+                logger.warning(f"Mensaje {message_id} ya está en cola")
+                return
+
+            # Calcular próximo reintento (1 minuto)
+            next_retry = datetime.now() + timedelta(minutes=1)
+
+            retry_msg = RetryMessage(
+                id=message_id,
+                to=to,
+                message=message,
+                quote_data=quote_data,
+                attempts=0,
+                max_attempts=max_attempts,
+                next_retry=next_retry.isoformat(),
+                created_at=datetime.now().isoformat(),
+                last_error=error,
+                payload=payload
+            )
+
+            queue.append(retry_msg)
+            self._save_queue(queue)
+            self._notify(next_retry)
+
+            logger.info(f"Mensaje {message_id} agregado a cola de reintentos")
     
     def get_messages_to_retry(self) -> List[RetryMessage]:
         """
@@ -122,16 +167,41 @@ class RetryQueue:
         Returns:
             Lista de mensajes cuyo next_retry ya pasó
         """
-        queue = self._load_queue()
-        now = datetime.now()
-        
-        messages_to_retry = []
-        for msg in queue:
-            next_retry = datetime.fromisoformat(msg.next_retry)
-            if now >= next_retry and msg.attempts < msg.max_attempts:
-                messages_to_retry.append(msg)
-        
-        return messages_to_retry
+        with self._lock:
+            queue = self._load_queue()
+            now = datetime.now()
+
+            messages_to_retry = []
+            for msg in queue:
+                next_retry = datetime.fromisoformat(msg.next_retry)
+                if now >= next_retry and msg.attempts < msg.max_attempts:
+                    messages_to_retry.append(msg)
+
+            return messages_to_retry
+    
+    def claim_messages_to_retry(self, limit: int = 100, lease_seconds: float = 60) -> List[RetryMessage]:
+        """
+        Tomar mensajes vencidos corriendo su next_retry `lease_seconds`.
+
+        Evita que una segunda pasada los reintente mientras siguen en curso.
+        (Atómico solo dentro del proceso; SQLiteRetryQueue lo es entre procesos.)
+        """
+        with self._lock:
+            queue = self._load_queue()
+            now = datetime.now()
+            lease_until = (now + timedelta(seconds=lease_seconds)).isoformat()
+
+            due = sorted(
+                (msg for msg in queue if msg.attempts < msg.max_attempts and datetime.fromisoformat(msg.next_retry) <= now),
+                key=lambda msg: msg.next_retry
+            )[:limit]
+            claimed = [RetryMessage(**asdict(msg)) for msg in due]
+            for msg in due:
+                msg.next_retry = lease_until
+
+            if due:
+                self._save_queue(queue)
+            return claimed
     
     def update_message_attempt(
         self,
@@ -147,61 +217,196 @@ class RetryQueue:
             success: Si el intento fue exitoso
             error: Error si falló
         """
-        queue = self._load_queue()
+        self.record_attempts([(message_id, success, error)])
+    
+    def record_attempts(self, outcomes: List[Tuple[str, bool, Optional[str]]]):
+        """
+        Registrar el resultado de varios intentos con una sola escritura.
         
-        for i, msg in enumerate(queue):
-            if msg.id == message_id:
+        Args:
+            outcomes: (message_id, success, error) por mensaje reintentado
+        """
+        with self._lock:
+            queue = self._load_queue()
+            by_id = {msg.id: msg for msg in queue}
+            sent = set()
+            dead = []
+            changed = False
+
+            for message_id, success, error in outcomes:
+                msg = by_id.get(message_id)
+                if msg is None:
+                    continue
+                changed = True
+
                 if success:
                     # Remover de la cola
-                    queue.pop(i)
+                    sent.add(message_id)
                     logger.info(f"Mensaje {message_id} enviado exitosamente, removido de cola")
-                else:
-                    # Incrementar intentos y calcular próximo reintento
-                    msg.attempts += 1
-                    msg.last_error = error
-                    
-                    # Backoff exponencial: 1min, 2min, 4min, 8min, 16min
-                    backoff_minutes = 2 ** msg.attempts
-                    next_retry = datetime.now() + timedelta(minutes=backoff_minutes)
-                    msg.next_retry = next_retry.isoformat()
-                    
-                    queue[i] = msg
-                    
-                    if msg.attempts >= msg.max_attempts:
-                        logger.error(
-                            f"Mensaje {message_id} alcanzó máximo de intentos ({msg.max_attempts})"
-                        )
-                    else:
-                        logger.warning(
-                            f"Mensaje {message_id} falló (intento {msg.attempts}/{msg.max_attempts}), "
-                            f"próximo reintento en {backoff_minutes} minutos"
-                        )
-                
-                self._save_queue(queue)
-                break
+                    continue
+
+                # Incrementar intentos y calcular próximo reintento
+                msg.attempts += 1
+                msg.last_error = error
+
+                if msg.attempts >= msg.max_attempts:
+                    msg.dead_at = datetime.now().isoformat()
+                    dead.append(msg)
+                    logger.error(
+                        f"Mensaje {message_id} alcanzó máximo de intentos ({msg.max_attempts}), "
+                        f"movido a dead letters"
+                    )
+                    continue
+
+                backoff = full_jitter_backoff(msg.attempts, self.rng)
+                next_retry = datetime.now() + backoff
+                msg.next_retry = next_retry.isoformat()
+                self._notify(next_retry)
+                logger.warning(
+                    f"Mensaje {message_id} falló (intento {msg.attempts}/{msg.max_attempts}), "
+                    f"próximo reintento en {backoff.total_seconds():.0f} s"
+                )
+
+            if dead:
+                self._save_dead_letters(self._load_dead_letters() + dead)
+            if changed:
+                removed = sent | {msg.id for msg in dead}
+                self._save_queue([msg for msg in queue if msg.id not in removed])
+    
+    def next_retry_at(self) -> Optional[datetime]:
+        """Próximo next_retry de los mensajes con intentos pendientes."""
+        with self._lock:
+            pending = [
+                datetime.fromisoformat(msg.next_retry)
+                for msg in self._load_queue()
+                if msg.attempts < msg.max_attempts
+            ]
+            return min(pending) if pending else None
     
-    def get_failed_messages(self) -> List[RetryMessage]:
+    def _notify(self, next_retry: datetime):
+        if self.on_scheduled is not None:
+            self.on_scheduled(next_retry)
+    
+    def get_failed_messages(self, limit: Optional[int] = None) -> List[RetryMessage]:
         """
-        Obtener mensajes que alcanzaron el máximo de intentos.
+        Obtener mensajes que alcanzaron el máximo de intentos (dead letters).
+        
+        Args:
+            limit: Máximo de mensajes, los más recientes primero
         
         Returns:
             Lista de mensajes fallidos
         """
-        queue = self._load_queue()
-        return [msg for msg in queue if msg.attempts >= msg.max_attempts]
+        with self._lock:
+            dead_letters = self._load_dead_letters()[::-1]
+            return dead_letters[:limit] if limit is not None else dead_letters
     
     def remove_message(self, message_id: str):
-        """Remover mensaje de la cola."""
-        queue = self._load_queue()
-        queue = [msg for msg in queue if msg.id != message_id]
-        self._save_queue(queue)
-        logger.info(f"Mensaje {message_id} removido de cola")
+        """Remover mensaje de la cola (o de dead letters)."""
+        with self._lock:
+            queue = self._load_queue()
+            queue = [msg for msg in queue if msg.id != message_id]
+            self._save_queue(queue)
+            if self.dead_letter_file.exists():
+                self._save_dead_letters([msg for msg in self._load_dead_letters() if msg.id != message_id])
+            logger.info(f"Mensaje {message_id} removido de cola")
     
     def get_queue_size(self) -> int:
-        """Obtener tamaño de la cola."""
-        return len(self._load_queue())
+        """Obtener tamaño de la cola (sin dead letters)."""
+        with self._lock:
+            return len(self._load_queue())
+    
+    def stats(self) -> Dict:
+        """Contadores de la cola en una sola lectura de cada archivo."""
+        with self._lock:
+            now = datetime.now()
+            queue_size = due = 0
+            next_retry = None
+            for msg in self._load_queue():
+                queue_size += 1
+                if msg.attempts >= msg.max_attempts:
+                    continue
+                retry_at = datetime.fromisoformat(msg.next_retry)
+                if retry_at <= now:
+                    due += 1
+                if next_retry is None or retry_at < next_retry:
+                    next_retry = retry_at
+
+            return {
+                "queue_size": queue_size,
+                "pending_retry": due,
+                "scheduled": queue_size - due,
+                "dead_letters": len(self._load_dead_letters()),
+                "next_retry": next_retry.isoformat() if next_retry else None,
+            }
+    
+    def compact(self, retention_days: float = 30) -> Dict:
+        """
+        Mover a dead letters los mensajes agotados que quedaron en la cola
+        (colas anteriores a este cambio) y borrar dead letters más viejos que
+        `retention_days`.
+        
+        Returns:
+            Mensajes movidos y borrados
+        """
+        with self._lock:
+            queue = self._load_queue()
+            exhausted = [msg for msg in queue if msg.attempts >= msg.max_attempts]
+            now = datetime.now()
+            for msg in exhausted:
+                msg.dead_at = msg.dead_at or now.isoformat()
+
+            dead_letters = self._load_dead_letters() + exhausted
+            cutoff = now - timedelta(days=retention_days)
+            kept = [msg for msg in dead_letters if datetime.fromisoformat(msg.dead_at or msg.created_at) > cutoff]
+
+            if exhausted:
+                self._save_queue([msg for msg in queue if msg.attempts < msg.max_attempts])
+            if exhausted or len(kept) != len(dead_letters):
+                self._save_dead_letters(kept)
+
+            return {"moved_to_dead_letters": len(exhausted), "purged": len(dead_letters) - len(kept)}
     
     def clear_queue(self):
-        """Limpiar toda la cola."""
-        self._save_queue([])
-        logger.info("Cola de reintentos limpiada")
+        """Limpiar toda la cola (incluye dead letters)."""
+        with self._lock:
+            self._save_queue([])
+            if self.dead_letter_file.exists():
+                self._save_dead_letters([])
+            logger.info("Cola de reintentos limpiada")
+
+
+def get_retry_queue():
+    """
+    Cola de reintentos compartida del proceso.
+
+    Con retry_queue_backend="sqlite" (por defecto) usa SQLiteRetryQueue e
+    importa la primera vez la cola JSON anterior; con "json" usa RetryQueue.
+    """
+    global _retry_queue
+
+    if _retry_queue is None:
+        from ..config.settings import settings
+        base_dir = Path(__file__).parent.parent.parent.parent
+        json_file = base_dir / "data" / "retry_queue.json"
+
+        if settings.retry_queue_backend == "json":
+            _retry_queue = RetryQueue(queue_file=settings.retry_queue_file or json_file)
+        else:
+            from .sqlite_retry_queue import SQLiteRetryQueue
+            _retry_queue = SQLiteRetryQueue(
+                db_file=settings.retry_queue_file or None,
+                import_json=json_file
+            )
+
+    return _retry_queue
+
+
+def close_retry_queue():
+    """Cerrar la base de la cola al apagar la app."""
+    global _retry_queue
+
+    queue = _retry_queue
+    _retry_queue = None
+    if queue is not None and hasattr(queue, "close"):
+        queue.close()
@@ -0,0 +1,485 @@
+"""
+Cola de reintentos sobre SQLite (WAL).
+"""
+import json
+import random
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from .retry_queue import RetryMessage, full_jitter_backoff
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS retry_messages (
+    id TEXT PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    message TEXT NOT NULL,
+    quote_data TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    next_retry REAL NOT NULL,
+    created_at TEXT NOT NULL,
+    last_error TEXT,
+    payload TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_retry_messages_next_retry
+    ON retry_messages (next_retry) WHERE attempts < max_attempts;
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id TEXT PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    message TEXT NOT NULL,
+    quote_data TEXT,
+    attempts INTEGER NOT NULL,
+    max_attempts INTEGER NOT NULL,
+    next_retry REAL NOT NULL,
+    created_at TEXT NOT NULL,
+    last_error TEXT,
+    payload TEXT,
+    dead_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dead_letters_dead_at ON dead_letters (dead_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_JSON_IMPORTED = "json_imported_at"
+
+_COLUMNS = "id, recipient, message, quote_data, attempts, max_attempts, next_retry, created_at, last_error, payload"
+
+
+class SQLiteRetryQueue:
+    """
+    Cola de reintentos con la misma interfaz que RetryQueue, guardada en SQLite.
+
+    Cada operación toca solo las filas afectadas (no se reescribe la cola
+    completa) y los mensajes vencidos se buscan por el índice de
+    `next_retry`. El modo WAL permite leer mientras otro proceso escribe, y
+    `claim_messages_to_retry` toma los mensajes en una sola transacción para
+    que dos workers nunca reintenten el mismo. Los mensajes agotados pasan a
+    la tabla dead_letters.
+    """
+
+    def __init__(
+        self,
+        db_file: Optional[str] = None,
+        import_json: Optional[str] = None,
+        rng: Callable[[], float] = random.random
+    ):
+        """
+        Inicializar cola de reintentos.
+
+        Args:
+            db_file: Ruta a la base SQLite
+            import_json: Cola JSON anterior; se importa una sola vez (queda
+                marcado en la tabla meta) y solo si la base está vacía
+            rng: Generador del jitter en [0, 1) (inyectable en tests)
+        """
+        if db_file is None:
+            base_dir = Path(__file__).parent.parent.parent.parent
+            db_file = base_dir / "data" / "retry_queue.db"
+
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.rng = rng
+        # Aviso de cada next_retry nuevo (lo usa RetryScheduler)
+        self.on_scheduled: Optional[Callable[[datetime], None]] = None
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+
+        if import_json:
+            self._import_json(Path(import_json))
+
+    def add_message(
+        self,
+        message_id: str,
+        to: str,
+        message: str,
+        quote_data: Optional[Dict] = None,
+        max_attempts: int = 5,
+        error: Optional[str] = None,
+        payload: Optional[Dict] = None
+    ):
+        """
+        Agregar mensaje a la cola de reintentos.
+
+        Args:
+            message_id: ID único del mensaje
+            to: Número de teléfono destino
+            message: Texto del mensaje
+            quote_data: Datos de cotización (opcional)
+            max_attempts: Máximo número de reintentos
+            error: Error que causó el fallo
+            payload: Payload completo de la Graph API (documentos, botones,
+                plantillas); si está, el reintento lo reenvía tal cual
+        """
+        now = datetime.now()
+        next_retry = now + timedelta(minutes=1)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"INSERT OR IGNORE INTO retry_messages ({_COLUMNS}) VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, ?)",
+                (
+                    message_id,
+                    to,
+                    message,
+                    _dumps(quote_data),
+                    max_attempts,
+                    next_retry.timestamp(),
+                    now.isoformat(),
+                    error,
+                    _dumps(payload)
+                )
+            )
+
+        if cursor.rowcount == 0:
+            logger.warning(f"Mensaje {message_id} ya está en cola")
+            return
+        self._notify(next_retry)
+        logger.info(f"Mensaje {message_id} agregado a cola de reintentos")
+
+    def get_messages_to_retry(self) -> List[RetryMessage]:
+        """
+        Obtener mensajes listos para reintentar.
+
+        Returns:
+            Lista de mensajes cuyo next_retry ya pasó
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM retry_messages "
+                "WHERE attempts < max_attempts AND next_retry <= ? ORDER BY next_retry",
+                (datetime.now().timestamp(),)
+            ).fetchall()
+        return [_row_to_message(row) for row in rows]
+
+    def claim_messages_to_retry(self, limit: int = 100, lease_seconds: float = 60) -> List[RetryMessage]:
+        """
+        Tomar mensajes vencidos de forma atómica.
+
+        Los mensajes tomados corren su `next_retry` `lease_seconds` hacia
+        adelante: otro worker no los vuelve a tomar mientras se reintentan, y
+        si el proceso muere a mitad del reintento vuelven a estar disponibles.
+
+        Args:
+            limit: Máximo de mensajes a tomar
+            lease_seconds: Reserva de los mensajes tomados
+
+        Returns:
+            Mensajes tomados, del más atrasado al más reciente
+        """
+        now = datetime.now().timestamp()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    f"SELECT {_COLUMNS} FROM retry_messages "
+                    "WHERE attempts < max_attempts AND next_retry <= ? ORDER BY next_retry LIMIT ?",
+                    (now, limit)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE retry_messages SET next_retry = ? WHERE id = ?",
+                    [(now + lease_seconds, row["id"]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [_row_to_message(row) for row in rows]
+
+    def update_message_attempt(
+        self,
+        message_id: str,
+        success: bool,
+        error: Optional[str] = None
+    ):
+        """
+        Actualizar intento de mensaje.
+
+        Args:
+            message_id: ID del mensaje
+            success: Si el intento fue exitoso
+            error: Error si falló
+        """
+        self.record_attempts([(message_id, success, error)])
+
+    def record_attempts(self, outcomes: List[Tuple[str, bool, Optional[str]]]):
+        """
+        Registrar el resultado de varios intentos en una sola transacción.
+
+        Args:
+            outcomes: (message_id, success, error) por mensaje reintentado
+        """
+        sent = [message_id for message_id, success, _ in outcomes if success]
+        errors = {message_id: error for message_id, success, error in outcomes if not success}
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                removed = []
+                for message_id in sent:
+                    if self._conn.execute("DELETE FROM retry_messages WHERE id = ?", (message_id,)).rowcount:
+                        removed.append(message_id)
+
+                rows = []
+                if errors:
+                    placeholders = ", ".join("?" * len(errors))
+                    rows = self._conn.execute(
+                        f"SELECT id, attempts, max_attempts FROM retry_messages WHERE id IN ({placeholders})",
+                        list(errors)
+                    ).fetchall()
+
+                now = datetime.now()
+                updates = []
+                for row in rows:
+                    attempts = row["attempts"] + 1
+                    backoff = full_jitter_backoff(attempts, self.rng)
+                    updates.append((row["id"], attempts, row["max_attempts"], backoff, now + backoff))
+
+                self._conn.executemany(
+                    "UPDATE retry_messages SET attempts = ?, last_error = ?, next_retry = ? WHERE id = ?",
+                    [(attempts, errors[message_id], next_retry.timestamp(), message_id)
+                     for message_id, attempts, _, _, next_retry in updates]
+                )
+                dead = [message_id for message_id, attempts, max_attempts, _, _ in updates if attempts >= max_attempts]
+                self._move_to_dead_letters(dead, now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        for message_id in removed:
+            logger.info(f"Mensaje {message_id} enviado exitosamente, removido de cola")
+        for message_id, attempts, max_attempts, backoff, next_retry in updates:
+            if attempts >= max_attempts:
+                logger.error(
+                    f"Mensaje {message_id} alcanzó máximo de intentos ({max_attempts}), "
+                    f"movido a dead letters"
+                )
+            else:
+                self._notify(next_retry)
+                logger.warning(
+                    f"Mensaje {message_id} falló (intento {attempts}/{max_attempts}), "
+                    f"próximo reintento en {backoff.total_seconds():.0f} s"
+                )
+
+    def _move_to_dead_letters(self, message_ids: List[str], now: datetime):
+        """Pasar mensajes a dead_letters (dentro de una transacción abierta)."""
+        if not message_ids:
+            return
+        placeholders = ", ".join("?" * len(message_ids))
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO dead_letters ({_COLUMNS}, dead_at) "
+            f"SELECT {_COLUMNS}, ? FROM retry_messages WHERE id IN ({placeholders})",
+            [now.timestamp(), *message_ids]
+        )
+        self._conn.execute(f"DELETE FROM retry_messages WHERE id IN ({placeholders})", message_ids)
+
+    def next_retry_at(self) -> Optional[datetime]:
+        """Próximo next_retry de los mensajes con intentos pendientes (usa el índice)."""
+        with self._lock:
+            next_ts = self._conn.execute(
+                "SELECT MIN(next_retry) FROM retry_messages WHERE attempts < max_attempts"
+            ).fetchone()[0]
+        return datetime.fromtimestamp(next_ts) if next_ts is not None else None
+
+    def _notify(self, next_retry: datetime):
+        if self.on_scheduled is not None:
+            self.on_scheduled(next_retry)
+
+    def get_failed_messages(self, limit: Optional[int] = None) -> List[RetryMessage]:
+        """
+        Obtener mensajes que alcanzaron el máximo de intentos (dead letters).
+
+        Args:
+            limit: Máximo de mensajes, los más recientes primero
+
+        Returns:
+            Lista de mensajes fallidos
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS}, dead_at FROM dead_letters ORDER BY dead_at DESC LIMIT ?",
+                (limit if limit is not None else -1,)
+            ).fetchall()
+        return [_row_to_message(row) for row in rows]
+
+    def remove_message(self, message_id: str):
+        """Remover mensaje de la cola (o de dead letters)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM retry_messages WHERE id = ?", (message_id,))
+            self._conn.execute("DELETE FROM dead_letters WHERE id = ?", (message_id,))
+        logger.info(f"Mensaje {message_id} removido de cola")
+
+    def get_queue_size(self) -> int:
+        """Obtener tamaño de la cola (sin dead letters)."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM retry_messages").fetchone()[0]
+
+    def stats(self) -> Dict:
+        """Contadores de la cola en una sola consulta."""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT
+                    COUNT(*) AS queue_size,
+                    COALESCE(SUM(attempts < max_attempts AND next_retry <= ?), 0) AS pending_retry,
+                    MIN(CASE WHEN attempts < max_attempts THEN next_retry END) AS next_retry,
+                    (SELECT COUNT(*) FROM dead_letters) AS dead_letters
+                FROM retry_messages
+                """,
+                (datetime.now().timestamp(),)
+            ).fetchone()
+        return {
+            "queue_size": row["queue_size"],
+            "pending_retry": row["pending_retry"],
+            "scheduled": row["queue_size"] - row["pending_retry"],
+            "dead_letters": row["dead_letters"],
+            "next_retry": datetime.fromtimestamp(row["next_retry"]).isoformat() if row["next_retry"] else None,
+        }
+
+    def compact(self, retention_days: float = 30) -> Dict:
+        """
+        Mover a dead letters los agotados que quedaron en la cola (bases
+        anteriores a este cambio), borrar dead letters más viejos que
+        `retention_days` y truncar el WAL.
+
+        Returns:
+            Mensajes movidos y borrados
+        """
+        now = datetime.now()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                exhausted = [
+                    row[0] for row in self._conn.execute(
+                        "SELECT id FROM retry_messages WHERE attempts >= max_attempts"
+                    ).fetchall()
+                ]
+                self._move_to_dead_letters(exhausted, now)
+                purged = self._conn.execute(
+                    "DELETE FROM dead_letters WHERE dead_at < ?",
+                    ((now - timedelta(days=retention_days)).timestamp(),)
+                ).rowcount
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("PRAGMA optimize")
+
+        return {"moved_to_dead_letters": len(exhausted), "purged": purged}
+
+    def clear_queue(self):
+        """Limpiar toda la cola (incluye dead letters)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM retry_messages")
+            self._conn.execute("DELETE FROM dead_letters")
+        logger.info("Cola de reintentos limpiada")
+
+    def close(self):
+        """Cerrar la conexión."""
+        with self._lock:
+            self._conn.close()
+
+    def _migrate(self):
+        """Agregar columnas nuevas a bases creadas con versiones anteriores."""
+        for table in ("retry_messages", "dead_letters"):
+            columns = {row["name"] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            if "payload" not in columns:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN payload TEXT")
+
+    def _import_json(self, json_file: Path):
+        """
+        Importar la cola JSON de RetryQueue (solo si la base está vacía).
+
+        La importación queda marcada en la tabla meta: sin la marca, cada
+        arranque con la cola vacía volvería a importar (y reenviar) los
+        mensajes que ya se entregaron. El archivo no se toca.
+        """
+        if not json_file.exists():
+            return
+        with self._lock:
+            imported = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (_JSON_IMPORTED,)
+            ).fetchone()
+        if imported:
+            return
+        if self.get_queue_size() > 0:
+            # La base ya está en uso: el JSON es de antes de la migración
+            with self._lock:
+                self._mark_imported()
+            return
+        try:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                messages = [RetryMessage(**item) for item in json.load(f)]
+            rows = [
+                (
+                    msg.id,
+                    msg.to,
+                    msg.message,
+                    _dumps(msg.quote_data),
+                    msg.attempts,
+                    msg.max_attempts,
+                    datetime.fromisoformat(msg.next_retry).timestamp(),
+                    msg.created_at,
+                    msg.last_error,
+                    _dumps(msg.payload)
+                )
+                for msg in messages
+            ]
+        except (json.JSONDecodeError, TypeError, ValueError):
+            logger.warning(f"No se pudo importar la cola de reintentos {json_file}")
+            return
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO retry_messages ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._mark_imported()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        logger.info(f"{len(messages)} mensajes importados desde {json_file}")
+
+    def _mark_imported(self):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (_JSON_IMPORTED, datetime.now().isoformat())
+        )
+
+
+def _dumps(value: Optional[Dict]) -> Optional[str]:
+    return json.dumps(value, ensure_ascii=False) if value is not None else None
+
+
+def _row_to_message(row: sqlite3.Row) -> RetryMessage:
+    return RetryMessage(
+        id=row["id"],
+        to=row["recipient"],
+        message=row["message"],
+        quote_data=json.loads(row["quote_data"]) if row["quote_data"] is not None else None,
+        attempts=row["attempts"],
+        max_attempts=row["max_attempts"],
+        next_retry=datetime.fromtimestamp(row["next_retry"]).isoformat(),
+        created_at=row["created_at"],
+        last_error=row["last_error"],
+        dead_at=datetime.fromtimestamp(row["dead_at"]).isoformat() if "dead_at" in row.keys() else None,
+        payload=json.loads(row["payload"]) if row["payload"] is not None else None
+    )
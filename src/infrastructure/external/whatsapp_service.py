@@ -1,14 +1,136 @@
 """
 Servicio para interactuar con WhatsApp Cloud API.
 """
+import os
 import httpx
 import logging
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List
 from datetime import datetime
 from ..config.settings import settings
+from .outbound_dispatcher import OutboundDispatcher
+from .rate_limiter import GraphRateLimiter, PAIR_ERROR_CODES, THROUGHPUT_ERROR_CODES
 
 logger = logging.getLogger(__name__)
 
+_http_client: Optional[httpx.AsyncClient] = None
+_dispatcher: Optional[OutboundDispatcher] = None
+_rate_limiter: Optional[GraphRateLimiter] = None
+
+
+def get_whatsapp_http_client() -> httpx.AsyncClient:
+    """
+    Obtener el cliente HTTP compartido para la Graph API.
+    
+    Uno por proceso: mantiene las conexiones abiertas (keep-alive, HTTP/2)
+    y evita repetir el handshake TLS en cada mensaje.
+    """
+    global _http_client
+    
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=settings.whatsapp_http_max_connections,
+                max_keepalive_connections=settings.whatsapp_http_max_keepalive,
+                keepalive_expiry=settings.whatsapp_http_keepalive_expiry
+            ),
+            timeout=httpx.Timeout(
+                settings.whatsapp_http_timeout,
+                connect=settings.whatsapp_http_connect_timeout
+            )
+        )
+    
+    return _http_client
+
+
+async def close_whatsapp_http_client():
+    """Cerrar el cliente HTTP compartido (al apagar la app)."""
+    global _http_client
+    
+    client = _http_client
+    _http_client = None
+    if client is not None:
+        await client.aclose()
+
+
+def get_outbound_dispatcher() -> OutboundDispatcher:
+    """
+    Obtener la cola de envíos compartida del proceso.
+    
+    Los workers se crean con el primer envío (necesitan el event loop).
+    """
+    global _dispatcher
+    
+    if _dispatcher is None:
+        _dispatcher = OutboundDispatcher(
+            workers=settings.whatsapp_dispatch_workers,
+            max_queue_size=settings.whatsapp_dispatch_queue_size
+        )
+    
+    return _dispatcher
+
+
+async def close_outbound_dispatcher():
+    """Enviar lo pendiente y detener los workers (al apagar la app)."""
+    global _dispatcher
+    
+    dispatcher = _dispatcher
+    _dispatcher = None
+    if dispatcher is not None:
+        await dispatcher.stop(drain=True)
+
+
+def get_whatsapp_rate_limiter() -> Optional[GraphRateLimiter]:
+    """
+    Obtener el limitador de envíos compartido del proceso.
+    
+    Es uno solo porque el límite de Meta es por número emisor, no por
+    instancia del servicio. Retorna None si está deshabilitado.
+    """
+    global _rate_limiter
+    
+    if not settings.whatsapp_rate_limit_enabled:
+        return None
+    
+    if _rate_limiter is None:
+        _rate_limiter = GraphRateLimiter(
+            rate=settings.whatsapp_rate_limit_per_second,
+            burst=settings.whatsapp_rate_limit_burst,
+            recipient_rate=settings.whatsapp_recipient_rate_per_second,
+            recipient_burst=settings.whatsapp_recipient_burst,
+            max_retries=settings.whatsapp_rate_limit_max_retries,
+            max_backoff=settings.whatsapp_rate_limit_max_backoff
+        )
+    
+    return _rate_limiter
+
+
+def _rate_limit_scope(response: httpx.Response) -> Optional[str]:
+    """'global', 'pair' o None según la respuesta de la Graph API."""
+    if response.status_code == 429:
+        return "global"
+    if response.status_code < 400:
+        return None
+    
+    try:
+        code = response.json().get("error", {}).get("code")
+    except ValueError:
+        return None
+    
+    if code in THROUGHPUT_ERROR_CODES:
+        return "global"
+    if code in PAIR_ERROR_CODES:
+        return "pair"
+    return None
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Segundos de la cabecera Retry-After (se ignora el formato fecha)."""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
 
 class WhatsAppService:
     """
@@ -17,13 +139,130 @@ class WhatsAppService:
     Documentación: https://developers.facebook.com/docs/whatsapp/cloud-api
     """
     
-    def __init__(self):
-        """Inicializar servicio de WhatsApp."""
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        dispatcher: Optional[OutboundDispatcher] = None,
+        wait_for_delivery: bool = True,
+        rate_limiter: Optional[GraphRateLimiter] = None,
+        outbox=None
+    ):
+        """
+        Inicializar servicio de WhatsApp.
+        
+        Args:
+            http_client: Cliente HTTP a usar (por defecto el compartido del proceso)
+            dispatcher: Cola de envíos; sin ella cada envío se hace en línea
+            wait_for_delivery: Con dispatcher, esperar la respuesta de la API.
+                Si es False los envíos retornan al encolarse (el orden por
+                destinatario se mantiene y los errores quedan en el log)
+            rate_limiter: Limitador de envíos (por defecto el compartido del proceso)
+            outbox: Registro de envíos (Outbox); los fallos reintentables
+                pasan a la cola de reintentos con el payload completo
+        """
         self.access_token = settings.whatsapp_access_token
         self.phone_number_id = settings.whatsapp_phone_number_id
         self.api_version = settings.whatsapp_api_version
         self.base_url = f"{settings.whatsapp_api_url}/{self.api_version}"
         self.verify_token = settings.whatsapp_verify_token
+        self._http_client = http_client
+        self.dispatcher = dispatcher
+        self.wait_for_delivery = wait_for_delivery
+        self.rate_limiter = rate_limiter or get_whatsapp_rate_limiter()
+        self.outbox = outbox
+    
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Cliente HTTP (se resuelve al usarlo, no al construir el servicio)."""
+        return self._http_client or get_whatsapp_http_client()
+    
+    def _headers(self) -> Dict[str, str]:
+        """Cabeceras comunes de la Graph API."""
+        return {
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json"
+        }
+    
+    async def _post_message(self, payload: Dict, wait: Optional[bool] = None) -> Dict:
+        """
+        Enviar un payload al endpoint /messages (vía dispatcher si hay uno).
+        
+        Args:
+            payload: Cuerpo del mensaje
+            wait: Esperar la respuesta de la API aunque el servicio se haya
+                creado con wait_for_delivery=False (None = usar el del servicio)
+        
+        Raises:
+            httpx.HTTPError: Si la petición falla
+        """
+        # Los acuses de lectura no son mensajes: no pasan por el outbox
+        entry_id = self.outbox.record(payload) if self.outbox is not None and payload.get("to") else None
+        
+        if self.dispatcher is None:
+            return await self._deliver(payload, entry_id)
+        
+        # Los acuses de lectura no tienen destinatario: se ordenan por mensaje
+        recipient = payload.get("to") or payload.get("message_id", "")
+        future = await self.dispatcher.submit(recipient, lambda: self._deliver(payload, entry_id))
+        if self.wait_for_delivery if wait is None else wait:
+            return await future
+        return {"messaging_product": "whatsapp", "queued": True, "to": recipient}
+    
+    async def resend(self, payload: Dict) -> Dict:
+        """Reenviar un payload ya armado (reintentos de la cola con payload)."""
+        return await self._post_message(payload)
+    
+    async def _deliver(self, payload: Dict, entry_id: Optional[str]) -> Dict:
+        """Enviar y registrar el resultado en el outbox."""
+        if entry_id is None:
+            return await self._send_payload(payload)
+        
+        try:
+            result = await self._send_payload(payload)
+        except Exception as e:
+            self.outbox.mark_failed(entry_id, payload, e)
+            raise
+        
+        messages = result.get("messages") or [{}]
+        self.outbox.mark_sent(entry_id, messages[0].get("id"))
+        return result
+    
+    async def _send_payload(self, payload: Dict) -> Dict:
+        """
+        POST a la Graph API respetando el limitador.
+        
+        Las respuestas de límite excedido (429, 130429, 131056) pausan los
+        envíos y se reintentan hasta `max_retries` veces.
+        """
+        url = f"{self.base_url}/{self.phone_number_id}/messages"
+        recipient = payload.get("to")
+        limiter = self.rate_limiter
+        max_retries = limiter.max_retries if limiter else 0
+        
+        for attempt in range(max_retries + 1):
+            if limiter:
+                await limiter.acquire(recipient)
+            
+            response = await self.http_client.post(url, json=payload, headers=self._headers())
+            
+            scope = _rate_limit_scope(response)
+            if scope and limiter and attempt < max_retries:
+                delay = limiter.on_rate_limited(
+                    recipient,
+                    retry_after=_retry_after(response),
+                    pair=scope == "pair",
+                    attempt=attempt
+                )
+                logger.warning(
+                    f"Límite de envíos de Meta ({scope}) para {recipient}: "
+                    f"reintento {attempt + 1}/{max_retries} en {delay:.1f}s"
+                )
+                continue
+            
+            response.raise_for_status()
+            if limiter:
+                limiter.on_success()
+            return response.json()
     
     def verify_webhook(self, mode: str, token: str, challenge: str) -> Optional[str]:
         """
@@ -53,22 +292,21 @@ class WhatsAppService:
         Returns:
             bool: True si el token es válido, False si no.
         """
-        url = f"https://graph.facebook.com/{self.api_version}/{self.phone_number_id}"
+        url = f"{self.base_url}/{self.phone_number_id}"
         headers = {
             "Authorization": f"Bearer {self.access_token}"
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=headers)
-                if response.status_code == 200:
-                    data = response.json()
-                    logger.info(f"✅ Credenciales WhatsApp Válidas: {data.get('name', 'Cuenta Business')}")
-                    return True
-                else:
-                    error = response.json().get('error', {})
-                    logger.error(f"❌ Error Credenciales WhatsApp: {error.get('message')}")
-                    return False
+            response = await self.http_client.get(url, headers=headers)
+            if response.status_code == 200:
+                data = response.json()
+                logger.info(f"✅ Credenciales WhatsApp Válidas: {data.get('name', 'Cuenta Business')}")
+                return True
+            else:
+                error = response.json().get('error', {})
+                logger.error(f"❌ Error Credenciales WhatsApp: {error.get('message')}")
+                return False
         except Exception as e:
             logger.error(f"❌ Error conectando con Meta: {str(e)}")
             return False
@@ -93,13 +331,6 @@ class WhatsAppService:
         Raises:
             httpx.HTTPError: Si la petición falla
         """
-        url = f"{self.base_url}/{self.phone_number_id}/messages"
-        
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {
             "messaging_product": "whatsapp",
             "recipient_type": "individual",
@@ -111,13 +342,9 @@ class WhatsAppService:
             }
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
-            logger.info(f"Mensaje enviado a {to}: {result}")
-            return result
+        result = await self._post_message(payload)
+        logger.info(f"Mensaje enviado a {to}: {result}")
+        return result
     
     async def send_quote_message(
         self,
@@ -142,9 +369,11 @@ class WhatsAppService:
     async def send_document(
         self,
         to: str,
-        link: str,
+        link: Optional[str] = None,
         caption: Optional[str] = None,
-        filename: Optional[str] = None
+        filename: Optional[str] = None,
+        media_id: Optional[str] = None,
+        wait: Optional[bool] = None
     ) -> Dict:
         """
         Enviar documento (PDF) por WhatsApp.
@@ -154,21 +383,23 @@ class WhatsAppService:
             link: URL pública del documento (PDF)
             caption: Texto opcional
             filename: Nombre del archivo a mostrar (opcional)
+            media_id: ID de un archivo ya subido con upload_media (en lugar de link)
+            wait: Esperar la respuesta de la API (ver _post_message)
             
         Returns:
             Respuesta de la API
+            
+        Raises:
+            ValueError: Si no se indica link ni media_id
         """
-        url = f"{self.base_url}/{self.phone_number_id}/messages"
+        if media_id:
+            document_object = {"id": media_id}
+        elif link:
+            document_object = {"link": link}
+        else:
+            raise ValueError("send_document requiere link o media_id")
         
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
-        document_object = {
-            "link": link,
-            "caption": caption or ""
-        }
+        document_object["caption"] = caption or ""
         
         if filename:
             document_object["filename"] = filename
@@ -181,13 +412,43 @@ class WhatsAppService:
             "document": document_object
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
+        result = await self._post_message(payload, wait=wait)
+        logger.info(f"Documento enviado a {to}: {result}")
+        return result
+    
+    async def upload_media(self, file_path: str, mime_type: str = "application/pdf") -> str:
+        """
+        Subir un archivo al endpoint /media de WhatsApp.
+        
+        Meta conserva el archivo 30 días; mientras tanto se puede enviar
+        por ID sin que vuelva a descargarlo de nuestro storage.
+        
+        Args:
+            file_path: Ruta local del archivo
+            mime_type: Tipo MIME del archivo
             
-            result = response.json()
-            logger.info(f"Documento enviado a {to}: {result}")
-            return result
+        Returns:
+            ID del archivo en WhatsApp
+            
+        Raises:
+            httpx.HTTPError: Si la petición falla
+        """
+        url = f"{self.base_url}/{self.phone_number_id}/media"
+        
+        with open(file_path, "rb") as f:
+            content = f.read()
+        
+        response = await self.http_client.post(
+            url,
+            data={"messaging_product": "whatsapp", "type": mime_type},
+            files={"file": (os.path.basename(file_path), content, mime_type)},
+            headers={"Authorization": f"Bearer {self.access_token}"}
+        )
+        response.raise_for_status()
+        
+        media_id = response.json()["id"]
+        logger.info(f"Archivo {file_path} subido a WhatsApp: {media_id}")
+        return media_id
             
     def _format_quote_message(self, quote_data: Dict) -> str:
         """
@@ -241,13 +502,6 @@ class WhatsAppService:
         Returns:
             Respuesta de la API
         """
-        url = f"{self.base_url}/{self.phone_number_id}/messages"
-        
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
         action_buttons = []
         for btn in buttons[:3]:
             action_buttons.append({
@@ -274,64 +528,91 @@ class WhatsAppService:
             }
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
-            logger.info(f"Botones enviados a {to}: {result}")
-            return result
+        result = await self._post_message(payload)
+        logger.info(f"Botones enviados a {to}: {result}")
+        return result
 
+    def iter_webhook_events(self, webhook_data: Dict) -> Iterator[Dict]:
+        """
+        Recorrer todos los eventos de un webhook de WhatsApp.
+        
+        Meta agrupa varios mensajes y actualizaciones de estado en un mismo
+        POST (varias entradas, cambios y mensajes), así que se recorren todos.
+        
+        Yields:
+            Dicts con 'kind': 'message' (texto y botones interactivos, mismos
+            campos que extract_message_data) o 'status' (message_id, status,
+            recipient_id, timestamp, errors)
+        """
+        for entry in webhook_data.get('entry') or []:
+            for change in entry.get('changes') or []:
+                value = change.get('value') or {}
+                
+                # Nombre del contacto por número (puede haber varios remitentes)
+                names = {
+                    contact.get('wa_id'): contact.get('profile', {}).get('name')
+                    for contact in value.get('contacts') or []
+                }
+                
+                for message in value.get('messages') or []:
+                    message_data = self._parse_message(message, names)
+                    if message_data:
+                        yield message_data
+                
+                for status_update in value.get('statuses') or []:
+                    yield {
+                        'kind': 'status',
+                        'message_id': status_update.get('id'),
+                        'status': status_update.get('status'),
+                        'recipient_id': status_update.get('recipient_id'),
+                        'timestamp': status_update.get('timestamp'),
+                        'errors': status_update.get('errors') or []
+                    }
+    
+    def _parse_message(self, message: Dict, names: Dict[str, Optional[str]]) -> Optional[Dict]:
+        """Convertir un mensaje del webhook; None si el tipo no está soportado."""
+        msg_type = message.get('type')
+        
+        text_body = ""
+        button_payload = None
+        
+        if msg_type == 'text':
+            text_body = message.get('text', {}).get('body', '')
+        elif msg_type == 'interactive':
+            interactive = message.get('interactive', {})
+            if interactive.get('type') == 'button_reply':
+                text_body = interactive.get('button_reply', {}).get('title', '')
+                button_payload = interactive.get('button_reply', {}).get('id')
+        else:
+            logger.info(f"Tipo de mensaje no soportado: {msg_type}")
+            return None
+        
+        sender = message.get('from')
+        sender_name = names.get(sender)
+        if sender_name is None and len(names) == 1:
+            sender_name = next(iter(names.values()))
+        
+        return {
+            'kind': 'message',
+            'from': sender,
+            'name': sender_name,
+            'message_id': message.get('id'),
+            'timestamp': message.get('timestamp'),
+            'text': text_body,
+            'button_payload': button_payload
+        }
+    
     def extract_message_data(self, webhook_data: Dict) -> Optional[Dict]:
         """
-        Extraer datos del mensaje desde el webhook de WhatsApp.
+        Extraer el primer mensaje soportado del webhook de WhatsApp.
         Soporta texto y botones interactivos.
+        
+        Para procesar el webhook completo usar iter_webhook_events.
         """
-        try:
-            entry = webhook_data.get('entry', [])[0]
-            changes = entry.get('changes', [])[0]
-            value = changes.get('value', {})
-            
-            # Verificar que hay mensajes
-            messages = value.get('messages', [])
-            if not messages:
-                return None
-            
-            message = messages[0]
-            msg_type = message.get('type')
-            
-            text_body = ""
-            button_payload = None
-            
-            if msg_type == 'text':
-                text_body = message.get('text', {}).get('body', '')
-            elif msg_type == 'interactive':
-                interactive = message.get('interactive', {})
-                if interactive.get('type') == 'button_reply':
-                    text_body = interactive.get('button_reply', {}).get('title', '')
-                    button_payload = interactive.get('button_reply', {}).get('id')
-            else:
-                logger.info(f"Tipo de mensaje no soportado: {msg_type}")
-                return None
-            
-            # Intentar extraer nombre del contacto
-            contacts = value.get('contacts', [])
-            sender_name = None
-            if contacts:
-                sender_name = contacts[0].get('profile', {}).get('name')
-
-            return {
-                'from': message.get('from'),
-                'name': sender_name,
-                'message_id': message.get('id'),
-                'timestamp': message.get('timestamp'),
-                'text': text_body,
-                'button_payload': button_payload
-            }
-            
-        except (IndexError, KeyError) as e:
-            logger.error(f"Error extrayendo datos del mensaje: {e}")
-            return None
+        for event in self.iter_webhook_events(webhook_data):
+            if event['kind'] == 'message':
+                return event
+        return None
 
     
     async def mark_message_as_read(self, message_id: str) -> Dict:
@@ -344,23 +625,13 @@ class WhatsAppService:
         Returns:
             Respuesta de la API
         """
-        url = f"{self.base_url}/{self.phone_number_id}/messages"
-        
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {
             "messaging_product": "whatsapp",
             "status": "read",
             "message_id": message_id
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            return response.json()
+        return await self._post_message(payload)
     
     async def send_template_message(
         self,
@@ -384,13 +655,6 @@ class WhatsAppService:
         Raises:
             httpx.HTTPError: Si la petición falla
         """
-        url = f"{self.base_url}/{self.phone_number_id}/messages"
-        
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
         # Construir componentes del template
         components = []
         if parameters:
@@ -416,10 +680,6 @@ class WhatsAppService:
             }
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
-            logger.info(f"Template enviado a {to}: {result}")
-            return result
+        result = await self._post_message(payload)
+        logger.info(f"Template enviado a {to}: {result}")
+        return result
@@ -1,25 +1,23 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import create_client, Client
-from ..config.settings import settings
+from ..config.database import get_async_supabase_client
 
 # Definir el esquema de seguridad Bearer
 security = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """
     Verifica el token JWT utilizando el cliente oficial de Supabase.
     Este método es más seguro y soporta automáticamente el cambio de algoritmos de firma.
     """
     token = credentials.credentials
     
-    # Inicializamos el cliente de Supabase para la validación
-    # (settings.supabase_url y settings.supabase_key deben estar en tu .env)
-    supabase: Client = create_client(settings.supabase_url, settings.supabase_key)
+    # Cliente compartido (conexiones reutilizadas entre peticiones)
+    supabase = get_async_supabase_client()
     
     try:
         # El cliente valida la firma, la expiración y el emisor (Supabase)
-        user_response = supabase.auth.get_user(token)
+        user_response = await supabase.auth.get_user(token)
         
         if not user_response.user:
             raise Exception("Usuario no encontrado en la respuesta de Supabase")
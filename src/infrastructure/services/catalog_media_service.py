@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+import httpx
+from ..config.settings import settings
+from ..external.whatsapp_service import WhatsAppService
+from .invoice_service import InvoiceService
+from .storage_service import StorageService
+from .pdf_render_pool import PDFRenderPool
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CAPTION = "Catálogo 2026"
+CATALOG_FILENAME = "Catalogo_Productos_2026.pdf"
+
+
+def _is_media_rejected(error: Exception) -> bool:
+    """Meta rechazó el envío por media_id (ID vencido, de otro número o token)."""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return False
+    return 400 <= error.response.status_code < 500 and error.response.status_code != 429
+
+
+def catalog_version(products: List[Dict]) -> str:
+    """Huella del catálogo: cambia solo si cambian los productos."""
+    payload = json.dumps(products, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+class CatalogMediaService:
+    """
+    Envío del catálogo PDF por media_id de WhatsApp.
+
+    El PDF se genera y sube a /media una sola vez por versión del catálogo;
+    los saludos siguientes lo envían por ID, sin que Meta lo vuelva a
+    descargar de Supabase Storage. El ID se renueva antes de los 30 días en
+    que Meta lo descarta. La caché se guarda en un JSON (como la cola de
+    reintentos) para sobrevivir reinicios.
+    """
+
+    def __init__(
+        self,
+        whatsapp_service: WhatsAppService,
+        invoice_service: InvoiceService,
+        storage_service: StorageService,
+        cache_file: Optional[str] = None,
+        max_age: Optional[timedelta] = None,
+        render_pool: Optional[PDFRenderPool] = None
+    ):
+        self.whatsapp_service = whatsapp_service
+        self.invoice_service = invoice_service
+        self.storage_service = storage_service
+        self.max_age = max_age or timedelta(days=settings.whatsapp_media_max_age_days)
+        # Sin pool el PDF se genera en un hilo
+        self.render_pool = render_pool
+
+        if cache_file is None:
+            base_dir = Path(__file__).parent.parent.parent.parent
+            cache_file = base_dir / "data" / "catalog_media.json"
+        self.cache_file = Path(cache_file)
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+        self._cache: Optional[Dict] = self._load_cache()
+        # Varios saludos simultáneos comparten una sola subida
+        self._lock = asyncio.Lock()
+
+    def _load_cache(self) -> Optional[Dict]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return None
+
+    def _save_cache(self, cache: Dict):
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+
+    def _is_fresh(self, version: str) -> bool:
+        if not self._cache or self._cache.get("version") != version:
+            return False
+        uploaded_at = datetime.fromisoformat(self._cache["uploaded_at"])
+        return datetime.now() - uploaded_at < self.max_age
+
+    async def get_media_id(self, products: List[Dict]) -> str:
+        """
+        ID de WhatsApp del catálogo actual (lo genera y sube si hace falta).
+
+        Raises:
+            httpx.HTTPError: Si falla la subida a /media
+        """
+        version = catalog_version(products)
+        if self._is_fresh(version):
+            return self._cache["media_id"]
+
+        async with self._lock:
+            if self._is_fresh(version):
+                return self._cache["media_id"]
+
+            catalog_path = await self._render_catalog(products)
+            media_id = await self.whatsapp_service.upload_media(catalog_path, "application/pdf")
+
+            self._cache = {
+                "version": version,
+                "media_id": media_id,
+                "uploaded_at": datetime.now().isoformat()
+            }
+            self._save_cache(self._cache)
+            logger.info(f"Catálogo {version} subido a WhatsApp: {media_id}")
+            return media_id
+
+    async def _render_catalog(self, products: List[Dict]) -> str:
+        if self.render_pool is not None:
+            return await self.render_pool.run(self.invoice_service.generate_catalog_pdf, products)
+        return await asyncio.to_thread(self.invoice_service.generate_catalog_pdf, products)
+
+    def invalidate(self):
+        """Forzar una nueva subida en el próximo envío."""
+        self._cache = None
+        self.cache_file.unlink(missing_ok=True)
+
+    async def send_catalog(self, to: str, products: List[Dict]) -> Optional[Dict]:
+        """
+        Enviar el catálogo por media_id.
+
+        Si la subida a /media falla, usa el camino anterior (PDF en Supabase
+        Storage enviado por link). Si Meta rechaza el media_id guardado (lo
+        descartó antes de tiempo o cambió el número o el token), se descarta
+        la caché y también se envía por link; el próximo envío lo vuelve a
+        subir. Por eso este envío espera la respuesta de la API.
+
+        Returns:
+            Respuesta de la API o None si no se pudo obtener el PDF
+        """
+        try:
+            media_id = await self.get_media_id(products)
+        except Exception as e:
+            logger.warning(f"No se pudo subir el catálogo a WhatsApp, se envía por link: {e}")
+            return await self._send_by_link(to, products)
+
+        try:
+            return await self.whatsapp_service.send_document(
+                to=to,
+                media_id=media_id,
+                caption=CATALOG_CAPTION,
+                filename=CATALOG_FILENAME,
+                wait=True
+            )
+        except Exception as e:
+            if not _is_media_rejected(e):
+                raise
+            logger.warning(f"WhatsApp rechazó el catálogo {media_id}, se envía por link: {e}")
+            if self._cache and self._cache.get("media_id") == media_id:
+                self.invalidate()
+            return await self._send_by_link(to, products)
+
+    async def _send_by_link(self, to: str, products: List[Dict]) -> Optional[Dict]:
+        catalog_path = await self._render_catalog(products)
+
+        # Usar timestamp para evitar caché de WhatsApp/CDN
+        timestamp = int(datetime.now().timestamp())
+        public_url = await self.storage_service.upload_pdf(catalog_path, f"catalogs/catalogo_{timestamp}.pdf")
+        if not public_url:
+            logger.error("No se obtuvo URL pública para el PDF.")
+            return None
+
+        return await self.whatsapp_service.send_document(
+            to=to,
+            link=public_url,
+            caption=CATALOG_CAPTION,
+            filename=CATALOG_FILENAME
+        )
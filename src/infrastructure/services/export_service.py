@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+import logging
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from ..database.customer_repository import CustomerRepository
+from ...domain.entities.quote import Quote
+from ...domain.repositories.quote_repository import QuoteRepository
+
+logger = logging.getLogger(__name__)
+
+# Filas pedidas a la base de datos por cada vuelta del cursor
+EXPORT_BATCH_SIZE = 500
+
+QUOTE_EXPORT_COLUMNS = [
+    "id", "created_at", "updated_at", "status", "client_phone", "client_name",
+    "client_dni", "client_address", "customer_id", "total", "items_count", "items", "notes"
+]
+
+CUSTOMER_EXPORT_COLUMNS = [
+    "id", "created_at", "updated_at", "phone_number", "full_name", "dni_rif", "main_address"
+]
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class ExportService:
+    """
+    Exportación en streaming de cotizaciones y clientes (CSV / NDJSON).
+
+    Recorre la base de datos por páginas con cursor (keyset) y emite cada
+    fila en cuanto llega, así la memoria usada no depende del tamaño total.
+    """
+
+    def __init__(
+        self,
+        quote_repository: Optional[QuoteRepository] = None,
+        customer_repository: Optional[CustomerRepository] = None,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ):
+        self.quote_repository = quote_repository
+        self.customer_repository = customer_repository
+        self.batch_size = batch_size
+
+    async def iter_quotes(self, status: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Recorrer todas las cotizaciones como diccionarios planos."""
+        cursor = None
+        while True:
+            quotes, cursor = await self.quote_repository.get_page(self.batch_size, cursor, status)
+            for quote in quotes:
+                yield self._quote_to_row(quote)
+            if not cursor:
+                break
+
+    async def iter_customers(self) -> AsyncIterator[Dict]:
+        """Recorrer todos los clientes."""
+        cursor = None
+        while True:
+            customers, cursor = await self.customer_repository.get_page(self.batch_size, cursor)
+            for customer in customers:
+                yield {column: customer.get(column) for column in CUSTOMER_EXPORT_COLUMNS}
+            if not cursor:
+                break
+
+    async def stream(self, rows: AsyncIterator[Dict], columns: List[str], fmt: str) -> AsyncIterator[str]:
+        """
+        Serializar filas a medida que llegan.
+
+        Args:
+            rows: Iterador asíncrono de filas
+            columns: Columnas (y orden) de la exportación
+            fmt: "csv" o "ndjson"
+        """
+        if fmt == "csv":
+            yield self._csv_line(columns)
+            async for row in rows:
+                yield self._csv_line(self._csv_value(row.get(column)) for column in columns)
+        elif fmt == "ndjson":
+            async for row in rows:
+                yield json.dumps(row, ensure_ascii=False, default=str) + "\n"
+        else:
+            raise ValueError(f"Formato de exportación no soportado: {fmt}")
+
+    def _quote_to_row(self, quote: Quote) -> Dict:
+        """Convertir una cotización a fila exportable."""
+        return {
+            "id": quote.id,
+            "created_at": quote.created_at.isoformat() if quote.created_at else None,
+            "updated_at": quote.updated_at.isoformat() if quote.updated_at else None,
+            "status": quote.status.value if hasattr(quote.status, 'value') else quote.status,
+            "client_phone": quote.client_phone,
+            "client_name": quote.client_name,
+            "client_dni": quote.client_dni,
+            "client_address": quote.client_address,
+            "customer_id": quote.customer_id,
+            "total": quote.total,
+            "items_count": len(quote.items),
+            "items": [item.model_dump(exclude_none=True) for item in quote.items],
+            "notes": quote.notes,
+        }
+
+    def _csv_value(self, value):
+        """Las columnas anidadas (items) se escriben como JSON dentro de la celda."""
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, ensure_ascii=False)
+        return "" if value is None else value
+
+    def _csv_line(self, values: Iterable) -> str:
+        """Escribir una sola línea CSV (con el quoting estándar)."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(list(values))
+        return buffer.getvalue()
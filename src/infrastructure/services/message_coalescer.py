@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Emit = Callable[[List[Dict]], Awaitable]
+
+
+class _PendingBatch:
+    __slots__ = ("messages", "opened_at", "timer")
+
+    def __init__(self, opened_at: float):
+        self.messages: List[Dict] = []
+        self.opened_at = opened_at
+        self.timer: Optional[asyncio.Task] = None
+
+
+class MessageCoalescer:
+    """
+    Ventana de espera por remitente para mensajes de texto seguidos.
+
+    Los clientes suelen mandar un pedido en varias líneas sueltas ("2
+    harina", "1 aceite", ...) en pocos segundos. Cada mensaje de texto abre
+    o extiende una ventana de `window_ms`; al cerrarse, los mensajes
+    acumulados salen juntos en una sola llamada a `emit` (una sola
+    interpretación, una escritura de sesión y una respuesta).
+
+    Los mensajes que no se deben mezclar (botones, comandos como
+    "confirmar") vacían primero lo acumulado y salen solos, en orden.
+    """
+
+    def __init__(
+        self,
+        window_ms: float,
+        emit: Emit,
+        can_merge: Callable[[Dict], bool] = lambda message: True,
+        max_messages: int = 10,
+        max_wait_ms: Optional[float] = None
+    ):
+        """
+        Inicializar ventana.
+
+        Args:
+            window_ms: Silencio (ms) que cierra la ventana de un remitente
+            emit: Corrutina que recibe los mensajes de una ventana (en orden)
+            can_merge: Indica si un mensaje puede unirse a otros
+            max_messages: Mensajes por ventana antes de cerrarla
+            max_wait_ms: Espera máxima desde el primer mensaje (por defecto 4 ventanas)
+        """
+        self.window = window_ms / 1000
+        self.emit = emit
+        self.can_merge = can_merge
+        self.max_messages = max_messages
+        self.max_wait = (max_wait_ms / 1000) if max_wait_ms is not None else self.window * 4
+
+        self._pending: Dict[str, _PendingBatch] = {}
+
+        self._received = 0
+        self._batches = 0
+        self._merged = 0
+        self._max_batch = 0
+
+    async def add(self, message: Dict):
+        """Recibir un mensaje; se entrega a `emit` al cerrarse su ventana."""
+        self._received += 1
+        sender = message.get('from') or ""
+
+        if not self.can_merge(message):
+            await self.flush_sender(sender)
+            await self._emit([message])
+            return
+
+        batch = self._pending.get(sender)
+        if batch is None:
+            batch = self._pending[sender] = _PendingBatch(time.monotonic())
+        batch.messages.append(message)
+
+        if len(batch.messages) >= self.max_messages or time.monotonic() - batch.opened_at >= self.max_wait:
+            await self.flush_sender(sender)
+            return
+
+        # Cada mensaje nuevo reinicia la ventana
+        if batch.timer is not None:
+            batch.timer.cancel()
+        batch.timer = asyncio.create_task(self._close_later(sender, batch))
+
+    async def flush_sender(self, sender: str):
+        """Entregar ya lo acumulado de un remitente."""
+        batch = self._pending.pop(sender, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        await self._emit(batch.messages)
+
+    async def flush_all(self):
+        """Entregar todas las ventanas abiertas (al apagar la app)."""
+        for sender in list(self._pending):
+            await self.flush_sender(sender)
+
+    async def _close_later(self, sender: str, batch: _PendingBatch):
+        await asyncio.sleep(self.window)
+        if self._pending.get(sender) is not batch:
+            return
+        del self._pending[sender]
+        await self._emit(batch.messages)
+
+    async def _emit(self, messages: List[Dict]):
+        self._batches += 1
+        self._merged += len(messages) - 1
+        self._max_batch = max(self._max_batch, len(messages))
+        try:
+            await self.emit(messages)
+        except Exception as e:
+            logger.error(f"Error entregando {len(messages)} mensajes agrupados: {e}", exc_info=True)
+
+    def metrics(self) -> Dict:
+        return {
+            "window_ms": round(self.window * 1000),
+            "pending_senders": len(self._pending),
+            "pending_messages": sum(len(batch.messages) for batch in self._pending.values()),
+            "received": self._received,
+            "batches": self._batches,
+            "merged": self._merged,
+            "max_batch": self._max_batch,
+        }
+
+
+def merge_text_messages(messages: List[Dict]) -> Dict:
+    """
+    Unir mensajes de texto de un remitente en uno solo.
+
+    El texto se une con saltos de línea; el resto de campos sale del último
+    mensaje (así el acuse de lectura marca hasta el más reciente).
+    """
+    if len(messages) == 1:
+        return messages[0]
+
+    merged = dict(messages[-1])
+    merged['text'] = "\n".join(
+        message.get('text', '').strip() for message in messages if message.get('text', '').strip()
+    )
+    merged['merged_message_ids'] = [message.get('message_id') for message in messages]
+    return merged
@@ -0,0 +1,113 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MessageDedupeStore:
+    """
+    Registro de IDs de mensajes de WhatsApp ya procesados.
+
+    Meta reenvía el webhook si no respondemos a tiempo; sin este filtro el
+    mismo mensaje puede crear dos carritos o dos PDFs. Acotado en tiempo
+    (`ttl_seconds`) y en memoria (`max_entries`, se descartan los más
+    viejos). Cada chequeo es O(1).
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 86400,
+        max_entries: int = 100000,
+        persist_path: Optional[str] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Inicializar registro.
+
+        Args:
+            ttl_seconds: Tiempo durante el que un ID se considera repetido
+            max_entries: Máximo de IDs en memoria
+            persist_path: Archivo JSON para conservar los IDs entre reinicios
+            clock: Reloj en segundos (inyectable en tests)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.clock = clock
+
+        # message_id -> primera vez visto; orden de inserción = orden de antigüedad
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+
+        self._checked = 0
+        self._duplicates = 0
+        self._evicted = 0
+
+        if self.persist_path:
+            self._load()
+
+    def seen(self, message_id: Optional[str]) -> bool:
+        """
+        Marcar un ID como procesado.
+
+        Returns:
+            True si ya se había visto dentro del TTL (es un duplicado)
+        """
+        if not message_id:
+            return False
+
+        self._checked += 1
+        now = self.clock()
+        self._expire(now)
+
+        if message_id in self._seen:
+            self._duplicates += 1
+            return True
+
+        self._seen[message_id] = now
+        if len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+            self._evicted += 1
+        return False
+
+    def _expire(self, now: float):
+        cutoff = now - self.ttl_seconds
+        while self._seen:
+            oldest_id, first_seen = next(iter(self._seen.items()))
+            if first_seen > cutoff:
+                break
+            del self._seen[oldest_id]
+
+    def metrics(self) -> Dict:
+        return {
+            "entries": len(self._seen),
+            "checked": self._checked,
+            "duplicates": self._duplicates,
+            "evicted": self._evicted,
+        }
+
+    def _load(self):
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return
+
+        cutoff = self.clock() - self.ttl_seconds
+        for message_id, first_seen in sorted(entries.items(), key=lambda item: item[1])[-self.max_entries:]:
+            if first_seen > cutoff:
+                self._seen[message_id] = first_seen
+
+    def save(self):
+        """Guardar los IDs vigentes (al apagar la app)."""
+        if not self.persist_path:
+            return
+
+        self._expire(self.clock())
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.persist_path, 'w', encoding='utf-8') as f:
+            json.dump(self._seen, f)
+        logger.info(f"Registro de mensajes procesados guardado ({len(self._seen)} IDs)")
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from ..config.settings import settings
+from ..database.message_event_repository import FUNNEL_STATUSES, MessageEventRepository
+from .periodic_job import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+_buffer: Optional["MessageEventBuffer"] = None
+
+
+class MessageEventBuffer:
+    """
+    Acumula eventos de entrega y los escribe por lotes en message_events.
+
+    El webhook solo agrega el evento en memoria; la escritura se hace en un
+    solo upsert cuando el lote llega a `batch_size` o cada `flush_interval`
+    segundos. Si la escritura falla el lote se conserva para el próximo
+    intento, hasta `max_buffer` eventos (después se descartan los más viejos).
+    """
+
+    def __init__(
+        self,
+        repository: Optional[MessageEventRepository] = None,
+        batch_size: int = 200,
+        flush_interval: float = 5.0,
+        max_buffer: int = 10000
+    ):
+        self.repository = repository or MessageEventRepository()
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.job = PeriodicJob("message-events-flush", self.flush, flush_interval)
+
+        # Un evento por (mensaje, estado): los callbacks repetidos se pisan
+        self._events: Dict[Tuple[str, str], Dict] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self._received = 0
+        self._written = 0
+        self._dropped = 0
+        self._failed_flushes = 0
+
+    def add_status(self, status_event: Dict, broadcast_id: Optional[str] = None):
+        """Agregar un callback de estado (evento 'status' de iter_webhook_events)."""
+        errors = status_event.get('errors') or []
+        self._add({
+            "wa_message_id": status_event['message_id'],
+            "status": status_event['status'],
+            "recipient": status_event.get('recipient_id'),
+            "broadcast_id": broadcast_id,
+            "error_code": errors[0].get('code') if errors else None,
+            "occurred_at": _timestamp_to_iso(status_event.get('timestamp')),
+        })
+
+    def add_accepted(self, wa_message_id: str, recipient: str, broadcast_id: Optional[str] = None):
+        """Registrar un mensaje aceptado por la API (punto de partida del embudo)."""
+        self._add({
+            "wa_message_id": wa_message_id,
+            "status": "accepted",
+            "recipient": recipient,
+            "broadcast_id": broadcast_id,
+            "error_code": None,
+            "occurred_at": datetime.now(timezone.utc).isoformat(),
+        })
+
+    def _add(self, row: Dict):
+        # Estados desconocidos (p. ej. 'deleted') romperían el CHECK de todo el lote
+        if not row["wa_message_id"] or row["status"] not in FUNNEL_STATUSES:
+            return
+
+        self._received += 1
+        key = (row["wa_message_id"], row["status"])
+        if key not in self._events and len(self._events) >= self.max_buffer:
+            self._events.pop(next(iter(self._events)))
+            self._dropped += 1
+        self._events[key] = row
+
+        if len(self._events) >= self.batch_size and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> int:
+        """Escribir lo acumulado en un solo upsert; retorna los eventos escritos."""
+        async with self._flush_lock:
+            if not self._events:
+                return 0
+
+            batch = self._events
+            self._events = {}
+            try:
+                written = await self.repository.insert_many(list(batch.values()))
+            except Exception as e:
+                self._failed_flushes += 1
+                logger.error(f"Error escribiendo {len(batch)} eventos de entrega: {e}")
+                # Devolver el lote sin pisar eventos más nuevos
+                for key, row in batch.items():
+                    self._events.setdefault(key, row)
+                while len(self._events) > self.max_buffer:
+                    self._events.pop(next(iter(self._events)))
+                    self._dropped += 1
+                return 0
+
+            self._written += written
+            return written
+
+    def start(self):
+        """Iniciar el vaciado periódico."""
+        self.job.start()
+
+    async def stop(self):
+        """Detener el vaciado periódico y escribir lo pendiente."""
+        await self.job.stop()
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.flush()
+
+    def metrics(self) -> Dict:
+        return {
+            "buffered": len(self._events),
+            "received": self._received,
+            "written": self._written,
+            "dropped": self._dropped,
+            "failed_flushes": self._failed_flushes,
+        }
+
+
+def _timestamp_to_iso(timestamp: Optional[str]) -> str:
+    """Timestamp de Meta (segundos Unix como texto) a ISO 8601."""
+    try:
+        return datetime.fromtimestamp(int(timestamp), tz=timezone.utc).isoformat()
+    except (TypeError, ValueError):
+        return datetime.now(timezone.utc).isoformat()
+
+
+def get_message_event_buffer() -> MessageEventBuffer:
+    """Buffer compartido del proceso (webhook y broadcast escriben en el mismo)."""
+    global _buffer
+
+    if _buffer is None:
+        _buffer = MessageEventBuffer(
+            batch_size=settings.message_events_batch_size,
+            flush_interval=settings.message_events_flush_seconds,
+            max_buffer=settings.message_events_max_buffer
+        )
+
+    return _buffer
+
+
+async def close_message_event_buffer():
+    """Escribir lo pendiente al apagar la app."""
+    global _buffer
+
+    buffer = _buffer
+    _buffer = None
+    if buffer is not None:
+        await buffer.stop()
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_render_pool: Optional["PDFRenderPool"] = None
+
+
+def _timed(fn: Callable, args: Tuple) -> Tuple[Any, float]:
+    """Ejecutar el render (en el proceso hijo) y medir solo su duración."""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def _latency_summary(samples) -> Optional[Dict[str, float]]:
+    if not samples:
+        return None
+    values = sorted(samples)
+
+    def percentile(percent: float) -> float:
+        return round(values[max(0, math.ceil(len(values) * percent / 100) - 1)], 2)
+
+    return {"p50": percentile(50), "p90": percentile(90), "p99": percentile(99), "max": round(values[-1], 2)}
+
+
+class PDFRenderPool:
+    """
+    Generación de PDFs (FPDF y descarga de imágenes) fuera del event loop.
+
+    InvoiceService es síncrono: llamado desde un handler congela todas las
+    conversaciones del worker mientras se arma el PDF. Aquí cada render corre
+    en un pool de procesos (no compite por el GIL con la API) y se espera
+    como un future. Como mucho `max_pending` renders a la vez, contando los
+    que esperan un proceso libre; el siguiente se rechaza con
+    asyncio.QueueFull para que quien llama responda de inmediato en lugar de
+    acumular trabajo. Cada render tiene `timeout` segundos.
+
+    La función y sus argumentos viajan al proceso hijo: deben poder
+    serializarse (métodos de InvoiceService, dicts de datos). Con
+    `use_processes=False` los renders corren en hilos.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = 32,
+        timeout: float = 60.0,
+        use_processes: bool = True
+    ):
+        """
+        Inicializar pool.
+
+        Args:
+            workers: Procesos (o hilos) que renderizan en paralelo
+            max_pending: Renders en curso o en espera antes de rechazar
+            timeout: Segundos que se espera cada render
+            use_processes: False para renderizar en hilos (sin procesos hijos)
+        """
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.use_processes = use_processes
+
+        self._executor: Optional[Executor] = None
+        # Los callbacks de los futures corren en el hilo del executor
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._rejected = 0
+        self._render_ms = deque(maxlen=500)
+        self._wait_ms = deque(maxlen=500)
+
+    def _get_executor(self) -> Executor:
+        # Los procesos se crean con el primer render, no al importar las rutas
+        if self._executor is None:
+            if self.use_processes:
+                # spawn: fork copiaría a medias los hilos de la API (SQLite, httpx)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pdf-render")
+        return self._executor
+
+    def submit(self, fn: Callable, *args) -> asyncio.Future:
+        """
+        Encolar un render.
+
+        Returns:
+            Future con el resultado de `fn(*args)`; falla con
+            asyncio.TimeoutError si el render supera `timeout`
+
+        Raises:
+            asyncio.QueueFull: Si ya hay `max_pending` renders pendientes
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise asyncio.QueueFull(f"{self._pending} PDFs pendientes de generar")
+            self._pending += 1
+            self._submitted += 1
+
+        started = time.perf_counter()
+        try:
+            job = self._get_executor().submit(_timed, fn, args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        job.add_done_callback(lambda done: self._on_done(done, started))
+        return asyncio.ensure_future(self._wait(job))
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Renderizar y esperar el resultado (ver `submit`)."""
+        return await self.submit(fn, *args)
+
+    async def _wait(self, job: Future) -> Any:
+        try:
+            result, _ = await asyncio.wait_for(asyncio.wrap_future(job), self.timeout)
+            return result
+        except asyncio.TimeoutError:
+            # Un render ya iniciado no se puede interrumpir: su lugar se libera al terminar
+            with self._lock:
+                self._timeouts += 1
+            logger.error(f"Generación de PDF excedió {self.timeout}s")
+            raise
+
+    def _on_done(self, job: Future, started: float):
+        with self._lock:
+            self._pending -= 1
+            if job.cancelled():
+                return
+            if job.exception() is not None:
+                self._failed += 1
+                return
+            self._completed += 1
+
+        _, render_ms = job.result()
+        self._render_ms.append(render_ms)
+        self._wait_ms.append(max(0.0, (time.perf_counter() - started) * 1000 - render_ms))
+
+    def metrics(self) -> Dict:
+        return {
+            "mode": "processes" if self.use_processes else "threads",
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "timeouts": self._timeouts,
+            "rejected": self._rejected,
+            "render_ms": _latency_summary(self._render_ms),
+            "wait_ms": _latency_summary(self._wait_ms),
+        }
+
+    async def close(self):
+        """Cancelar lo que no empezó, esperar lo que está en curso y liberar los procesos."""
+        executor = self._executor
+        self._executor = None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+
+def get_pdf_render_pool() -> PDFRenderPool:
+    """Pool de renderizado compartido del proceso."""
+    global _render_pool
+
+    if _render_pool is None:
+        _render_pool = PDFRenderPool(
+            workers=settings.pdf_render_workers,
+            max_pending=settings.pdf_render_max_pending,
+            timeout=settings.pdf_render_timeout_seconds,
+            use_processes=settings.pdf_render_use_processes
+        )
+
+    return _render_pool
+
+
+async def close_pdf_render_pool():
+    """Detener el pool de renderizado al apagar la app."""
+    global _render_pool
+
+    pool = _render_pool
+    _render_pool = None
+    if pool is not None:
+        await pool.close()
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """
+    Tarea periódica en segundo plano dentro del proceso de la API.
+
+    Ejecuta `action` cada `interval_seconds` desde el startup de la app.
+    Si hay varios workers cada uno corre su propia tarea, por lo que las
+    acciones deben ser idempotentes (expirar borradores, refrescar vistas).
+    """
+
+    def __init__(self, name: str, action: Callable[[], Awaitable], interval_seconds: float):
+        self.name = name
+        self.action = action
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Iniciar la tarea (no hace nada si ya está corriendo)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancelar la tarea y esperar a que termine."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self):
+        """Ejecutar una pasada; los errores se registran y no detienen el job."""
+        try:
+            result = await self.action()
+            if result:
+                logger.info(f"Job {self.name}: {result}")
+            return result
+        except Exception as e:
+            logger.error(f"Error en job {self.name}: {e}", exc_info=True)
+            return None
+
+    async def _run(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval_seconds)
@@ -0,0 +1,137 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RetryScheduler:
+    """
+    Reintentos automáticos dentro del proceso de la API.
+
+    Guarda en un heap las horas de `next_retry` conocidas y duerme hasta la
+    más próxima (o hasta que `schedule` anuncie una anterior). Al vencer
+    ejecuta `run` (RetryFailedMessagesUseCase.execute) y vuelve a consultar
+    la cola por el siguiente vencimiento. Si no hay nada programado revisa la
+    cola cada `idle_interval` segundos, por si otro proceso agregó mensajes.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[], Awaitable],
+        next_due: Callable[[], Optional[datetime]],
+        idle_interval: float = 300.0,
+        error_delay: float = 30.0
+    ):
+        """
+        Inicializar scheduler.
+
+        Args:
+            run: Corrutina que reintenta los mensajes vencidos
+            next_due: Próximo next_retry pendiente en la cola (None si está vacía)
+            idle_interval: Segundos entre revisiones de la cola sin nada programado
+            error_delay: Espera antes de volver a intentar si `run` falla
+        """
+        self.run = run
+        self.next_due = next_due
+        self.idle_interval = idle_interval
+        self.error_delay = error_delay
+
+        self._heap: List[float] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._runs = 0
+        self._errors = 0
+        self._last_run: Optional[str] = None
+        self._last_result = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Iniciar el scheduler (debe llamarse con el event loop corriendo)."""
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._refresh()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Cancelar el scheduler; un reintento en curso se interrumpe."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def schedule(self, due: datetime):
+        """Anunciar un next_retry; despierta al scheduler si es el más próximo."""
+        due_ts = due.timestamp()
+        heapq.heappush(self._heap, due_ts)
+        if self._heap[0] == due_ts and self._wake is not None:
+            self._wake.set()
+
+    def metrics(self) -> Dict:
+        next_ts = self._heap[0] if self._heap else None
+        return {
+            "running": self.running,
+            "scheduled": len(self._heap),
+            "next_due": datetime.fromtimestamp(next_ts).isoformat() if next_ts else None,
+            "runs": self._runs,
+            "errors": self._errors,
+            "last_run": self._last_run,
+            "last_result": self._last_result,
+        }
+
+    def _refresh(self):
+        """Agregar al heap el próximo vencimiento según la cola."""
+        try:
+            due = self.next_due()
+        except Exception as e:
+            logger.error(f"Error consultando la cola de reintentos: {e}")
+            return
+        if due is not None:
+            heapq.heappush(self._heap, due.timestamp())
+
+    async def _loop(self):
+        while True:
+            now = datetime.now().timestamp()
+            delay = (self._heap[0] - now) if self._heap else self.idle_interval
+
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                if not self._heap:
+                    self._refresh()
+                continue
+
+            # Vencido: sacar todo lo que ya pasó, una sola ejecución lo cubre
+            while self._heap and self._heap[0] <= now:
+                heapq.heappop(self._heap)
+
+            if await self._run_once():
+                self._refresh()
+
+    async def _run_once(self) -> bool:
+        self._runs += 1
+        self._last_run = datetime.now().isoformat()
+        try:
+            self._last_result = await self.run()
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._errors += 1
+            logger.error(f"Error en reintentos automáticos: {e}", exc_info=True)
+            heapq.heappush(self._heap, datetime.now().timestamp() + self.error_delay)
+            return False
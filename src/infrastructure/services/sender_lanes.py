@@ -0,0 +1,47 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+
+class SenderLanes:
+    """
+    Un carril de ejecución por número de WhatsApp.
+
+    Dos mensajes del mismo cliente nunca se procesan a la vez (ambos leerían
+    y sobrescribirían la misma fila de active_sessions); clientes distintos
+    corren en paralelo. Los mensajes que esperan salen en orden de llegada
+    (asyncio.Lock es FIFO). El carril se descarta en cuanto queda libre, así
+    que la memoria depende de los clientes activos, no de los históricos.
+    """
+
+    def __init__(self):
+        # número -> [lock, usuarios del carril (en curso + esperando)]
+        self._lanes: Dict[str, List] = {}
+        self._contended = 0
+        self._max_active = 0
+
+    @asynccontextmanager
+    async def hold(self, sender: str) -> AsyncIterator[None]:
+        """Ejecutar el bloque con el carril del remitente tomado."""
+        lane = self._lanes.get(sender)
+        if lane is None:
+            lane = self._lanes[sender] = [asyncio.Lock(), 0]
+            self._max_active = max(self._max_active, len(self._lanes))
+        elif lane[0].locked():
+            self._contended += 1
+        lane[1] += 1
+
+        try:
+            async with lane[0]:
+                yield
+        finally:
+            lane[1] -= 1
+            if lane[1] == 0 and self._lanes.get(sender) is lane:
+                del self._lanes[sender]
+
+    def metrics(self) -> Dict:
+        return {
+            "active_lanes": len(self._lanes),
+            "max_active_lanes": self._max_active,
+            "contended": self._contended,
+        }
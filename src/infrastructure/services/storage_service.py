@@ -1,7 +1,7 @@
 import logging
 from typing import Optional
-from supabase import Client
-from ..config.database import get_supabase_client
+from supabase._async.client import AsyncClient as Client
+from ..config.database import get_async_supabase_client
 from ..config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -12,7 +12,7 @@ class StorageService:
     """
     
     def __init__(self, supabase_client: Optional[Client] = None):
-        self.supabase = supabase_client or get_supabase_client()
+        self.supabase = supabase_client or get_async_supabase_client()
         self.bucket_name = settings.supabase_bucket_name
 
     async def upload_pdf(self, file_path: str, destination_path: str) -> Optional[str]:
@@ -28,14 +28,16 @@ class StorageService:
         """
         try:
             with open(file_path, 'rb') as f:
-                self.supabase.storage.from_(self.bucket_name).upload(
-                    path=destination_path,
-                    file=f,
-                    file_options={"content-type": "application/pdf", "upsert": "true"}
-                )
+                content = f.read()
+            
+            await self.supabase.storage.from_(self.bucket_name).upload(
+                path=destination_path,
+                file=content,
+                file_options={"content-type": "application/pdf", "upsert": "true"}
+            )
             
             # Obtener URL pública
-            res = self.supabase.storage.from_(self.bucket_name).get_public_url(destination_path)
+            res = await self.supabase.storage.from_(self.bucket_name).get_public_url(destination_path)
             
             # Limpiar URL (eliminar query params si existen)
             if res and isinstance(res, str) and res.endswith('?'):
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable]
+
+
+class WebhookWorkerPool:
+    """
+    Procesamiento en segundo plano de los webhooks de WhatsApp.
+
+    El endpoint solo encola el trabajo y responde 200 de inmediato; un pool
+    de workers dentro del proceso lo ejecuta. Así una cotización lenta (PDF,
+    Supabase, Groq) no hace que Meta reintente el webhook por timeout.
+    """
+
+    def __init__(self, workers: int = 4, max_queue_size: int = 500, enqueue_timeout: float = 2.0):
+        """
+        Inicializar pool.
+
+        Args:
+            workers: Trabajos procesados en paralelo
+            max_queue_size: Trabajos en espera antes de aplicar backpressure
+            enqueue_timeout: Segundos que submit espera lugar en la cola
+        """
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.enqueue_timeout = enqueue_timeout
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._in_flight = 0
+
+        self._submitted = 0
+        self._processed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._last_lag = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        """Crear los workers (debe llamarse con el event loop corriendo)."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 30.0):
+        """
+        Esperar a que se procese lo encolado (hasta `timeout`) y detener los workers.
+        """
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Apagado con {self._queue.qsize()} webhooks sin procesar")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, job: Job) -> bool:
+        """
+        Encolar un trabajo.
+
+        Returns:
+            False si el pool no está corriendo o la cola siguió llena tras
+            `enqueue_timeout`; quien llama debe procesarlo en línea.
+        """
+        if not self.running:
+            return False
+
+        try:
+            await asyncio.wait_for(self._queue.put((job, time.monotonic())), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            return False
+
+        self._submitted += 1
+        return True
+
+    def metrics(self) -> Dict:
+        """Profundidad de la cola y demora entre la recepción y el procesamiento."""
+        started = self._processed + self._failed + self._in_flight
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "max_queue_size": self.max_queue_size,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "in_flight": self._in_flight,
+            "submitted": self._submitted,
+            "processed": self._processed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "last_lag_ms": round(self._last_lag * 1000, 2),
+            "avg_lag_ms": round(self._lag_total / started * 1000, 2) if started else 0.0,
+            "max_lag_ms": round(self._lag_max * 1000, 2),
+        }
+
+    async def _worker(self):
+        while True:
+            job, enqueued_at = await self._queue.get()
+
+            lag = time.monotonic() - enqueued_at
+            self._last_lag = lag
+            self._lag_total += lag
+            self._lag_max = max(self._lag_max, lag)
+            self._in_flight += 1
+
+            try:
+                await job()
+                self._processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed += 1
+                logger.error(f"Error procesando webhook en segundo plano: {e}", exc_info=True)
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
@@ -42,6 +42,85 @@ async def startup_event():
     
     logger.info("===========================")
 
+    # Precargar catálogo con el cliente compartido (evita la latencia en el primer mensaje)
+    from .infrastructure.api.routes.webhook_routes import quote_service
+    await quote_service.refresh_catalog()
+
+    # Procesamiento de webhooks en segundo plano
+    from .infrastructure.api.routes.webhook_routes import webhook_worker_pool
+    if settings.webhook_async_processing:
+        webhook_worker_pool.start()
+
+    # Reintentos automáticos de mensajes fallidos
+    from .infrastructure.api.routes.webhook_routes import retry_scheduler, retry_compaction_job
+    if settings.retry_scheduler_enabled:
+        retry_scheduler.start()
+    if settings.retry_compaction_interval_minutes > 0:
+        retry_compaction_job.start()
+
+    # Outbox: reencolar envíos interrumpidos e iniciar la escritura por lotes
+    from .infrastructure.external.outbox import get_outbox
+    outbox = get_outbox()
+    if outbox is not None:
+        outbox.start()
+
+    # Escritura por lotes de estados de entrega
+    from .infrastructure.services.message_event_buffer import get_message_event_buffer
+    get_message_event_buffer().start()
+
+    # Jobs periódicos: expiración de borradores y refresco de estadísticas
+    from .infrastructure.api.routes.quote_routes import draft_expiry_job, stats_refresh_job
+    if settings.draft_expiry_interval_minutes > 0:
+        draft_expiry_job.start()
+    if settings.quote_stats_refresh_minutes > 0:
+        stats_refresh_job.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from .infrastructure.api.routes.quote_routes import draft_expiry_job, stats_refresh_job
+    await draft_expiry_job.stop()
+    await stats_refresh_job.stop()
+
+    from .infrastructure.database import close_quote_repository
+    from .infrastructure.config.database import close_async_supabase_client
+    from .infrastructure.external.whatsapp_service import (
+        close_outbound_dispatcher,
+        close_whatsapp_http_client
+    )
+    from .infrastructure.external.retry_queue import close_retry_queue
+    from .infrastructure.external.outbox import close_outbox
+    from .infrastructure.services.pdf_render_pool import close_pdf_render_pool
+    from .infrastructure.services.message_event_buffer import close_message_event_buffer
+    from .infrastructure.api.routes.webhook_routes import (
+        webhook_worker_pool,
+        message_dedupe,
+        message_coalescer,
+        retry_scheduler,
+        retry_compaction_job
+    )
+    await retry_compaction_job.stop()
+    # Un reintento interrumpido vuelve a estar disponible al vencer su reserva
+    await retry_scheduler.stop()
+    # Entregar las ventanas abiertas del agrupador a los workers
+    if message_coalescer is not None:
+        await message_coalescer.flush_all()
+    # Terminar los webhooks encolados: todavía pueden enviar mensajes
+    await webhook_worker_pool.stop(timeout=settings.webhook_drain_timeout)
+    # Sin webhooks en curso ya no se piden PDFs: liberar los procesos de render
+    await close_pdf_render_pool()
+    message_dedupe.save()
+    # Luego vaciar la cola de envíos: necesita el cliente HTTP abierto
+    await close_outbound_dispatcher()
+    # Con los envíos terminados, escribir sus resultados (usa la cola de reintentos)
+    await close_outbox()
+    # Y escribir los estados pendientes antes de cerrar el cliente de Supabase
+    await close_message_event_buffer()
+    await close_quote_repository()
+    close_retry_queue()
+    await close_async_supabase_client()
+    await close_whatsapp_http_client()
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -49,6 +128,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Registrar routers
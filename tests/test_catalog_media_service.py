@@ -0,0 +1,129 @@
+"""
+Tests para CatalogMediaService (catálogo subido una vez a WhatsApp).
+"""
+import asyncio
+import json
+import httpx
+import pytest
+from datetime import datetime, timedelta
+from src.infrastructure.services.catalog_media_service import CatalogMediaService
+
+
+PRODUCTS = [{"name": "Zapatos", "price": 10.0}]
+
+
+class FakeWhatsAppService:
+    def __init__(self, fail_upload: bool = False, rejected_media=()):
+        self.fail_upload = fail_upload
+        self.rejected_media = set(rejected_media)
+        self.uploads = []
+        self.documents = []
+
+    async def upload_media(self, file_path, mime_type="application/pdf"):
+        await asyncio.sleep(0)
+        if self.fail_upload:
+            raise RuntimeError("upload failed")
+        self.uploads.append(file_path)
+        return f"media-{len(self.uploads)}"
+
+    async def send_document(self, to, link=None, caption=None, filename=None, media_id=None, wait=None):
+        if media_id in self.rejected_media:
+            request = httpx.Request("POST", "https://graph.facebook.com/v18.0/123456/messages")
+            response = httpx.Response(400, request=request)
+            raise httpx.HTTPStatusError("media inválido", request=request, response=response)
+        self.documents.append({"to": to, "link": link, "media_id": media_id})
+        return {"messages": [{"id": "wamid.1"}]}
+
+
+class FakeInvoiceService:
+    def __init__(self, tmp_path):
+        self.tmp_path = tmp_path
+        self.generated = 0
+
+    def generate_catalog_pdf(self, products):
+        self.generated += 1
+        path = self.tmp_path / "catalog.pdf"
+        path.write_bytes(b"%PDF")
+        return str(path)
+
+
+class FakeStorageService:
+    async def upload_pdf(self, file_path, destination_path):
+        return f"https://storage.example.com/{destination_path}"
+
+
+def _service(tmp_path, whatsapp=None, **kwargs):
+    return CatalogMediaService(
+        whatsapp or FakeWhatsAppService(),
+        FakeInvoiceService(tmp_path),
+        FakeStorageService(),
+        cache_file=str(tmp_path / "catalog_media.json"),
+        max_age=timedelta(days=25),
+        **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_uploads_once_for_concurrent_greetings(tmp_path):
+    """Test: Varios envíos simultáneos comparten una sola generación y subida."""
+    service = _service(tmp_path)
+
+    await asyncio.gather(*(service.send_catalog(f"58412000000{i}", PRODUCTS) for i in range(5)))
+
+    assert len(service.whatsapp_service.uploads) == 1
+    assert service.invoice_service.generated == 1
+    assert {d["media_id"] for d in service.whatsapp_service.documents} == {"media-1"}
+    assert all(d["link"] is None for d in service.whatsapp_service.documents)
+
+
+@pytest.mark.asyncio
+async def test_reuploads_when_catalog_changes_or_expires(tmp_path):
+    """Test: Un cambio de productos o un media_id viejo fuerzan una nueva subida."""
+    service = _service(tmp_path)
+
+    assert await service.get_media_id(PRODUCTS) == "media-1"
+    assert await service.get_media_id(PRODUCTS + [{"name": "Camisa", "price": 5.0}]) == "media-2"
+
+    service._cache["uploaded_at"] = (datetime.now() - timedelta(days=26)).isoformat()
+    assert await service.get_media_id(PRODUCTS + [{"name": "Camisa", "price": 5.0}]) == "media-3"
+
+
+@pytest.mark.asyncio
+async def test_cache_survives_restart(tmp_path):
+    """Test: Una instancia nueva reutiliza el media_id guardado en disco."""
+    first = _service(tmp_path)
+    await first.get_media_id(PRODUCTS)
+
+    second = _service(tmp_path)
+    assert await second.get_media_id(PRODUCTS) == "media-1"
+    assert second.whatsapp_service.uploads == []
+    assert json.loads((tmp_path / "catalog_media.json").read_text())["media_id"] == "media-1"
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_link_when_upload_fails(tmp_path):
+    """Test: Si /media falla, el catálogo se envía por link de Storage."""
+    service = _service(tmp_path, whatsapp=FakeWhatsAppService(fail_upload=True))
+
+    result = await service.send_catalog("584121234567", PRODUCTS)
+
+    assert result is not None
+    document = service.whatsapp_service.documents[0]
+    assert document["media_id"] is None
+    assert document["link"].startswith("https://storage.example.com/catalogs/")
+
+
+@pytest.mark.asyncio
+async def test_rejected_media_id_is_invalidated_and_sent_by_link(tmp_path):
+    """Test: Si Meta rechaza el media_id guardado se envía por link y se vuelve a subir."""
+    whatsapp = FakeWhatsAppService(rejected_media={"media-1"})
+    service = _service(tmp_path, whatsapp=whatsapp)
+
+    result = await service.send_catalog("584121234567", PRODUCTS)
+
+    assert result is not None
+    assert whatsapp.documents[0]["link"].startswith("https://storage.example.com/catalogs/")
+    assert not (tmp_path / "catalog_media.json").exists()
+
+    await service.send_catalog("584121234567", PRODUCTS)
+    assert whatsapp.documents[1]["media_id"] == "media-2"
@@ -0,0 +1,143 @@
+"""
+Tests para ExportService (exportación en streaming).
+"""
+import csv
+import io
+import json
+import pytest
+from datetime import datetime, timezone
+from src.domain.entities.quote import Quote, QuoteItem
+from src.infrastructure.database.customer_repository import CustomerRepository
+from src.infrastructure.services.export_service import (
+    ExportService,
+    QUOTE_EXPORT_COLUMNS,
+    CUSTOMER_EXPORT_COLUMNS
+)
+
+
+def _quote(quote_id: int) -> Quote:
+    return Quote(
+        id=quote_id,
+        client_phone="+58 412-1234567",
+        items=[QuoteItem(product_name="Zapatos", quantity=2, unit_price=10.0, subtotal=20.0)],
+        total=20.0,
+        created_at=datetime(2026, 1, quote_id, tzinfo=timezone.utc),
+        client_name="Cliente, S.A."
+    )
+
+
+class FakeQuoteRepository:
+    """Repositorio en memoria que pagina de a `limit` filas."""
+
+    def __init__(self, quotes):
+        self.quotes = quotes
+        self.calls = []
+
+    async def get_page(self, limit, cursor=None, status=None):
+        self.calls.append(cursor)
+        start = int(cursor or 0)
+        page = self.quotes[start:start + limit]
+        end = start + limit
+        return page, (str(end) if end < len(self.quotes) else None)
+
+
+class FakeCustomerRepository:
+    def __init__(self, customers):
+        self.customers = customers
+
+    async def get_page(self, limit, cursor=None):
+        start = int(cursor or 0)
+        end = start + limit
+        return self.customers[start:end], (str(end) if end < len(self.customers) else None)
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_export_quotes_csv_pages_through_all_rows():
+    """Test: El CSV recorre todas las páginas y respeta el quoting."""
+    repository = FakeQuoteRepository([_quote(i) for i in range(1, 6)])
+    service = ExportService(quote_repository=repository, batch_size=2)
+
+    chunks = await _collect(service.stream(service.iter_quotes(), QUOTE_EXPORT_COLUMNS, "csv"))
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+
+    assert rows[0] == QUOTE_EXPORT_COLUMNS
+    assert [row[0] for row in rows[1:]] == ["1", "2", "3", "4", "5"]
+    assert rows[1][QUOTE_EXPORT_COLUMNS.index("client_name")] == "Cliente, S.A."
+    assert repository.calls == [None, "2", "4"]
+
+
+@pytest.mark.asyncio
+async def test_export_quotes_ndjson_one_object_per_line():
+    """Test: NDJSON emite un objeto por línea con los items anidados."""
+    service = ExportService(quote_repository=FakeQuoteRepository([_quote(1), _quote(2)]))
+
+    chunks = await _collect(service.stream(service.iter_quotes(), QUOTE_EXPORT_COLUMNS, "ndjson"))
+    records = [json.loads(line) for line in chunks]
+
+    assert len(records) == 2
+    assert records[0]["items"][0]["product_name"] == "Zapatos"
+    assert records[0]["items_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_export_customers_csv():
+    """Test: Exportar clientes usa solo las columnas conocidas."""
+    customers = [
+        {"id": "a", "phone_number": "584121234567", "full_name": "Ana", "extra": "x"},
+        {"id": "b", "phone_number": "584241234567", "full_name": "Beto"},
+    ]
+    service = ExportService(customer_repository=FakeCustomerRepository(customers), batch_size=1)
+
+    chunks = await _collect(service.stream(service.iter_customers(), CUSTOMER_EXPORT_COLUMNS, "csv"))
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+
+    assert rows[0] == CUSTOMER_EXPORT_COLUMNS
+    assert [row[CUSTOMER_EXPORT_COLUMNS.index("full_name")] for row in rows[1:]] == ["Ana", "Beto"]
+
+
+class FailingSupabase:
+    """Cliente de Supabase cuya segunda consulta falla."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def table(self, name):
+        return self
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def or_(self, *args):
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    async def execute(self):
+        self.calls += 1
+        if self.calls > 1:
+            raise RuntimeError("Supabase no disponible")
+        return type("Response", (), {"data": self.rows[:self.count]})()
+
+
+@pytest.mark.asyncio
+async def test_export_customers_fails_instead_of_truncating():
+    """Test: Un error de Supabase en la segunda página corta el stream con error."""
+    customers = [
+        {"id": f"c{i}", "full_name": f"Cliente {i}", "created_at": f"2026-01-0{9 - i}T00:00:00+00:00"}
+        for i in range(3)
+    ]
+    repository = CustomerRepository(FailingSupabase(customers))
+    service = ExportService(customer_repository=repository, batch_size=2)
+
+    with pytest.raises(RuntimeError):
+        await _collect(service.stream(service.iter_customers(), CUSTOMER_EXPORT_COLUMNS, "csv"))
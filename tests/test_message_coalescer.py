@@ -0,0 +1,88 @@
+"""
+Tests para MessageCoalescer (agrupación de mensajes seguidos por remitente).
+"""
+import asyncio
+import pytest
+from src.infrastructure.services.message_coalescer import MessageCoalescer, merge_text_messages
+
+
+def _text(sender, message_id, text, button_payload=None):
+    return {
+        "from": sender,
+        "message_id": message_id,
+        "text": text,
+        "button_payload": button_payload
+    }
+
+
+class Collector:
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, messages):
+        self.batches.append([message["message_id"] for message in messages])
+
+
+@pytest.mark.asyncio
+async def test_messages_within_window_are_emitted_together():
+    """Test: Los textos seguidos de un remitente salen en una sola entrega."""
+    collector = Collector()
+    coalescer = MessageCoalescer(window_ms=30, emit=collector)
+
+    await coalescer.add(_text("a", "m1", "2 harina"))
+    await coalescer.add(_text("b", "m2", "1 arroz"))
+    await coalescer.add(_text("a", "m3", "1 aceite"))
+    assert collector.batches == []
+
+    await asyncio.sleep(0.08)
+
+    assert sorted(collector.batches) == [["m1", "m3"], ["m2"]]
+    metrics = coalescer.metrics()
+    assert metrics["batches"] == 2
+    assert metrics["merged"] == 1
+    assert metrics["pending_senders"] == 0
+
+
+@pytest.mark.asyncio
+async def test_unmergeable_message_flushes_pending_first():
+    """Test: Un comando vacía la ventana abierta y sale después, por separado."""
+    collector = Collector()
+    coalescer = MessageCoalescer(
+        window_ms=1000,
+        emit=collector,
+        can_merge=lambda message: message["text"] != "confirmar"
+    )
+
+    await coalescer.add(_text("a", "m1", "2 harina"))
+    await coalescer.add(_text("a", "m2", "1 aceite"))
+    await coalescer.add(_text("a", "m3", "confirmar"))
+
+    assert collector.batches == [["m1", "m2"], ["m3"]]
+
+
+@pytest.mark.asyncio
+async def test_max_messages_closes_window_and_flush_all_drains():
+    """Test: Se cierra la ventana al llegar a max_messages; flush_all entrega el resto."""
+    collector = Collector()
+    coalescer = MessageCoalescer(window_ms=1000, emit=collector, max_messages=2)
+
+    for i in range(3):
+        await coalescer.add(_text("a", f"m{i}", f"{i} harina"))
+    assert collector.batches == [["m0", "m1"]]
+
+    await coalescer.flush_all()
+    assert collector.batches == [["m0", "m1"], ["m2"]]
+    assert coalescer.metrics()["max_batch"] == 2
+
+
+def test_merge_text_messages_joins_lines_and_keeps_last_id():
+    """Test: El mensaje unido conserva el último ID y todas las líneas."""
+    merged = merge_text_messages([
+        _text("a", "m1", "2 harina "),
+        _text("a", "m2", ""),
+        _text("a", "m3", "1 aceite"),
+    ])
+
+    assert merged["text"] == "2 harina\n1 aceite"
+    assert merged["message_id"] == "m3"
+    assert merged["merged_message_ids"] == ["m1", "m2", "m3"]
@@ -0,0 +1,64 @@
+"""
+Tests para MessageDedupeStore (mensajes de webhook ya procesados).
+"""
+from src.infrastructure.services.message_dedupe import MessageDedupeStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_second_sighting_is_duplicate():
+    """Test: Un ID repetido se marca como duplicado y se cuenta."""
+    store = MessageDedupeStore(clock=FakeClock())
+
+    assert store.seen("wamid.1") is False
+    assert store.seen("wamid.1") is True
+    assert store.seen("wamid.2") is False
+    assert store.seen(None) is False
+    assert store.metrics() == {"entries": 2, "checked": 3, "duplicates": 1, "evicted": 0}
+
+
+def test_entries_expire_after_ttl():
+    """Test: Pasado el TTL el ID vuelve a procesarse."""
+    clock = FakeClock()
+    store = MessageDedupeStore(ttl_seconds=60, clock=clock)
+
+    store.seen("wamid.1")
+    clock.now += 61
+
+    assert store.seen("wamid.1") is False
+    assert store.metrics()["entries"] == 1
+
+
+def test_memory_is_bounded():
+    """Test: Superado max_entries se descartan los IDs más viejos."""
+    store = MessageDedupeStore(max_entries=2, clock=FakeClock())
+
+    for message_id in ("a", "b", "c"):
+        store.seen(message_id)
+
+    assert store.metrics()["evicted"] == 1
+    assert store.seen("a") is False
+    assert store.seen("c") is True
+
+
+def test_persisted_ids_survive_restart(tmp_path):
+    """Test: Con persist_path los IDs vigentes se recargan al reiniciar."""
+    clock = FakeClock()
+    path = tmp_path / "dedupe.json"
+    first = MessageDedupeStore(ttl_seconds=60, persist_path=str(path), clock=clock)
+    first.seen("old")
+    clock.now += 50
+    first.seen("new")
+    first.save()
+
+    clock.now += 20
+    second = MessageDedupeStore(ttl_seconds=60, persist_path=str(path), clock=clock)
+
+    assert second.seen("new") is True
+    assert second.seen("old") is False
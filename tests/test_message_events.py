@@ -0,0 +1,121 @@
+"""
+Tests para MessageEventBuffer y MessageEventRepository (estados de entrega).
+"""
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.infrastructure.database.message_event_repository import MessageEventRepository
+from src.infrastructure.services.message_event_buffer import MessageEventBuffer
+
+
+class FakeRepository:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches = []
+
+    async def insert_many(self, events):
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("db down")
+        self.batches.append(events)
+        return len(events)
+
+
+def _status(message_id, status, timestamp="1760000000", errors=None):
+    return {
+        "kind": "status",
+        "message_id": message_id,
+        "status": status,
+        "recipient_id": "584121234567",
+        "timestamp": timestamp,
+        "errors": errors or []
+    }
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_one_batch_and_collapses_repeats():
+    """Test: Los callbacks repetidos se escriben una vez, en un solo lote."""
+    repository = FakeRepository()
+    buffer = MessageEventBuffer(repository, batch_size=100)
+
+    buffer.add_accepted("wamid.1", "584121234567", "b1")
+    buffer.add_status(_status("wamid.1", "sent"))
+    buffer.add_status(_status("wamid.1", "sent"))
+    buffer.add_status(_status("wamid.1", "deleted"))
+    buffer.add_status(_status("wamid.2", "failed", errors=[{"code": 131026}]))
+
+    assert await buffer.flush() == 3
+    assert len(repository.batches) == 1
+
+    rows = {(row["wa_message_id"], row["status"]): row for row in repository.batches[0]}
+    assert rows[("wamid.1", "accepted")]["broadcast_id"] == "b1"
+    assert rows[("wamid.1", "sent")]["occurred_at"] == "2025-10-09T08:53:20+00:00"
+    assert rows[("wamid.2", "failed")]["error_code"] == 131026
+    assert buffer.metrics()["received"] == 4
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_in_background():
+    """Test: Al llegar a batch_size se programa la escritura sin esperarla."""
+    repository = FakeRepository()
+    buffer = MessageEventBuffer(repository, batch_size=2)
+
+    buffer.add_status(_status("wamid.1", "sent"))
+    buffer.add_status(_status("wamid.2", "sent"))
+    assert repository.batches == []
+
+    await buffer.stop()
+    assert [len(batch) for batch in repository.batches] == [2]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_events_up_to_max_buffer():
+    """Test: Si la base falla, el lote se conserva y se recorta a max_buffer."""
+    repository = FakeRepository(fail=True)
+    buffer = MessageEventBuffer(repository, batch_size=100, max_buffer=2)
+
+    for i in range(3):
+        buffer.add_status(_status(f"wamid.{i}", "delivered"))
+
+    assert await buffer.flush() == 0
+    metrics = buffer.metrics()
+    assert metrics["buffered"] == 2
+    assert metrics["dropped"] == 1
+    assert metrics["failed_flushes"] == 1
+
+    repository.fail = False
+    assert await buffer.flush() == 2
+
+
+class FakeRpc:
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+
+    async def execute(self):
+        return SimpleNamespace(data=self.rows)
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.log = []
+
+    def rpc(self, name, params):
+        self.log.append((name, params))
+        return FakeRpc(self.rows, self.log)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_funnel_fills_missing_statuses():
+    """Test: El embudo sale de una sola llamada y completa los estados sin eventos."""
+    client = FakeClient([
+        {"status": "accepted", "messages": 10},
+        {"status": "delivered", "messages": 8},
+        {"status": "read", "messages": 5},
+    ])
+
+    funnel = await MessageEventRepository(client).get_broadcast_funnel("b1")
+
+    assert client.log == [("broadcast_funnel", {"p_broadcast_id": "b1"})]
+    assert funnel == {"accepted": 10, "sent": 0, "delivered": 8, "read": 5, "failed": 0}
@@ -0,0 +1,105 @@
+"""
+Tests para el mock local de la Graph API (scripts/mock_graph_api.py).
+"""
+import pytest
+from unittest.mock import patch
+from scripts.mock_graph_api import MockGraphAPI, MockGraphConfig
+from src.infrastructure.external.outbound_dispatcher import OutboundDispatcher
+from src.infrastructure.external.rate_limiter import GraphRateLimiter
+from tests.test_whatsapp_service import mock_settings
+
+
+def _service(mock, **kwargs):
+    from src.infrastructure.external.whatsapp_service import WhatsAppService
+    return WhatsAppService(http_client=mock.http_client(), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_records_messages_read_receipts_and_media(tmp_path):
+    """Test: El mock responde como Meta y registra cada endpoint."""
+    mock = MockGraphAPI()
+    pdf = tmp_path / "catalog.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+
+    with patch('src.infrastructure.external.whatsapp_service.settings', mock_settings):
+        service = _service(mock)
+        result = await service.send_message("584121234567", "Hola")
+        await service.mark_message_as_read("wamid.0")
+        media_id = await service.upload_media(str(pdf))
+        assert await service.check_credentials() is True
+        await service.http_client.aclose()
+
+    assert result["messages"][0]["id"] == "wamid.mock.1"
+    assert media_id == "mock-media-1"
+    assert mock.summary()["by_endpoint"] == {"messages": 1, "read": 1, "media": 1}
+    assert mock.requests[2]["body"]["size"] == 8
+
+
+@pytest.mark.asyncio
+async def test_injected_429_is_retried_by_rate_limiter():
+    """Test: Un 429 programado se reintenta según Retry-After."""
+    mock = MockGraphAPI(MockGraphConfig(retry_after=0))
+    mock.fail_next(2)
+    limiter = GraphRateLimiter()
+
+    with patch('src.infrastructure.external.whatsapp_service.settings', mock_settings):
+        service = _service(mock, rate_limiter=limiter)
+        result = await service.send_message("584121234567", "Hola")
+        await service.http_client.aclose()
+
+    assert result["messages"][0]["id"] == "wamid.mock.1"
+    assert mock.summary()["by_status"] == {429: 2, 200: 1}
+    assert limiter.metrics()["rate_limited"] == 2
+
+
+@pytest.mark.asyncio
+async def test_random_errors_are_reproducible_with_seed():
+    """Test: Con semilla fija las fallas aleatorias se repiten igual."""
+    outcomes = []
+    for _ in range(2):
+        mock = MockGraphAPI(MockGraphConfig(error_rate=0.5, seed=7))
+        async with mock.http_client() as client:
+            statuses = [
+                (await client.post("/v18.0/123/messages", json={"to": "1", "type": "text"})).status_code
+                for _ in range(10)
+            ]
+        outcomes.append(statuses)
+
+    assert outcomes[0] == outcomes[1]
+    assert set(outcomes[0]) == {200, 500}
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_order_is_visible_in_traffic():
+    """Test: Con latencia, el tráfico registrado conserva el orden por destinatario."""
+    mock = MockGraphAPI(MockGraphConfig(latency_ms=5, jitter_ms=5, seed=1))
+    dispatcher = OutboundDispatcher(workers=4)
+
+    with patch('src.infrastructure.external.whatsapp_service.settings', mock_settings):
+        service = _service(mock, dispatcher=dispatcher, wait_for_delivery=False)
+        for n in range(5):
+            for recipient in ("111", "222"):
+                await service.send_message(recipient, f"mensaje {n}")
+        await dispatcher.stop(drain=True)
+        await service.http_client.aclose()
+
+    for recipient in ("111", "222"):
+        bodies = [body["text"]["body"] for body in mock.messages_to(recipient)]
+        assert bodies == [f"mensaje {n}" for n in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_traffic_log_is_bounded_but_summary_counts_everything():
+    """Test: Solo se guardan las últimas peticiones; el resumen cuenta todas."""
+    mock = MockGraphAPI(MockGraphConfig(max_recorded=3))
+    async with mock.http_client() as client:
+        for n in range(10):
+            await client.post("/v18.0/123/messages", json={"to": str(n), "type": "text"})
+        traffic = (await client.get("/__mock/traffic", params={"limit": 2})).json()
+
+    assert len(mock.requests) == 3
+    assert [r["to"] for r in mock.requests] == ["7", "8", "9"]
+    assert mock.summary()["total"] == 10
+    assert mock.summary()["recipients"] == 10
+    assert [r["to"] for r in traffic["requests"]] == ["8", "9"]
+    assert traffic["summary"]["by_status"] == {"200": 10}
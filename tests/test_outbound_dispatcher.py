@@ -0,0 +1,134 @@
+"""
+Tests para OutboundDispatcher (cola de envíos con orden por destinatario).
+"""
+import asyncio
+import httpx
+import pytest
+from unittest.mock import Mock, patch
+from src.infrastructure.external.outbound_dispatcher import OutboundDispatcher
+from tests.test_whatsapp_service import mock_settings
+
+
+@pytest.mark.asyncio
+async def test_keeps_order_per_recipient_and_overlaps_recipients():
+    """Test: Un destinatario recibe en orden; destinatarios distintos se envían en paralelo."""
+    dispatcher = OutboundDispatcher(workers=4)
+    sent = []
+    active = 0
+    max_active = 0
+
+    def send(recipient, n):
+        async def _send():
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            sent.append((recipient, n))
+            active -= 1
+            return n
+        return _send
+
+    futures = []
+    for n in range(5):
+        for recipient in ("a", "b", "c"):
+            futures.append(await dispatcher.submit(recipient, send(recipient, n)))
+
+    await asyncio.gather(*futures)
+    await dispatcher.stop()
+
+    for recipient in ("a", "b", "c"):
+        assert [n for r, n in sent if r == recipient] == [0, 1, 2, 3, 4]
+    assert max_active == 3
+    assert dispatcher.metrics()["completed"] == 15
+
+
+@pytest.mark.asyncio
+async def test_backpressure_blocks_submit_when_full():
+    """Test: submit espera cuando hay max_queue_size mensajes pendientes."""
+    dispatcher = OutboundDispatcher(workers=1, max_queue_size=2)
+    release = asyncio.Event()
+
+    async def blocked():
+        await release.wait()
+
+    await dispatcher.submit("a", blocked)
+    await dispatcher.submit("b", blocked)
+
+    third = asyncio.create_task(dispatcher.submit("c", blocked))
+    await asyncio.sleep(0.01)
+    assert not third.done()
+
+    metrics = dispatcher.metrics()
+    assert metrics["queue_depth"] == 1
+    assert metrics["in_flight"] == 1
+    assert metrics["backpressure_waits"] == 1
+
+    release.set()
+    await third
+    await dispatcher.stop(drain=True)
+    assert dispatcher.metrics()["completed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failure_is_reported_without_stopping_the_queue():
+    """Test: Un envío fallido se cuenta y no bloquea al resto del destinatario."""
+    errors = []
+
+    async def on_error(recipient, error):
+        errors.append((recipient, str(error)))
+
+    dispatcher = OutboundDispatcher(workers=2, on_error=on_error)
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def ok():
+        return "ok"
+
+    failed = await dispatcher.submit("a", fail)
+    succeeded = await dispatcher.submit("a", ok)
+
+    assert await succeeded == "ok"
+    with pytest.raises(RuntimeError):
+        await failed
+    await dispatcher.stop()
+
+    assert errors == [("a", "boom")]
+    assert dispatcher.metrics()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_whatsapp_service_queues_without_waiting():
+    """Test: Con wait_for_delivery=False el envío retorna al encolarse y sale en orden."""
+    bodies = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.01)
+        bodies.append(request.content)
+        return httpx.Response(200, json={"messages": [{"id": "wamid.1"}]})
+
+    with patch('src.infrastructure.external.whatsapp_service.settings', mock_settings):
+        from src.infrastructure.external.whatsapp_service import WhatsAppService
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        dispatcher = OutboundDispatcher(workers=4)
+        service = WhatsAppService(http_client=client, dispatcher=dispatcher, wait_for_delivery=False)
+
+        first = await service.send_message("584121234567", "uno")
+        await service.send_message("584121234567", "dos")
+        assert first["queued"] is True
+        assert bodies == []
+
+        await dispatcher.stop(drain=True)
+        await client.aclose()
+
+    assert [b"uno" in body for body in bodies] == [True, False]
+    assert b"dos" in bodies[1]
+
+
+def test_retry_use_case_rejects_fire_and_forget_service():
+    """Test: Un servicio que solo encola haría pasar todo reintento por exitoso."""
+    from src.application.use_cases.whatsapp_use_cases import RetryFailedMessagesUseCase
+    whatsapp = Mock(wait_for_delivery=False)
+
+    with pytest.raises(ValueError):
+        RetryFailedMessagesUseCase(whatsapp, Mock())
@@ -0,0 +1,169 @@
+"""
+Tests para Outbox.
+"""
+import asyncio
+import httpx
+import pytest
+from unittest.mock import Mock, patch
+from src.infrastructure.external.outbox import Outbox, is_retryable
+from src.infrastructure.external.sqlite_retry_queue import SQLiteRetryQueue
+
+
+TEXT_PAYLOAD = {
+    "messaging_product": "whatsapp",
+    "to": "584121234567",
+    "type": "text",
+    "text": {"body": "Hola"}
+}
+
+
+def _http_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://graph.facebook.com/v18.0/123456/messages")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status_code, request=request))
+
+
+@pytest.fixture
+def retry_queue(tmp_path):
+    """Crear cola de reintentos SQLite."""
+    queue = SQLiteRetryQueue(db_file=str(tmp_path / "retry.db"))
+    yield queue
+    queue.close()
+
+
+@pytest.fixture
+def outbox(tmp_path, retry_queue):
+    """Crear instancia de Outbox."""
+    outbox = Outbox(db_file=str(tmp_path / "outbox.db"), retry_queue=retry_queue, batch_size=100)
+    yield outbox
+    outbox._conn.close()
+
+
+def test_is_retryable():
+    """Test: Se reintentan red, 429 y 5xx; los demás 4xx no."""
+    assert is_retryable(_http_error(429))
+    assert is_retryable(_http_error(503))
+    assert is_retryable(httpx.ConnectError("sin red"))
+    assert not is_retryable(_http_error(400))
+    assert not is_retryable(ValueError("otro"))
+
+
+@pytest.mark.asyncio
+async def test_record_and_result_are_written_in_one_flush(outbox):
+    """Test: El registro y su resultado se acumulan y se escriben juntos."""
+    entry_id = outbox.record(TEXT_PAYLOAD)
+    outbox.mark_sent(entry_id, "wamid.1")
+
+    assert outbox.counts() == {}
+    assert await outbox.flush() == 1
+    assert outbox.counts() == {"sent": 1}
+
+    with outbox._lock:
+        row = outbox._conn.execute("SELECT recipient, kind, wa_message_id FROM outbox").fetchone()
+    assert row == ("584121234567", "text", "wamid.1")
+
+
+@pytest.mark.asyncio
+async def test_status_change_after_flush_updates_row(outbox):
+    """Test: Un resultado que llega después de escribir el registro actualiza la fila."""
+    entry_id = outbox.record(TEXT_PAYLOAD)
+    await outbox.flush()
+    outbox.mark_sent(entry_id, "wamid.1")
+    await outbox.flush()
+
+    assert outbox.counts() == {"sent": 1}
+    assert outbox.metrics()["flushes"] == 2
+
+
+@pytest.mark.asyncio
+async def test_retryable_failure_goes_to_retry_queue_with_payload(outbox, retry_queue):
+    """Test: Un fallo reintentable pasa a la cola con el payload completo."""
+    entry_id = outbox.record(TEXT_PAYLOAD)
+    outbox.mark_failed(entry_id, TEXT_PAYLOAD, _http_error(503))
+    await outbox.flush()
+
+    stats = retry_queue.stats()
+    assert stats["queue_size"] == 1
+    assert outbox.counts() == {"retrying": 1}
+
+    with retry_queue._lock:
+        retry_queue._conn.execute("UPDATE retry_messages SET next_retry = 0")
+    claimed = retry_queue.claim_messages_to_retry(limit=10)
+    assert claimed[0].id == entry_id
+    assert claimed[0].message == "Hola"
+    assert claimed[0].payload == TEXT_PAYLOAD
+
+
+@pytest.mark.asyncio
+async def test_permanent_failure_is_not_retried(outbox, retry_queue):
+    """Test: Un 400 queda como fallido sin pasar a la cola."""
+    entry_id = outbox.record(TEXT_PAYLOAD)
+    outbox.mark_failed(entry_id, TEXT_PAYLOAD, _http_error(400))
+    await outbox.flush()
+
+    assert outbox.counts() == {"failed": 1}
+    assert retry_queue.get_queue_size() == 0
+
+
+@pytest.mark.asyncio
+async def test_recover_requeues_interrupted_sends(outbox, retry_queue):
+    """Test: Los registros que quedaron 'pending' se pasan a reintentos al iniciar."""
+    outbox.record(TEXT_PAYLOAD)
+    await outbox.flush()
+
+    assert outbox.recover(older_than_seconds=-1) == 1
+    await outbox.flush()
+
+    assert outbox.counts() == {"retrying": 1}
+    assert retry_queue.get_queue_size() == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_size_triggers_background_flush(tmp_path):
+    """Test: Al llenar el lote se escribe sin esperar al job periódico."""
+    outbox = Outbox(db_file=str(tmp_path / "outbox.db"), batch_size=3)
+    for _ in range(3):
+        outbox.record(TEXT_PAYLOAD)
+
+    await asyncio.sleep(0.05)
+
+    assert outbox.counts() == {"pending": 3}
+    assert outbox.metrics()["buffered"] == 0
+    await outbox.stop()
+
+
+@pytest.mark.asyncio
+async def test_whatsapp_service_records_every_send(outbox, retry_queue):
+    """Test: WhatsAppService registra el envío y los fallos 5xx van a reintentos."""
+    responses = iter([
+        httpx.Response(200, json={"messages": [{"id": "wamid.1"}]}),
+        httpx.Response(503, json={"error": {"message": "caído"}}),
+    ])
+
+    mock_settings = Mock()
+    mock_settings.whatsapp_access_token = "test_token"
+    mock_settings.whatsapp_phone_number_id = "123456"
+    mock_settings.whatsapp_api_version = "v18.0"
+    mock_settings.whatsapp_api_url = "https://graph.facebook.com"
+    mock_settings.whatsapp_verify_token = "token"
+    mock_settings.whatsapp_rate_limit_enabled = False
+
+    with patch('src.infrastructure.external.whatsapp_service.settings', mock_settings):
+        from src.infrastructure.external.whatsapp_service import WhatsAppService
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: next(responses)))
+        service = WhatsAppService(http_client=client, outbox=outbox)
+
+        await service.send_message("584121234567", "Hola")
+        with pytest.raises(httpx.HTTPStatusError):
+            await service.send_interactive_button(
+                "584121234567", "¿Confirmas?", [{"id": "yes", "title": "Sí"}]
+            )
+        await client.aclose()
+
+    await outbox.flush()
+    assert outbox.counts() == {"sent": 1, "retrying": 1}
+
+    with retry_queue._lock:
+        retry_queue._conn.execute("UPDATE retry_messages SET next_retry = 0")
+    claimed = retry_queue.claim_messages_to_retry(limit=10)
+    assert claimed[0].payload["type"] == "interactive"
+    assert claimed[0].message == "¿Confirmas?"
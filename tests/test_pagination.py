@@ -0,0 +1,58 @@
+"""
+Tests para la paginación por cursor (keyset).
+"""
+import pytest
+from src.infrastructure.database.pagination import (
+    encode_cursor,
+    decode_cursor,
+    keyset_filter,
+    next_cursor
+)
+
+
+def test_cursor_round_trip():
+    """Test: Un cursor codificado se decodifica a los mismos valores."""
+    cursor = encode_cursor("2026-01-29T08:14:13.123456+00:00", 42)
+
+    assert decode_cursor(cursor) == ("2026-01-29T08:14:13.123456+00:00", 42)
+
+
+def test_cursor_is_opaque_and_url_safe():
+    """Test: El cursor no expone el timestamp ni usa caracteres reservados."""
+    cursor = encode_cursor("2026-01-29T08:14:13+00:00", "b1c2d3e4-uuid")
+
+    assert "2026" not in cursor
+    assert not set(cursor) & set("+/=&?")
+
+
+def test_invalid_cursor_raises_value_error():
+    """Test: Un cursor malformado lanza ValueError."""
+    with pytest.raises(ValueError):
+        decode_cursor("esto-no-es-un-cursor")
+
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor("2026-01-29", 1)[:-3])
+
+
+def test_keyset_filter_compares_created_at_then_id():
+    """Test: El filtro PostgREST desempata por id con el mismo created_at."""
+    cursor = encode_cursor("2026-01-29T08:14:13+00:00", 7)
+
+    assert keyset_filter(cursor) == (
+        'created_at.lt."2026-01-29T08:14:13+00:00",'
+        'and(created_at.eq."2026-01-29T08:14:13+00:00",id.lt."7")'
+    )
+
+
+def test_next_cursor_only_when_extra_row_present():
+    """Test: Solo hay siguiente página si llegó la fila extra (limit + 1)."""
+    rows = [
+        {"id": 3, "created_at": "2026-01-03T00:00:00+00:00"},
+        {"id": 2, "created_at": "2026-01-02T00:00:00+00:00"},
+        {"id": 1, "created_at": "2026-01-01T00:00:00+00:00"},
+    ]
+
+    assert next_cursor(rows[:2], limit=2) is None
+
+    cursor = next_cursor(rows, limit=2)
+    assert decode_cursor(cursor) == ("2026-01-02T00:00:00+00:00", 2)
@@ -0,0 +1,111 @@
+"""
+Tests para PDFRenderPool.
+"""
+import asyncio
+import os
+import time
+import pytest
+from src.infrastructure.services.invoice_service import InvoiceService
+from src.infrastructure.services.pdf_render_pool import PDFRenderPool
+
+
+def _slow(seconds: float) -> str:
+    time.sleep(seconds)
+    return "listo"
+
+
+def _fail():
+    raise ValueError("plantilla rota")
+
+
+@pytest.mark.asyncio
+async def test_renders_in_child_process(tmp_path):
+    """Test: El PDF se genera en otro proceso y el resultado vuelve por el future."""
+    pool = PDFRenderPool(workers=1, timeout=30)
+    invoice_service = InvoiceService(output_dir=str(tmp_path))
+    quote_data = {
+        "id": 7,
+        "client_phone": "584121234567",
+        "items": [{"product_name": "Camisa", "quantity": 2, "unit_price": 10.0, "subtotal": 20.0}],
+        "total": 20.0
+    }
+
+    try:
+        pid = await pool.run(os.getpid)
+        pdf_path = await pool.run(invoice_service.generate_invoice_pdf, quote_data)
+    finally:
+        await pool.close()
+
+    assert pid != os.getpid()
+    assert open(pdf_path, "rb").read(4) == b"%PDF"
+    metrics = pool.metrics()
+    assert metrics["completed"] == 2
+    assert metrics["pending"] == 0
+    assert metrics["render_ms"]["max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_event_loop_keeps_running_while_rendering():
+    """Test: Un render lento no bloquea las demás corrutinas."""
+    pool = PDFRenderPool(workers=1, use_processes=False)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    assert await pool.run(_slow, 0.2) == "listo"
+    task.cancel()
+    await pool.close()
+
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_is_full():
+    """Test: Con max_pending renders pendientes el siguiente se rechaza de inmediato."""
+    pool = PDFRenderPool(workers=1, max_pending=2, use_processes=False)
+    first = pool.submit(_slow, 0.1)
+    second = pool.submit(_slow, 0.1)
+
+    with pytest.raises(asyncio.QueueFull):
+        pool.submit(_slow, 0.1)
+
+    assert await asyncio.gather(first, second) == ["listo", "listo"]
+    assert pool.metrics()["rejected"] == 1
+    assert pool.submit(_slow, 0) is not None
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_timeout_keeps_slot_until_render_finishes():
+    """Test: Un render que excede el timeout falla y su lugar se libera al terminar."""
+    pool = PDFRenderPool(workers=1, max_pending=1, timeout=0.05, use_processes=False)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.run(_slow, 0.2)
+
+    assert pool.metrics()["timeouts"] == 1
+    with pytest.raises(asyncio.QueueFull):
+        pool.submit(_slow, 0)
+
+    await pool.close()
+    assert pool.metrics()["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failures_are_raised_and_counted():
+    """Test: El error del render llega a quien espera y se cuenta."""
+    pool = PDFRenderPool(workers=1, use_processes=False)
+
+    with pytest.raises(ValueError):
+        await pool.run(_fail)
+
+    metrics = pool.metrics()
+    assert metrics["failed"] == 1
+    assert metrics["pending"] == 0
+    assert metrics["render_ms"] is None
+    await pool.close()
@@ -0,0 +1,30 @@
+"""
+Tests para la consulta de historial de cotizaciones por teléfono.
+"""
+import pytest
+from src.application.use_cases import GetQuotesByPhoneUseCase
+
+
+class FakePhoneRepository:
+    def __init__(self):
+        self.calls = []
+
+    async def get_by_phone(self, client_phone):
+        self.calls.append(("all", client_phone))
+        return []
+
+    async def get_latest_by_phone(self, client_phone, limit=1):
+        self.calls.append(("latest", client_phone, limit))
+        return []
+
+
+@pytest.mark.asyncio
+async def test_limit_uses_indexed_latest_lookup():
+    """Test: Con limit se usa get_latest_by_phone en vez de traer todo el historial."""
+    repository = FakePhoneRepository()
+    use_case = GetQuotesByPhoneUseCase(repository)
+
+    await use_case.execute("584121234567", limit=1)
+    await use_case.execute("584121234567")
+
+    assert repository.calls == [("latest", "584121234567", 1), ("all", "584121234567")]
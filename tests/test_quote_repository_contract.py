@@ -0,0 +1,195 @@
+"""
+Tests de contrato para las implementaciones de QuoteRepository.
+
+Se ejecutan contra una base de datos real, por eso se saltan si no está
+configurada:
+- asyncpg: TEST_DATABASE_URL=postgresql://... (esquema de migrations/ aplicado)
+- supabase: SUPABASE_CONTRACT_TESTS=1 (usa SUPABASE_URL / SUPABASE_KEY del entorno)
+"""
+import os
+import uuid
+import pytest
+import pytest_asyncio
+from src.domain.entities.quote import Quote, QuoteItem, QuoteStatus
+
+
+BACKENDS = [
+    pytest.param(
+        "asyncpg",
+        marks=pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL no configurada")
+    ),
+    pytest.param(
+        "supabase",
+        marks=pytest.mark.skipif(not os.getenv("SUPABASE_CONTRACT_TESTS"), reason="SUPABASE_CONTRACT_TESTS no activado")
+    ),
+]
+
+
+@pytest_asyncio.fixture(params=BACKENDS)
+async def repository(request):
+    """Instanciar el repositorio para cada backend disponible."""
+    if request.param == "asyncpg":
+        from src.infrastructure.database.asyncpg_quote_repository import AsyncpgQuoteRepository
+        repo = AsyncpgQuoteRepository(dsn=os.environ["TEST_DATABASE_URL"])
+    else:
+        from src.infrastructure.database.supabase_quote_repository import SupabaseQuoteRepository
+        repo = SupabaseQuoteRepository()
+
+    yield repo
+
+    if hasattr(repo, "close"):
+        await repo.close()
+
+
+@pytest.fixture
+def client_phone():
+    """Teléfono único por test para no mezclar datos entre ejecuciones."""
+    return f"+58 {uuid.uuid4().int % 10**10:010d}"
+
+
+def _quote(client_phone: str, quantity: int = 2) -> Quote:
+    return Quote(
+        client_phone=client_phone,
+        items=[QuoteItem(product_name="Zapatos", quantity=quantity, unit_price=45.99,
+                         subtotal=round(quantity * 45.99, 2))],
+        total=round(quantity * 45.99, 2),
+        notes="contract-test"
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_and_get_by_id(repository, client_phone):
+    """Test: Crear asigna ID y get_by_id devuelve la misma cotización."""
+    created = await repository.create(_quote(client_phone))
+    try:
+        assert created.id is not None
+        assert created.created_at is not None
+
+        fetched = await repository.get_by_id(created.id)
+        assert fetched.client_phone == client_phone
+        assert fetched.total == pytest.approx(91.98)
+        assert fetched.items[0].product_name == "Zapatos"
+        assert fetched.status == QuoteStatus.DRAFT
+    finally:
+        await repository.delete(created.id)
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete(repository, client_phone):
+    """Test: Actualizar reemplaza los datos y eliminar retorna True una sola vez."""
+    created = await repository.create(_quote(client_phone))
+
+    changed = _quote(client_phone, quantity=3)
+    changed.status = QuoteStatus.APPROVED
+    updated = await repository.update(created.id, changed)
+
+    assert updated.total == pytest.approx(137.97)
+    assert updated.status == QuoteStatus.APPROVED
+
+    assert await repository.delete(created.id) is True
+    assert await repository.delete(created.id) is False
+    assert await repository.get_by_id(created.id) is None
+
+
+@pytest.mark.asyncio
+async def test_get_by_phone_newest_first(repository, client_phone):
+    """Test: get_by_phone retorna las cotizaciones más recientes primero."""
+    first = await repository.create(_quote(client_phone))
+    second = await repository.create(_quote(client_phone))
+    try:
+        quotes = await repository.get_by_phone(client_phone)
+        assert [q.id for q in quotes] == [second.id, first.id]
+    finally:
+        await repository.delete(first.id)
+        await repository.delete(second.id)
+
+
+@pytest.mark.asyncio
+async def test_get_page_walks_without_gaps(repository, client_phone):
+    """Test: Encadenar cursores recorre las filas sin duplicados ni saltos."""
+    created = [await repository.create(_quote(client_phone)) for _ in range(3)]
+    try:
+        seen = []
+        cursor = None
+        for _ in range(50):
+            page, cursor = await repository.get_page(limit=2, cursor=cursor)
+            seen.extend(q.id for q in page)
+            if not cursor or all(q.id in seen for q in created):
+                break
+
+        assert len(seen) == len(set(seen))
+        ours = [q_id for q_id in seen if q_id in {q.id for q in created}]
+        assert ours == sorted(ours, reverse=True)
+        assert len(ours) == 3
+    finally:
+        for quote in created:
+            await repository.delete(quote.id)
+
+
+@pytest.mark.asyncio
+async def test_get_page_rejects_invalid_cursor(repository):
+    """Test: Un cursor inválido lanza ValueError en todas las implementaciones."""
+    with pytest.raises(ValueError):
+        await repository.get_page(limit=1, cursor="no-es-un-cursor")
+
+
+@pytest.mark.asyncio
+async def test_get_summary_page_matches_get_page(repository, client_phone):
+    """Test: La proyección resumida devuelve las mismas filas que get_page, sin items."""
+    created = [await repository.create(_quote(client_phone)) for _ in range(2)]
+    try:
+        quotes, quotes_cursor = await repository.get_page(limit=5)
+        summaries, summaries_cursor = await repository.get_summary_page(limit=5)
+
+        assert [s.id for s in summaries] == [q.id for q in quotes]
+        assert summaries_cursor == quotes_cursor
+        assert not hasattr(summaries[0], "items")
+        assert summaries[0].total == pytest.approx(quotes[0].total)
+    finally:
+        for quote in created:
+            await repository.delete(quote.id)
+
+
+@pytest.mark.asyncio
+async def test_update_status_bulk_by_ids_and_filter(repository, client_phone):
+    """Test: El cambio masivo respeta IDs, filtro de estado y límite."""
+    created = [await repository.create(_quote(client_phone)) for _ in range(3)]
+    ids = [q.id for q in created]
+    try:
+        assert await repository.update_status_bulk("pending", quote_ids=ids[:2]) == 2
+        assert await repository.update_status_bulk(
+            "expired", quote_ids=ids, current_status="draft"
+        ) == 1
+        assert await repository.update_status_bulk(
+            "approved", quote_ids=ids, current_status="pending", limit=1
+        ) == 1
+
+        statuses = [(await repository.get_by_id(quote_id)).status for quote_id in ids]
+        assert sorted(statuses) == ["approved", "expired", "pending"]
+
+        with pytest.raises(ValueError):
+            await repository.update_status_bulk("approved")
+    finally:
+        for quote_id in ids:
+            await repository.delete(quote_id)
+
+
+@pytest.mark.asyncio
+async def test_get_latest_by_phone_and_batch(repository, client_phone):
+    """Test: Las últimas N por teléfono, individual y por lotes, coinciden."""
+    other_phone = f"+58 {uuid.uuid4().int % 10**10:010d}"
+    created = [await repository.create(_quote(client_phone)) for _ in range(3)]
+    other = await repository.create(_quote(other_phone))
+    try:
+        latest = await repository.get_latest_by_phone(client_phone, limit=2)
+        assert [q.id for q in latest] == [created[2].id, created[1].id]
+
+        batch = await repository.get_latest_by_phones([client_phone, other_phone, "+58 0000000001"])
+        assert set(batch) == {client_phone, other_phone}
+        assert [q.id for q in batch[client_phone]] == [created[2].id]
+        assert [q.id for q in batch[other_phone]] == [other.id]
+
+        assert await repository.get_latest_by_phones([]) == {}
+    finally:
+        for quote in created + [other]:
+            await repository.delete(quote.id)
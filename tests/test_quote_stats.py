@@ -0,0 +1,83 @@
+"""
+Tests para QuoteStatsRepository (agregados de ventas).
+"""
+import pytest
+from types import SimpleNamespace
+from datetime import date, datetime, timezone
+from unittest.mock import patch
+from src.infrastructure.database.quote_stats_repository import QuoteStatsRepository, stats_since
+
+
+class FakeQuery:
+    """Imita el query builder de PostgREST y registra los filtros."""
+
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.log.append((name, args))
+            return self
+        return method
+
+    async def execute(self):
+        return SimpleNamespace(data=self.rows)
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.log = []
+
+    def table(self, name):
+        self.log.append(("table", (name,)))
+        return FakeQuery(self.rows, self.log)
+
+
+PRODUCT_ROWS = [
+    {"product_name": "Zapatos", "status": "approved", "quotes_count": 3, "quantity": 5, "revenue": 229.95},
+    {"product_name": "Zapatos", "status": "draft", "quotes_count": 1, "quantity": 1, "revenue": 45.99},
+    {"product_name": "Camisa", "status": "approved", "quotes_count": 4, "quantity": 8, "revenue": 120},
+]
+
+
+@pytest.mark.asyncio
+async def test_top_products_unfiltered_reads_per_product_view():
+    """Test: Sin estado, el ranking se ordena y limita en la vista por producto."""
+    client = FakeClient([{"product_name": "Zapatos", "quotes_count": 4, "quantity": 6, "revenue": 275.94}])
+    repository = QuoteStatsRepository(client)
+
+    top = await repository.get_top_products(limit=1)
+
+    assert top[0]["product_name"] == "Zapatos"
+    assert ("table", ("quote_stats_products_total",)) in client.log
+    assert ("order", ("revenue",)) in client.log
+    assert ("limit", (1,)) in client.log
+
+
+@pytest.mark.asyncio
+async def test_top_products_by_status_is_ordered_in_database():
+    """Test: Con estado, el orden y el límite se delegan a la vista indexada."""
+    client = FakeClient(PRODUCT_ROWS[:1])
+    repository = QuoteStatsRepository(client)
+
+    await repository.get_top_products(limit=5, status="approved")
+
+    assert ("eq", ("status", "approved")) in client.log
+    assert ("order", ("revenue",)) in client.log
+    assert ("limit", (5,)) in client.log
+
+
+def test_stats_since_uses_caracas_date():
+    """Test: Pasada la medianoche UTC la serie sigue terminando en el día de Caracas."""
+    utc_now = datetime(2026, 3, 2, 2, 30, tzinfo=timezone.utc)  # 1 de marzo, 22:30 en Caracas
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return utc_now.astimezone(tz)
+
+    with patch("src.infrastructure.database.quote_stats_repository.datetime", FrozenDatetime):
+        assert stats_since(1) == date(2026, 3, 1)
+        assert stats_since(30) == date(2026, 1, 31)
@@ -0,0 +1,79 @@
+"""
+Tests para el cambio de estado masivo y la expiración de borradores.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from src.application.use_cases import BulkUpdateQuoteStatusUseCase, ExpireDraftQuotesUseCase
+from src.infrastructure.services.periodic_job import PeriodicJob
+
+
+class FakeStatusRepository:
+    """Simula `pending` borradores vencidos que se expiran por lotes."""
+
+    def __init__(self, pending: int = 0):
+        self.pending = pending
+        self.calls = []
+
+    async def update_status_bulk(self, new_status, quote_ids=None, current_status=None,
+                                 created_before=None, limit=None):
+        self.calls.append({
+            "new_status": new_status,
+            "quote_ids": quote_ids,
+            "current_status": current_status,
+            "created_before": created_before,
+            "limit": limit,
+        })
+        updated = min(self.pending, limit) if limit else len(quote_ids or [])
+        self.pending -= updated if limit else 0
+        return updated
+
+
+@pytest.mark.asyncio
+async def test_expire_drafts_runs_in_batches():
+    """Test: La expiración recorre lotes hasta que uno viene incompleto."""
+    repository = FakeStatusRepository(pending=1050)
+    use_case = ExpireDraftQuotesUseCase(repository, max_age=timedelta(days=30), batch_size=500)
+
+    expired = await use_case.execute()
+
+    assert expired == 1050
+    assert len(repository.calls) == 3
+    assert {call["new_status"] for call in repository.calls} == {"expired"}
+    assert {call["current_status"] for call in repository.calls} == {"draft"}
+    cutoff = repository.calls[0]["created_before"]
+    assert datetime.now(timezone.utc) - cutoff >= timedelta(days=30)
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_by_ids():
+    """Test: Cambiar estado por IDs llega al repositorio en una sola llamada."""
+    repository = FakeStatusRepository()
+
+    updated = await BulkUpdateQuoteStatusUseCase(repository).execute("approved", quote_ids=[1, 2, 3])
+
+    assert updated == 3
+    assert repository.calls[0]["quote_ids"] == [1, 2, 3]
+    assert repository.calls[0]["limit"] is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_requires_filter_and_valid_status():
+    """Test: Sin IDs ni filtro, o con un estado inexistente, se rechaza."""
+    use_case = BulkUpdateQuoteStatusUseCase(FakeStatusRepository())
+
+    with pytest.raises(ValueError):
+        await use_case.execute("approved")
+
+    with pytest.raises(ValueError):
+        await use_case.execute("archivada", quote_ids=[1])
+
+
+@pytest.mark.asyncio
+async def test_job_run_once_swallows_errors():
+    """Test: Un error en una pasada no detiene el job."""
+    async def failing_action():
+        raise RuntimeError("db caída")
+
+    job = PeriodicJob("test", failing_action, interval_seconds=60)
+
+    assert await job.run_once() is None
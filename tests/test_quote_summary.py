@@ -0,0 +1,47 @@
+"""
+Tests para la proyección resumida de cotizaciones.
+"""
+import pytest
+from src.application.use_cases import ListQuoteSummariesUseCase
+from src.domain.entities.quote import QuoteStatus, QuoteSummary
+from src.infrastructure.database.supabase_quote_repository import SupabaseQuoteRepository
+
+
+class FakeSummaryRepository:
+    def __init__(self):
+        self.calls = []
+
+    async def get_summary_page(self, limit, cursor=None, status=None):
+        self.calls.append((limit, cursor, status))
+        return [], None
+
+
+def test_dict_to_summary_prefers_customer_name():
+    """Test: El resumen usa el nombre del CRM y no necesita la columna items."""
+    repository = SupabaseQuoteRepository(client=object())
+
+    summary = repository._dict_to_summary({
+        "id": 7,
+        "client_phone": "+58 412-1234567",
+        "client_name": "Nombre viejo",
+        "total": "91.98",
+        "status": "approved",
+        "created_at": "2026-01-29T08:14:13.123456Z",
+        "customers": {"full_name": "Ana Pérez"}
+    })
+
+    assert isinstance(summary, QuoteSummary)
+    assert summary.client_name == "Ana Pérez"
+    assert summary.total == 91.98
+    assert summary.status == QuoteStatus.APPROVED.value
+    assert summary.created_at.tzinfo is not None
+
+
+@pytest.mark.asyncio
+async def test_list_summaries_caps_limit():
+    """Test: El caso de uso limita la página a 100 registros."""
+    repository = FakeSummaryRepository()
+
+    await ListQuoteSummariesUseCase(repository).execute(limit=500, status="draft")
+
+    assert repository.calls == [(100, None, "draft")]
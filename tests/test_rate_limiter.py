@@ -0,0 +1,119 @@
+"""
+Tests para GraphRateLimiter (token buckets y backoff ante 429).
+"""
+import httpx
+import pytest
+from unittest.mock import patch
+from src.infrastructure.external.rate_limiter import GraphRateLimiter, TokenBucket
+from tests.test_whatsapp_service import mock_settings
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_reserves_in_arrival_order():
+    """Test: Sin tokens, cada reserva espera un intervalo más que la anterior."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=2, clock=clock)
+
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+
+    clock.now = 10.0
+    assert bucket.reserve() == 0.0
+
+
+@pytest.mark.asyncio
+async def test_recipient_bucket_throttles_only_that_recipient():
+    """Test: Superar la ráfaga de un destinatario no frena a los demás."""
+    clock = FakeClock()
+    limiter = GraphRateLimiter(rate=100, burst=100, recipient_rate=1000, recipient_burst=2, clock=clock)
+
+    await limiter.acquire("a")
+    await limiter.acquire("a")
+    await limiter.acquire("b")
+    assert limiter.metrics()["throttled"] == 0
+
+    await limiter.acquire("a")
+    metrics = limiter.metrics()
+    assert metrics["throttled"] == 1
+    assert metrics["throttle_wait_seconds"] == pytest.approx(0.001)
+
+
+def test_rate_limited_pauses_and_halves_rate_then_recovers():
+    """Test: Un 429 pausa según Retry-After, baja la tasa y los éxitos la recuperan."""
+    clock = FakeClock()
+    limiter = GraphRateLimiter(rate=80, burst=80, clock=clock)
+
+    assert limiter.on_rate_limited("a", retry_after=7) == 7
+    metrics = limiter.metrics()
+    assert metrics["paused_for"] == 7
+    assert metrics["current_rate"] == 40
+    assert metrics["rate_limited"] == 1
+
+    assert limiter.on_rate_limited("a", attempt=2) == 4.0
+
+    for _ in range(30):
+        limiter.on_success()
+    assert limiter.metrics()["current_rate"] == 80
+
+
+def test_pair_rate_limit_pauses_only_recipient():
+    """Test: Un 131056 pausa al destinatario sin tocar la tasa global."""
+    clock = FakeClock()
+    limiter = GraphRateLimiter(clock=clock)
+
+    limiter.on_rate_limited("a", retry_after=6, pair=True)
+
+    metrics = limiter.metrics()
+    assert metrics["pair_rate_limited"] == 1
+    assert metrics["paused_for"] == 0
+    assert metrics["current_rate"] == 80
+
+
+@pytest.mark.asyncio
+async def test_whatsapp_service_retries_after_rate_limit():
+    """Test: El servicio reintenta tras un 130429 y registra el throttling."""
+    responses = [
+        httpx.Response(400, json={"error": {"code": 130429, "message": "Rate limit hit"}},
+                       headers={"Retry-After": "0"}),
+        httpx.Response(200, json={"messages": [{"id": "wamid.1"}]}),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return responses.pop(0)
+
+    with patch('src.infrastructure.external.whatsapp_service.settings', mock_settings):
+        from src.infrastructure.external.whatsapp_service import WhatsAppService
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        limiter = GraphRateLimiter()
+        service = WhatsAppService(http_client=client, rate_limiter=limiter)
+
+        result = await service.send_message("584121234567", "Hola")
+        await client.aclose()
+
+    assert result["messages"][0]["id"] == "wamid.1"
+    assert limiter.metrics()["rate_limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_whatsapp_service_raises_when_retries_exhausted():
+    """Test: Agotados los reintentos el 429 se propaga como HTTPStatusError."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(429, headers={"Retry-After": "0"}, json={"error": {"code": 4}})
+
+    with patch('src.infrastructure.external.whatsapp_service.settings', mock_settings):
+        from src.infrastructure.external.whatsapp_service import WhatsAppService
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        limiter = GraphRateLimiter(max_retries=2)
+        service = WhatsAppService(http_client=client, rate_limiter=limiter)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await service.send_message("584121234567", "Hola")
+        await client.aclose()
+
+    assert limiter.metrics()["rate_limited"] == 2
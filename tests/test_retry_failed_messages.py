@@ -0,0 +1,102 @@
+"""
+Tests para RetryFailedMessagesUseCase (vaciado concurrente de la cola).
+"""
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from src.application.use_cases.whatsapp_use_cases import RetryFailedMessagesUseCase
+from src.infrastructure.external.sqlite_retry_queue import SQLiteRetryQueue
+
+
+class FakeWhatsApp:
+    def __init__(self, fail_to=()):
+        self.fail_to = set(fail_to)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_message(self, to, message):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if to in self.fail_to:
+            raise RuntimeError("graph down")
+        return {"messages": [{"id": "wamid.x"}]}
+
+    async def resend(self, payload):
+        self.resent = getattr(self, "resent", []) + [payload]
+        return {"messages": [{"id": "wamid.resent"}]}
+
+
+class CountingQueue(SQLiteRetryQueue):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.persist_calls = 0
+
+    def record_attempts(self, outcomes):
+        self.persist_calls += 1
+        super().record_attempts(outcomes)
+
+
+@pytest.fixture
+def retry_queue(tmp_path):
+    queue = CountingQueue(db_file=str(tmp_path / "retry.db"))
+    for i in range(10):
+        queue.add_message(f"msg_{i}", f"to_{i}", "Hola")
+    with queue._lock:
+        queue._conn.execute(
+            "UPDATE retry_messages SET next_retry = ?",
+            ((datetime.now() - timedelta(minutes=1)).timestamp(),)
+        )
+    yield queue
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_drains_concurrently_and_persists_once(retry_queue):
+    """Test: Los envíos corren en paralelo hasta el límite y se guardan en un solo paso."""
+    whatsapp = FakeWhatsApp(fail_to={"to_3"})
+    use_case = RetryFailedMessagesUseCase(whatsapp, retry_queue, concurrency=4)
+
+    report = await use_case.execute()
+
+    assert whatsapp.max_in_flight == 4
+    assert retry_queue.persist_calls == 1
+    assert report["successful"] == 9
+    assert report["failed"] == 1
+    assert set(report["send_ms"]) == {"p50", "p90", "p99", "max"}
+    assert retry_queue.get_queue_size() == 1
+    assert retry_queue.claim_messages_to_retry() == []
+
+
+@pytest.mark.asyncio
+async def test_batch_size_limits_one_execution(retry_queue):
+    """Test: Cada ejecución toma a lo sumo batch_size mensajes."""
+    use_case = RetryFailedMessagesUseCase(FakeWhatsApp(), retry_queue, batch_size=6)
+
+    first = await use_case.execute()
+    second = await use_case.execute()
+
+    assert (first["messages_retried"], second["messages_retried"]) == (6, 4)
+    assert retry_queue.get_queue_size() == 0
+
+
+@pytest.mark.asyncio
+async def test_messages_with_payload_are_resent_as_is(tmp_path):
+    """Test: Los mensajes del outbox se reenvían con su payload y se marcan enviados."""
+    payload = {"to": "584121234567", "type": "interactive", "interactive": {"body": {"text": "¿Confirmas?"}}}
+    queue = SQLiteRetryQueue(db_file=str(tmp_path / "retry.db"))
+    queue.add_message("entry_1", "584121234567", "¿Confirmas?", payload=payload)
+    with queue._lock:
+        queue._conn.execute("UPDATE retry_messages SET next_retry = 0")
+
+    whatsapp = FakeWhatsApp()
+    sent = []
+    outbox = type("FakeOutbox", (), {"mark_sent": lambda self, *args: sent.append(args)})()
+    report = await RetryFailedMessagesUseCase(whatsapp, queue, outbox=outbox).execute()
+
+    assert report["successful"] == 1
+    assert whatsapp.resent == [payload]
+    assert sent == [("entry_1", "wamid.resent")]
+    assert queue.get_queue_size() == 0
+    queue.close()
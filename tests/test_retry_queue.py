@@ -3,6 +3,7 @@ Tests para RetryQueue.
 """
 import pytest
 import json
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
 from src.infrastructure.external.retry_queue import RetryQueue, RetryMessage
@@ -90,26 +91,41 @@ def test_update_message_attempt_failure(retry_queue):
     assert queue[0].last_error == "Connection timeout"
 
 
-def test_exponential_backoff(retry_queue):
-    """Test: Backoff exponencial en reintentos."""
+def test_exponential_backoff(temp_queue_file):
+    """Test: El techo del backoff se duplica en cada fallo (jitter al máximo)."""
+    retry_queue = RetryQueue(queue_file=temp_queue_file, rng=lambda: 1.0)
     retry_queue.add_message(
         message_id="msg_123",
         to="1234567890",
         message="Test message"
     )
     
-    # Primer fallo: 2^1 = 2 minutos
+    # Primer fallo: hasta 2^1 = 2 minutos
+    before = datetime.now()
     retry_queue.update_message_attempt("msg_123", success=False)
     queue = retry_queue._load_queue()
-    next_retry_1 = datetime.fromisoformat(queue[0].next_retry)
+    delay_1 = datetime.fromisoformat(queue[0].next_retry) - before
     
-    # Segundo fallo: 2^2 = 4 minutos
+    # Segundo fallo: hasta 2^2 = 4 minutos
+    before = datetime.now()
     retry_queue.update_message_attempt("msg_123", success=False)
     queue = retry_queue._load_queue()
-    next_retry_2 = datetime.fromisoformat(queue[0].next_retry)
+    delay_2 = datetime.fromisoformat(queue[0].next_retry) - before
     
-    # El segundo reintento debe ser más tarde que el primero
-    assert next_retry_2 > next_retry_1
+    assert timedelta(minutes=2) <= delay_1 < timedelta(minutes=2, seconds=5)
+    assert timedelta(minutes=4) <= delay_2 < timedelta(minutes=4, seconds=5)
+
+
+def test_backoff_jitter_spreads_retries(temp_queue_file):
+    """Test: Con jitter la espera queda entre 0 y el techo."""
+    retry_queue = RetryQueue(queue_file=temp_queue_file, rng=lambda: 0.25)
+    retry_queue.add_message("msg_123", "1234567890", "Test message")
+    
+    before = datetime.now()
+    retry_queue.update_message_attempt("msg_123", success=False)
+    delay = datetime.fromisoformat(retry_queue._load_queue()[0].next_retry) - before
+    
+    assert timedelta(seconds=30) <= delay < timedelta(seconds=35)
 
 
 def test_get_failed_messages(retry_queue):
@@ -129,6 +145,29 @@ def test_get_failed_messages(retry_queue):
     assert len(failed) == 1
     assert failed[0].id == "msg_123"
     assert failed[0].attempts == 2
+    # Sale de la cola principal
+    assert retry_queue.get_queue_size() == 0
+    assert retry_queue.stats()["dead_letters"] == 1
+
+
+def test_compact_moves_legacy_exhausted_and_purges_old(retry_queue):
+    """Test: La compactación mueve agotados antiguos y purga dead letters vencidos."""
+    retry_queue.add_message("msg_old", "123", "Test", max_attempts=1)
+    retry_queue.add_message("msg_new", "456", "Test")
+    queue = retry_queue._load_queue()
+    queue[0].attempts = 1  # agotado en una cola previa a dead letters
+    queue[0].created_at = (datetime.now() - timedelta(days=60)).isoformat()
+    retry_queue._save_queue(queue)
+    
+    assert retry_queue.compact(retention_days=30) == {"moved_to_dead_letters": 1, "purged": 0}
+    assert retry_queue.get_queue_size() == 1
+    
+    dead = retry_queue._load_dead_letters()
+    dead[0].dead_at = (datetime.now() - timedelta(days=31)).isoformat()
+    retry_queue._save_dead_letters(dead)
+    
+    assert retry_queue.compact(retention_days=30) == {"moved_to_dead_letters": 0, "purged": 1}
+    assert retry_queue.get_failed_messages() == []
 
 
 def test_remove_message(retry_queue):
@@ -165,3 +204,45 @@ def test_duplicate_message_not_added(retry_queue):
     retry_queue.add_message("msg_123", "123", "Test")  # Duplicado
     
     assert retry_queue.get_queue_size() == 1
+
+
+def test_claim_messages_to_retry_leases_due_messages(retry_queue):
+    """Test: Los mensajes tomados no vuelven a salir en la siguiente pasada."""
+    retry_queue.add_message("msg_1", "123", "Test 1")
+    retry_queue.add_message("msg_2", "456", "Test 2")
+
+    queue = retry_queue._load_queue()
+    queue[0].next_retry = (datetime.now() - timedelta(minutes=5)).isoformat()
+    retry_queue._save_queue(queue)
+
+    claimed = retry_queue.claim_messages_to_retry()
+
+    assert [msg.id for msg in claimed] == ["msg_1"]
+    assert retry_queue.claim_messages_to_retry() == []
+
+
+def test_compact_in_thread_does_not_lose_messages(retry_queue):
+    """Test: compact() en un hilo no pisa los mensajes que se agregan a la vez."""
+    text = "Hola " * 50
+    for i in range(200):
+        retry_queue.add_message(f"old_{i}", "123", text)
+    stop = threading.Event()
+
+    def compact_loop():
+        while not stop.is_set():
+            retry_queue.compact(retention_days=30)
+
+    worker = threading.Thread(target=compact_loop)
+    worker.start()
+    try:
+        for i in range(50):
+            retry_queue.add_message(f"new_{i}", "123", text)
+            # Agotados: obligan a compact() a reescribir ambos archivos
+            retry_queue.add_message(f"dead_{i}", "123", text, max_attempts=0)
+    finally:
+        stop.set()
+        worker.join()
+    retry_queue.compact(retention_days=30)
+
+    assert retry_queue.get_queue_size() == 250
+    assert len(retry_queue.get_failed_messages()) == 50
@@ -0,0 +1,77 @@
+"""
+Tests para RetryScheduler (reintentos automáticos).
+"""
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from src.infrastructure.services.retry_scheduler import RetryScheduler
+
+
+class FakeQueue:
+    def __init__(self, due=None):
+        self.due = due
+        self.runs = 0
+
+    def next_retry_at(self):
+        return self.due
+
+    async def execute(self):
+        self.runs += 1
+        self.due = None
+        return {"messages_retried": 1}
+
+
+@pytest.mark.asyncio
+async def test_runs_when_queue_has_due_message_at_start():
+    """Test: Un mensaje ya vencido al iniciar se reintenta de inmediato."""
+    queue = FakeQueue(due=datetime.now() - timedelta(seconds=1))
+    scheduler = RetryScheduler(run=queue.execute, next_due=queue.next_retry_at, idle_interval=60)
+
+    scheduler.start()
+    await asyncio.sleep(0.05)
+    await scheduler.stop()
+
+    assert queue.runs == 1
+    assert scheduler.metrics()["last_result"] == {"messages_retried": 1}
+
+
+@pytest.mark.asyncio
+async def test_schedule_wakes_sleeping_scheduler():
+    """Test: Un vencimiento anunciado despierta al scheduler sin esperar idle_interval."""
+    queue = FakeQueue()
+    scheduler = RetryScheduler(run=queue.execute, next_due=queue.next_retry_at, idle_interval=60)
+
+    scheduler.start()
+    await asyncio.sleep(0.01)
+    assert queue.runs == 0
+
+    scheduler.schedule(datetime.now() + timedelta(milliseconds=30))
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+
+    assert queue.runs == 1
+    assert scheduler.metrics()["scheduled"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_run_is_retried_after_error_delay():
+    """Test: Si la ejecución falla se reprograma tras error_delay."""
+    calls = []
+
+    async def failing_run():
+        calls.append(datetime.now())
+        raise RuntimeError("db down")
+
+    scheduler = RetryScheduler(
+        run=failing_run,
+        next_due=lambda: datetime.now() - timedelta(seconds=1),
+        idle_interval=60,
+        error_delay=0.05
+    )
+
+    scheduler.start()
+    await asyncio.sleep(0.08)
+    await scheduler.stop()
+
+    assert len(calls) == 2
+    assert scheduler.metrics()["errors"] == 2
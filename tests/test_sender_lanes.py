@@ -0,0 +1,53 @@
+"""
+Tests para SenderLanes (un carril de ejecución por cliente).
+"""
+import asyncio
+import pytest
+from src.infrastructure.services.sender_lanes import SenderLanes
+
+
+@pytest.mark.asyncio
+async def test_same_sender_runs_in_order_and_others_in_parallel():
+    """Test: Un cliente se procesa de a un mensaje; clientes distintos se solapan."""
+    lanes = SenderLanes()
+    log = []
+    active = {"a": 0, "b": 0}
+    overlap = []
+
+    async def process(sender, n):
+        async with lanes.hold(sender):
+            active[sender] += 1
+            assert active[sender] == 1
+            overlap.append(sum(active.values()))
+            await asyncio.sleep(0.01)
+            log.append((sender, n))
+            active[sender] -= 1
+
+    await asyncio.gather(*(process(sender, n) for n in range(3) for sender in ("a", "b")))
+
+    assert [n for s, n in log if s == "a"] == [0, 1, 2]
+    assert [n for s, n in log if s == "b"] == [0, 1, 2]
+    assert max(overlap) == 2
+    assert lanes.metrics()["contended"] == 4
+
+
+@pytest.mark.asyncio
+async def test_idle_lanes_are_released():
+    """Test: Al terminar no queda ningún carril en memoria, aunque haya errores."""
+    lanes = SenderLanes()
+
+    async def ok(sender):
+        async with lanes.hold(sender):
+            await asyncio.sleep(0)
+
+    async def fail():
+        async with lanes.hold("x"):
+            raise RuntimeError("boom")
+
+    await asyncio.gather(*(ok(str(i)) for i in range(100)))
+    with pytest.raises(RuntimeError):
+        await fail()
+
+    metrics = lanes.metrics()
+    assert metrics["active_lanes"] == 0
+    assert metrics["max_active_lanes"] == 100
@@ -0,0 +1,144 @@
+"""
+Tests para SQLiteRetryQueue.
+"""
+import json
+import pytest
+from datetime import datetime, timedelta
+from src.infrastructure.external.sqlite_retry_queue import SQLiteRetryQueue
+
+
+@pytest.fixture
+def retry_queue(tmp_path):
+    """Crear instancia de SQLiteRetryQueue."""
+    queue = SQLiteRetryQueue(db_file=str(tmp_path / "retry.db"))
+    yield queue
+    queue.close()
+
+
+def _make_due(queue, message_id):
+    with queue._lock:
+        queue._conn.execute(
+            "UPDATE retry_messages SET next_retry = ? WHERE id = ?",
+            ((datetime.now() - timedelta(minutes=5)).timestamp(), message_id)
+        )
+
+
+def test_add_is_idempotent_and_round_trips_quote_data(retry_queue):
+    """Test: Los duplicados se ignoran y quote_data vuelve como dict."""
+    retry_queue.add_message("msg_1", "123", "Hola", quote_data={"total": 51.0})
+    retry_queue.add_message("msg_1", "123", "Hola")
+    _make_due(retry_queue, "msg_1")
+
+    messages = retry_queue.get_messages_to_retry()
+    assert retry_queue.get_queue_size() == 1
+    assert messages[0].to == "123"
+    assert messages[0].quote_data == {"total": 51.0}
+
+
+def test_claim_takes_due_messages_once(retry_queue):
+    """Test: Un mensaje tomado no se vuelve a tomar hasta que vence la reserva."""
+    for i in range(3):
+        retry_queue.add_message(f"msg_{i}", "123", "Hola")
+        _make_due(retry_queue, f"msg_{i}")
+
+    first = retry_queue.claim_messages_to_retry(limit=2)
+    second = retry_queue.claim_messages_to_retry(limit=2)
+
+    assert len(first) == 2
+    assert [msg.id for msg in second] == [
+        msg_id for msg_id in ("msg_0", "msg_1", "msg_2") if msg_id not in {m.id for m in first}
+    ]
+    assert retry_queue.claim_messages_to_retry() == []
+
+
+def test_failed_attempts_reach_max(retry_queue):
+    """Test: Al agotar los intentos el mensaje pasa a dead letters; el éxito lo remueve."""
+    retry_queue.add_message("msg_1", "123", "Hola", max_attempts=2)
+    retry_queue.add_message("msg_2", "456", "Hola")
+
+    retry_queue.update_message_attempt("msg_1", success=False, error="timeout")
+    retry_queue.update_message_attempt("msg_1", success=False, error="timeout")
+    retry_queue.update_message_attempt("msg_2", success=True)
+
+    failed = retry_queue.get_failed_messages()
+    assert [msg.id for msg in failed] == ["msg_1"]
+    assert failed[0].attempts == 2
+    assert failed[0].last_error == "timeout"
+    assert retry_queue.get_queue_size() == 0
+
+
+def test_imports_previous_json_queue(tmp_path):
+    """Test: La cola JSON anterior se importa una sola vez al crear la base."""
+    json_file = tmp_path / "retry_queue.json"
+    json_file.write_text(json.dumps([{
+        "id": "msg_1",
+        "to": "123",
+        "message": "Hola",
+        "quote_data": None,
+        "attempts": 1,
+        "max_attempts": 5,
+        "next_retry": (datetime.now() - timedelta(minutes=1)).isoformat(),
+        "created_at": datetime.now().isoformat(),
+        "last_error": "timeout"
+    }]), encoding="utf-8")
+
+    queue = SQLiteRetryQueue(db_file=str(tmp_path / "retry.db"), import_json=str(json_file))
+
+    assert [msg.id for msg in queue.get_messages_to_retry()] == ["msg_1"]
+
+    # Con la cola vacía, reabrirla no vuelve a importar lo ya entregado
+    queue.record_attempts([("msg_1", True, None)])
+    assert queue.get_queue_size() == 0
+    queue.close()
+
+    queue = SQLiteRetryQueue(db_file=str(tmp_path / "retry.db"), import_json=str(json_file))
+    assert queue.get_queue_size() == 0
+    queue.close()
+
+
+def test_exhausted_messages_move_to_dead_letters_and_stats(tmp_path):
+    """Test: Los agotados pasan a dead_letters y stats() cuenta todo en una consulta."""
+    queue = SQLiteRetryQueue(db_file=str(tmp_path / "retry.db"), rng=lambda: 0.0)
+    queue.add_message("msg_1", "123", "Hola", max_attempts=1)
+    queue.add_message("msg_2", "456", "Hola")
+    queue.add_message("msg_3", "789", "Hola")
+    queue.record_attempts([("msg_1", False, "timeout"), ("msg_2", False, "timeout")])
+
+    stats = queue.stats()
+    assert stats["queue_size"] == 2
+    assert stats["pending_retry"] == 1  # jitter 0: msg_2 vence de inmediato
+    assert stats["scheduled"] == 1
+    assert stats["dead_letters"] == 1
+
+    dead = queue.get_failed_messages(limit=10)
+    assert [msg.id for msg in dead] == ["msg_1"]
+    assert dead[0].dead_at is not None
+
+    with queue._lock:
+        queue._conn.execute("UPDATE dead_letters SET dead_at = 0")
+    assert queue.compact(retention_days=30) == {"moved_to_dead_letters": 0, "purged": 1}
+    queue.close()
+
+
+def test_malformed_json_queue_is_skipped(tmp_path):
+    """Test: Una entrada con fecha inválida no impide abrir la cola ni deja una transacción abierta."""
+    json_file = tmp_path / "retry_queue.json"
+    json_file.write_text(json.dumps([{
+        "id": "msg_1",
+        "to": "123",
+        "message": "Hola",
+        "quote_data": None,
+        "attempts": 0,
+        "max_attempts": 5,
+        "next_retry": "no-es-una-fecha",
+        "created_at": datetime.now().isoformat(),
+        "last_error": None
+    }]), encoding="utf-8")
+
+    queue = SQLiteRetryQueue(db_file=str(tmp_path / "retry.db"), import_json=str(json_file))
+
+    assert queue.get_queue_size() == 0
+    assert not queue._conn.in_transaction
+    queue.add_message("msg_2", "456", "Hola")
+    assert queue.get_queue_size() == 1
+    queue.close()
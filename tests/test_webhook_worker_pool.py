@@ -0,0 +1,82 @@
+"""
+Tests para WebhookWorkerPool (procesamiento de webhooks en segundo plano).
+"""
+import asyncio
+import pytest
+from src.infrastructure.services.webhook_worker_pool import WebhookWorkerPool
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_before_job_runs_and_stop_drains():
+    """Test: submit no espera el trabajo y stop procesa lo encolado antes de salir."""
+    pool = WebhookWorkerPool(workers=2)
+    pool.start()
+    done = []
+
+    async def job(n):
+        await asyncio.sleep(0.01)
+        done.append(n)
+
+    for n in range(5):
+        assert await pool.submit(lambda n=n: job(n)) is True
+    assert done == []
+
+    await pool.stop()
+    assert sorted(done) == [0, 1, 2, 3, 4]
+
+    metrics = pool.metrics()
+    assert metrics["processed"] == 5
+    assert metrics["queue_depth"] == 0
+    assert metrics["max_lag_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_after_timeout():
+    """Test: Con la cola llena submit retorna False para procesar en línea."""
+    pool = WebhookWorkerPool(workers=1, max_queue_size=1, enqueue_timeout=0.01)
+    pool.start()
+    release = asyncio.Event()
+
+    async def blocked():
+        await release.wait()
+
+    assert await pool.submit(blocked) is True
+    await asyncio.sleep(0)
+    assert await pool.submit(blocked) is True
+    assert await pool.submit(blocked) is False
+    assert pool.metrics()["rejected"] == 1
+
+    release.set()
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_counted_and_worker_keeps_running():
+    """Test: Un error en un trabajo no detiene al worker."""
+    pool = WebhookWorkerPool(workers=1)
+    pool.start()
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def ok():
+        return None
+
+    await pool.submit(fail)
+    await pool.submit(ok)
+    await pool.stop()
+
+    metrics = pool.metrics()
+    assert metrics["failed"] == 1
+    assert metrics["processed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_not_running_pool_rejects():
+    """Test: Sin start, submit retorna False (el webhook procesa en línea)."""
+    pool = WebhookWorkerPool()
+
+    async def ok():
+        return None
+
+    assert await pool.submit(ok) is False
@@ -1,6 +1,8 @@
 """
 Tests para WhatsAppService.
 """
+import json
+import httpx
 import pytest
 from unittest.mock import Mock, patch
 
@@ -12,6 +14,12 @@ mock_settings.whatsapp_access_token = "test_token"
 mock_settings.whatsapp_phone_number_id = "123456"
 mock_settings.whatsapp_api_version = "v18.0"
 mock_settings.whatsapp_api_url = "https://graph.facebook.com"
+mock_settings.whatsapp_http_timeout = 10.0
+mock_settings.whatsapp_http_connect_timeout = 5.0
+mock_settings.whatsapp_http_max_connections = 20
+mock_settings.whatsapp_http_max_keepalive = 10
+mock_settings.whatsapp_http_keepalive_expiry = 60.0
+mock_settings.whatsapp_rate_limit_enabled = False
 
 
 @pytest.fixture
@@ -122,6 +130,52 @@ def test_extract_message_data_no_messages(whatsapp_service):
     assert message_data is None
 
 
+def test_iter_webhook_events_reads_every_entry_and_status(whatsapp_service):
+    """Test: Se recorren todas las entradas, cambios, mensajes y estados."""
+    def text(sender, msg_id, body):
+        return {"from": sender, "id": msg_id, "timestamp": "1", "type": "text", "text": {"body": body}}
+
+    webhook_data = {
+        "entry": [
+            {"changes": [{
+                "value": {
+                    "contacts": [
+                        {"wa_id": "111", "profile": {"name": "Ana"}},
+                        {"wa_id": "222", "profile": {"name": "Beto"}}
+                    ],
+                    "messages": [text("111", "m1", "hola"), text("222", "m2", "precio"), text("111", "m3", "gracias")]
+                }
+            }]},
+            {"changes": [
+                {"value": {"messages": [{"from": "333", "id": "m4", "type": "image"}]}},
+                {"value": {"statuses": [{
+                    "id": "wamid.9",
+                    "status": "failed",
+                    "recipient_id": "111",
+                    "timestamp": "2",
+                    "errors": [{"code": 131026}]
+                }]}}
+            ]}
+        ]
+    }
+
+    events = list(whatsapp_service.iter_webhook_events(webhook_data))
+
+    messages = [e for e in events if e["kind"] == "message"]
+    assert [(m["from"], m["message_id"], m["name"]) for m in messages] == [
+        ("111", "m1", "Ana"), ("222", "m2", "Beto"), ("111", "m3", "Ana")
+    ]
+    statuses = [e for e in events if e["kind"] == "status"]
+    assert statuses == [{
+        "kind": "status",
+        "message_id": "wamid.9",
+        "status": "failed",
+        "recipient_id": "111",
+        "timestamp": "2",
+        "errors": [{"code": 131026}]
+    }]
+
+
 def test_format_quote_message(whatsapp_service):
     """Test: Formatear mensaje de cotización."""
     quote_data = {
@@ -149,3 +203,72 @@ def test_format_quote_message(whatsapp_service):
     assert "Camisa" in message
     assert "$117.48" in message
     assert "2 × $45.99 = $91.98" in message
+
+
+@pytest.mark.asyncio
+async def test_send_message_uses_injected_client():
+    """Test: Los envíos usan el cliente HTTP inyectado con el token en la cabecera."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"messages": [{"id": "wamid.1"}]})
+
+    with patch('src.infrastructure.external.whatsapp_service.settings', mock_settings):
+        from src.infrastructure.external.whatsapp_service import WhatsAppService
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        service = WhatsAppService(http_client=client)
+
+        await service.send_message("584121234567", "Hola")
+        await service.mark_message_as_read("wamid.0")
+        await client.aclose()
+
+    assert [str(r.url) for r in requests] == ["https://graph.facebook.com/v18.0/123456/messages"] * 2
+    assert requests[0].headers["Authorization"] == "Bearer test_token"
+
+
+@pytest.mark.asyncio
+async def test_shared_http_client_is_reused_until_closed():
+    """Test: Todas las instancias comparten un cliente hasta cerrarlo en el shutdown."""
+    with patch('src.infrastructure.external.whatsapp_service.settings', mock_settings):
+        from src.infrastructure.external.whatsapp_service import (
+            WhatsAppService,
+            close_whatsapp_http_client
+        )
+        first = WhatsAppService().http_client
+        assert WhatsAppService().http_client is first
+
+        await close_whatsapp_http_client()
+        assert first.is_closed
+        assert WhatsAppService().http_client is not first
+        await close_whatsapp_http_client()
+
+
+@pytest.mark.asyncio
+async def test_upload_media_and_send_document_by_id(tmp_path):
+    """Test: upload_media sube multipart a /media y send_document usa el ID."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/media"):
+            return httpx.Response(200, json={"id": "media-123"})
+        return httpx.Response(200, json={"messages": [{"id": "wamid.1"}]})
+
+    pdf = tmp_path / "catalog.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+
+    with patch('src.infrastructure.external.whatsapp_service.settings', mock_settings):
+        from src.infrastructure.external.whatsapp_service import WhatsAppService
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        service = WhatsAppService(http_client=client)
+
+        media_id = await service.upload_media(str(pdf))
+        await service.send_document("584121234567", media_id=media_id, filename="Catalogo.pdf")
+        await client.aclose()
+
+    assert media_id == "media-123"
+    assert requests[0].headers["Content-Type"].startswith("multipart/form-data")
+    assert b"%PDF-1.4" in requests[0].content
+    document = json.loads(requests[1].content)["document"]
+    assert document == {"id": "media-123", "caption": "", "filename": "Catalogo.pdf"}